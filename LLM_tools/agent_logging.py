@@ -0,0 +1,225 @@
+# Shared logging for all agents.
+#
+# Every agent used to set up its own logging: setupLogger added a new FileHandler to
+# the agent and llm_metrics loggers on every run (handlers leaked, later runs wrote
+# each line several times), picked the file name by counting the log directory, and
+# wrote synchronously from the event loop. The orchestrator printed full state
+# snapshots to stdout instead.
+#
+# Now there is one subsystem for the whole process:
+#
+#   - the PenAgent loggers get a single QueueHandler, so logging on the hot path is a
+#     queue put; a QueueListener thread does the formatting and the file writes
+#   - records are stamped with run id (llm_metrics.startRun), agent and graph node
+#   - each agent writes to one size-rotated file in its log directory, JSON lines by
+#     default (PENAGENT_LOG_FORMAT=text for the old "time | level | message" lines)
+#   - handlers are attached once per process, setupLogging is safe to call every run
+#
+# Use %-style arguments (logger.info("[NODE] %s", value)) so messages below the
+# configured level are never formatted. Extra structured fields can be passed with
+# extra={"fields": {...}}.
+
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from typing import Dict, Optional
+from dotenv import load_dotenv
+
+from LLM_tools.llm_metrics import currentRun
+
+load_dotenv()
+
+# ------------------------------------------------------------------------------- #
+#                                       Config                                    #
+# ------------------------------------------------------------------------------- #
+
+LOG_LEVEL = os.getenv(key="PENAGENT_LOG_LEVEL", default="INFO").upper()
+LOG_FORMAT = os.getenv(key="PENAGENT_LOG_FORMAT", default="jsonl").lower()
+LOG_MAX_BYTES = int(float(os.getenv(key="PENAGENT_LOG_MAX_MB", default="10")) * 1024 * 1024)
+LOG_BACKUPS = int(os.getenv(key="PENAGENT_LOG_BACKUPS", default="5"))
+
+# loggers of the PenAgent modules; third-party loggers keep their own configuration
+PENAGENT_LOGGERS = [
+    "nmap_agent",
+    "sqlmap_agent",
+    "orchestrator_agent",
+    "llm_metrics",
+    "llm_calls",
+    "llm_factory",
+    "llm_cache",
+    "llm_scheduler",
+    "model_router",
+    "speculation",
+    "batch_planning",
+    "fast_paths",
+    "graph_render",
+    "scan_dedup",
+    "scan_batcher",
+    "host_db",
+    "artifact_store",
+]
+
+TEXT_FORMAT = "%(asctime)s | %(levelname)s | %(run_id)s | %(node)s | %(message)s"
+
+# set by setupLogging for the running agent, inherited by its tasks and threads
+currentAgent: ContextVar[Optional[str]] = ContextVar("log_agent", default=None)
+currentNode: ContextVar[Optional[str]] = ContextVar("log_node", default=None)
+
+_queue = queue.SimpleQueue()
+_router: Optional["agentRouter"] = None
+_listener: Optional[QueueListener] = None
+_setupLock = threading.Lock()
+
+# ------------------------------------------------------------------------------- #
+#                                      Handlers                                   #
+# ------------------------------------------------------------------------------- #
+
+
+class contextQueueHandler(QueueHandler):
+    """Stamps run / agent / node on a record and hands it to the listener thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # context variables are only visible here, in the thread that logged
+        record.run_id = currentRun.get()
+        record.agent = getattr(record, "agent", None) or currentAgent.get()
+        record.node = getattr(record, "node", None) or currentNode.get() or graphNode() or "-"
+
+        # rendered now so mutable arguments are logged as they are at this point
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+
+        return record
+
+
+class agentRouter(logging.Handler):
+    """Writes every record to the log file of the agent it came from."""
+
+    def __init__(self):
+        super().__init__()
+        self.files: Dict[str, logging.Handler] = {}
+
+        # records outside of any agent run only surface when they matter
+        self.fallback = logging.StreamHandler(sys.stderr)
+        self.fallback.setLevel(logging.WARNING)
+        self.fallback.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    def addAgent(self, agent: str, path: Path):
+        if agent in self.files:
+            return
+
+        handler = RotatingFileHandler(
+            path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS, encoding="utf-8", delay=True
+        )
+        handler.setFormatter(
+            jsonFormatter() if LOG_FORMAT == "jsonl" else logging.Formatter(TEXT_FORMAT)
+        )
+        self.files[agent] = handler
+
+    def emit(self, record: logging.LogRecord):
+        handler = self.files.get(record.agent)
+
+        if handler is not None:
+            handler.handle(record)
+        elif record.levelno >= self.fallback.level:
+            self.fallback.handle(record)
+
+    def close(self):
+        for handler in self.files.values():
+            handler.close()
+        super().close()
+
+
+class jsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "run_id": record.run_id,
+            "agent": record.agent,
+            "node": record.node,
+            "message": record.getMessage(),
+        }
+
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+
+        return json.dumps(entry, default=str)
+
+
+# ------------------------------------------------------------------------------- #
+#                                  Helper functions                               #
+# ------------------------------------------------------------------------------- #
+
+
+def setupLogging(agent: str, logDir: Path) -> logging.Logger:
+    """
+    Route the logs of this agent run to logDir and return the agent logger.
+
+    The queue handler, the listener thread and the agent's file are set up on the first
+    call; later calls only bind the current context to the agent.
+    """
+    global _router, _listener
+
+    with _setupLock:
+        if _listener is None:
+            _router = agentRouter()
+            _listener = QueueListener(_queue, _router)
+            _listener.start()
+            atexit.register(stopLogging)
+
+            handler = contextQueueHandler(_queue)
+            for name in PENAGENT_LOGGERS:
+                logger = logging.getLogger(name)
+                logger.setLevel(LOG_LEVEL)
+                logger.addHandler(handler)
+                logger.propagate = False
+
+        if agent not in _router.files:
+            logDir.mkdir(parents=True, exist_ok=True)
+            suffix = "jsonl" if LOG_FORMAT == "jsonl" else "log"
+            _router.addAgent(agent, logDir / f"{agent}_agent.{suffix}")
+
+    currentAgent.set(agent)
+    return logging.getLogger(f"{agent}_agent")
+
+
+def stopLogging():
+    # drains the queue and closes the files, at exit or before reading the logs back
+    global _listener
+
+    with _setupLock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+            _router.close()
+
+            for name in PENAGENT_LOGGERS:
+                logger = logging.getLogger(name)
+                for handler in [h for h in logger.handlers if isinstance(h, contextQueueHandler)]:
+                    logger.removeHandler(handler)
+                logger.propagate = True
+
+
+def graphNode() -> Optional[str]:
+    # LangGraph keeps the config of the running node in a context variable; only
+    # looked up when langchain is already loaded
+    module = sys.modules.get("langchain_core.runnables.config")
+    if module is None:
+        return None
+
+    config = module.var_child_runnable_config.get() or {}
+    return config.get("metadata", {}).get("langgraph_node")
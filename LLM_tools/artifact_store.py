@@ -0,0 +1,207 @@
+# Content-addressed store for raw tool outputs.
+#
+# Raw nmap / sqlmap outputs used to live in the LangGraph state
+# (hostDiscovery.last_tool_output, hostMemory.last_tool_output,
+# attackVectorMemory.last_tool_result, the orchestrator's raw_tool_result). The
+# checkpointer copies and serializes the state after every step, so every kilobyte of
+# scan output was paid for again on every later step of the run.
+#
+# Outputs are now written once to PENAGENT_ARTIFACT_DIR, zlib-compressed and named by
+# the sha256 of their content, so identical outputs are stored once. The state only
+# keeps a small reference with the fields the routing logic looks at:
+#
+#   {"artifact": "<sha256>", "bytes": 5231, "success": True, "return_code": 0, ...}
+#
+# toolResultDict (context_compaction.py) resolves references, so the compaction and
+# fast path helpers accept either form. The encoded JSON of recently used artifacts is
+# kept in an LRU cache, every get decodes a fresh copy so callers can modify what they
+# get; outputs smaller than PENAGENT_ARTIFACT_MIN_BYTES stay inline.
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict, defaultdict
+from pathlib import Path
+from typing import Any, Dict, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ------------------------------------------------------------------------------- #
+#                                       Config                                    #
+# ------------------------------------------------------------------------------- #
+
+ARTIFACT_DIR = os.getenv(key="PENAGENT_ARTIFACT_DIR", default="artifacts")
+ARTIFACT_CACHE = int(os.getenv(key="PENAGENT_ARTIFACT_CACHE", default="64"))
+ARTIFACT_MIN_BYTES = int(os.getenv(key="PENAGENT_ARTIFACT_MIN_BYTES", default="512"))
+
+COMPRESSION_LEVEL = 6
+
+# result fields copied into the reference, enough to route without loading the output
+SUMMARY_FIELDS = ("success", "return_code", "timed_out", "skipped")
+
+logger = logging.getLogger("artifact_store")
+
+_artifactStore = None
+_artifactStoreLock = threading.Lock()
+
+# ------------------------------------------------------------------------------- #
+#                                       Store                                     #
+# ------------------------------------------------------------------------------- #
+
+
+class artifactStore:
+    """Compressed JSON blobs on disk, addressed by the sha256 of their content."""
+
+    def __init__(self, root: str = ARTIFACT_DIR, cacheSize: int = ARTIFACT_CACHE):
+        self.root = Path(root)
+        self.cacheSize = cacheSize
+
+        self._cache: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, int] = defaultdict(int)
+
+    def pathOf(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:]
+
+    def put(self, value: Any, data: Optional[bytes] = None) -> Dict[str, Any]:
+        """Store a JSON-serializable value and return its reference (data: encoded value)."""
+        data = encodeValue(value) if data is None else data
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.pathOf(digest)
+
+        if path.exists():
+            # keeps artifacts that are still produced out of prune
+            os.utime(path)
+            with self._lock:
+                self._stats["deduplicated"] += 1
+        else:
+            compressed = zlib.compress(data, COMPRESSION_LEVEL)
+            path.parent.mkdir(parents=True, exist_ok=True)
+
+            # concurrent writers of the same content produce the same file
+            tmpPath = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmpPath.write_bytes(compressed)
+            os.replace(tmpPath, path)
+
+            with self._lock:
+                self._stats["written"] += 1
+                self._stats["bytes_raw"] += len(data)
+                self._stats["bytes_stored"] += len(compressed)
+
+        self.remember(digest, data)
+
+        reference = {"artifact": digest, "bytes": len(data)}
+        if isinstance(value, dict):
+            reference.update({k: value[k] for k in SUMMARY_FIELDS if k in value})
+        return reference
+
+    def get(self, digest: str) -> Any:
+        """Stored value of a digest. Raises FileNotFoundError for unknown digests."""
+        with self._lock:
+            if digest in self._cache:
+                self._cache.move_to_end(digest)
+                self._stats["cache_hits"] += 1
+                return json.loads(self._cache[digest])
+
+        data = zlib.decompress(self.pathOf(digest).read_bytes())
+
+        with self._lock:
+            self._stats["reads"] += 1
+        self.remember(digest, data)
+        return json.loads(data)
+
+    def remember(self, digest: str, data: bytes):
+        with self._lock:
+            self._cache[digest] = data
+            self._cache.move_to_end(digest)
+            while len(self._cache) > self.cacheSize:
+                self._cache.popitem(last=False)
+
+    def prune(self, maxAgeDays: float) -> int:
+        # artifacts not produced for maxAgeDays; 0 removes everything
+        cutoff = time.time() - maxAgeDays * 86400
+        removed = 0
+
+        for path in self.root.glob("*/*"):
+            if path.is_file() and path.stat().st_mtime <= cutoff:
+                path.unlink(missing_ok=True)
+                removed += 1
+
+        with self._lock:
+            self._cache.clear()
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        files = [path for path in self.root.glob("*/*") if path.is_file()]
+
+        with self._lock:
+            return {
+                "path": str(self.root),
+                "files": len(files),
+                "bytes_on_disk": sum(path.stat().st_size for path in files),
+                **self._stats,
+            }
+
+
+# ------------------------------------------------------------------------------- #
+#                                  Helper functions                               #
+# ------------------------------------------------------------------------------- #
+
+
+def getArtifactStore() -> artifactStore:
+    global _artifactStore
+
+    if _artifactStore is None:
+        with _artifactStoreLock:
+            if _artifactStore is None:
+                _artifactStore = artifactStore()
+
+    return _artifactStore
+
+
+def encodeValue(value: Any) -> bytes:
+    return json.dumps(value, sort_keys=True, default=str).encode("utf-8")
+
+
+def isArtifact(value: Any) -> bool:
+    return isinstance(value, dict) and isinstance(value.get("artifact"), str)
+
+
+def storeOutput(value: Any) -> Any:
+    """Reference to the stored value; small values and failed writes stay inline."""
+    if value is None or isArtifact(value):
+        return value
+
+    try:
+        data = encodeValue(value)
+    except (TypeError, ValueError):
+        return value
+    if len(data) < ARTIFACT_MIN_BYTES:
+        return value
+
+    try:
+        return getArtifactStore().put(value, data=data)
+    except OSError as e:
+        logger.warning("[ARTIFACT STORE] unable to store output, keeping it inline: %s", e)
+        return value
+
+
+def loadOutput(value: Any) -> Any:
+    """The full value behind a reference, anything else unchanged."""
+    if not isArtifact(value):
+        return value
+
+    try:
+        return getArtifactStore().get(value["artifact"])
+    except (OSError, ValueError, zlib.error) as e:
+        logger.warning("[ARTIFACT STORE] unable to load %s: %s", value["artifact"], e)
+        return {
+            **{k: value[k] for k in SUMMARY_FIELDS if k in value},
+            "stdout": "",
+            "stderr": f"Raw output {value['artifact']} is no longer available.",
+        }
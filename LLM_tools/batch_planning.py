@@ -0,0 +1,98 @@
+# Batched planning.
+#
+# The nmap and sqlmap agents plan every host / attack vector with its own LLM call,
+# and those prompts differ only in a couple of lines. In batch mode one structured
+# request carries up to PLAN_BATCH_SIZE items and returns one plan per item.
+#
+# Each returned plan is checked on its own: plans for unknown or duplicated items and
+# plans that fail the agent's check are dropped, and the agent plans those items one
+# by one as before. A failed batch request only costs the fallback to single planning.
+#
+# Enabled with LLM_PLAN_BATCH_SIZE > 1 (or "penagent --plan-batch N ...").
+
+import logging
+import os
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict, List
+from dotenv import load_dotenv
+
+from LLM_tools.llm_calls import invokeStructured
+
+load_dotenv()
+
+# ------------------------------------------------------------------------------- #
+#                                       Config                                    #
+# ------------------------------------------------------------------------------- #
+
+PLAN_BATCH_SIZE = int(os.getenv(key="LLM_PLAN_BATCH_SIZE", default="1"))
+
+logger = logging.getLogger("batch_planning")
+
+# per node: requests, items sent, items planned, items left to single planning
+batchStats: Dict[str, Dict[str, int]] = defaultdict(
+    lambda: {"batches": 0, "items": 0, "planned": 0, "fallbacks": 0}
+)
+_statsLock = threading.Lock()
+
+# ------------------------------------------------------------------------------- #
+#                                  Batch planning                                 #
+# ------------------------------------------------------------------------------- #
+
+
+async def planBatch(
+    node: str,
+    prompt: str,
+    schema,
+    keys: List[str],
+    itemKey: Callable[[Any], str],
+    itemValid: Callable[[Any], bool],
+) -> Dict[str, Any]:
+    """
+    Plan several items with one structured call.
+
+    Args:
+        node: Node name used for routing, metrics and statistics
+        prompt: Prompt listing every item of the batch
+        schema: Pydantic model with a "plans" list, one entry per item
+        keys: Keys of the items in this batch
+        itemKey: Returns the key a returned plan belongs to
+        itemValid: Per-item check, invalid plans are dropped
+
+    Returns:
+        Item key -> plan, only for the items that got a valid plan
+    """
+    plans = {}
+
+    try:
+        result = await invokeStructured(node=node, prompt=prompt, schema=schema)
+    except Exception as e:
+        logger.warning(f"[BATCH PLANNING] {node} batch of {len(keys)} failed: {e}")
+        result = None
+
+    for plan in result.plans if result else []:
+        key = itemKey(plan)
+        if key in keys and key not in plans and itemValid(plan):
+            plans[key] = plan
+
+    with _statsLock:
+        stats = batchStats[node]
+        stats["batches"] += 1
+        stats["items"] += len(keys)
+        stats["planned"] += len(plans)
+        stats["fallbacks"] += len(keys) - len(plans)
+
+    missing = [key for key in keys if key not in plans]
+    logger.info(
+        f"[BATCH PLANNING] {node} planned {len(plans)}/{len(keys)} items"
+        + (f", single planning for {missing}" if missing else "")
+    )
+
+    return plans
+
+
+def batchReport(prefix: str = "") -> Dict[str, Dict[str, int]]:
+    with _statsLock:
+        return {
+            node: dict(stats) for node, stats in batchStats.items() if node.startswith(prefix)
+        }
@@ -0,0 +1,267 @@
+# Prompt context compaction.
+#
+# Raw tool outputs and state dumps grow with every scan, and so does inference time on
+# the local model. The helpers below reduce them to the facts a node actually reasons
+# about (open ports, injection findings, discovered endpoints, ...) and cap the result
+# at a token budget before it is pasted into a prompt.
+#
+# Token counts are estimated (~4 characters per token), which is close enough for
+# budgeting and does not need a tokenizer.
+
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional
+from dotenv import load_dotenv
+
+from LLM_tools.artifact_store import loadOutput
+
+load_dotenv()
+
+# ------------------------------------------------------------------------------- #
+#                                       Config                                    #
+# ------------------------------------------------------------------------------- #
+
+CHARS_PER_TOKEN = 4
+
+# budget for a single tool output embedded in a prompt
+TOOL_OUTPUT_TOKENS = int(os.getenv(key="PROMPT_TOOL_OUTPUT_TOKENS", default="600"))
+
+# budget for agent state / memory dumps embedded in a prompt
+STATE_TOKENS = int(os.getenv(key="PROMPT_STATE_TOKENS", default="1200"))
+
+NMAP_PORT_LINE = re.compile(r"^\d+/(tcp|udp|sctp)\s+(open|filtered|open\|filtered)\b")
+NMAP_HOST_LINES = (
+    "Nmap scan report for",
+    "Host is up",
+    "Not shown:",
+    "MAC Address:",
+    "OS details:",
+    "Running:",
+    "Aggressive OS guesses:",
+    "Service Info:",
+    "Nmap done:",
+)
+
+SQLMAP_KEYWORDS = (
+    "parameter",
+    "injectable",
+    "dbms",
+    "type:",
+    "title:",
+    "payload:",
+    "warning",
+    "critical",
+    "all tested parameters",
+    "appears",
+    "does not",
+)
+
+SQLMAP_PREFIX = re.compile(r"^\[\d{2}:\d{2}:\d{2}\]\s*")
+
+# ------------------------------------------------------------------------------- #
+#                                  Token budgeting                                #
+# ------------------------------------------------------------------------------- #
+
+
+def estimateTokens(text: Optional[str]) -> int:
+    if not text:
+        return 0
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def truncateText(text: str, maxTokens: int) -> str:
+    # keep the head and the tail - nmap/sqlmap put their verdict at the end
+    maxChars = maxTokens * CHARS_PER_TOKEN
+    if len(text) <= maxChars:
+        return text
+
+    head = maxChars * 2 // 3
+    tail = maxChars - head
+    skipped = len(text) - head - tail
+    return f"{text[:head]}\n[... {skipped} characters omitted ...]\n{text[-tail:]}"
+
+
+def toolResultDict(rawOutput: Any) -> Dict[str, Any]:
+    """
+    Normalize the different shapes a tool result arrives in to the Kali API dict.
+
+    FastMCP returns (content, {"result": {...}}), some agents store the dict itself or
+    an artifact_store reference to it, and LangChain tool messages carry a list of text
+    blocks.
+    """
+    rawOutput = loadOutput(rawOutput)
+
+    if isinstance(rawOutput, tuple) and len(rawOutput) > 1:
+        structured = rawOutput[1]
+        if isinstance(structured, dict):
+            return structured.get("result", structured)
+
+    if isinstance(rawOutput, dict):
+        return rawOutput
+
+    if isinstance(rawOutput, list):
+        rawOutput = "\n".join(
+            getattr(item, "text", None) or str(item) for item in rawOutput
+        )
+
+    if isinstance(rawOutput, str):
+        try:
+            parsed = json.loads(rawOutput)
+            if isinstance(parsed, dict):
+                return parsed
+        except ValueError:
+            pass
+        return {"stdout": rawOutput}
+
+    return {"stdout": "" if rawOutput is None else str(rawOutput)}
+
+
+def statusLine(result: Dict[str, Any]) -> str:
+    status = f"success={result.get('success')} return_code={result.get('return_code')}"
+    if result.get("timed_out"):
+        status += " timed_out=True (partial results)"
+    return status
+
+
+def stderrLines(result: Dict[str, Any], limit: int = 5) -> List[str]:
+    lines = [l.strip() for l in (result.get("stderr") or "").splitlines() if l.strip()]
+    return [f"stderr: {l}" for l in lines[:limit]]
+
+
+# ------------------------------------------------------------------------------- #
+#                                   Tool outputs                                  #
+# ------------------------------------------------------------------------------- #
+
+
+def compactNmapOutput(rawOutput: Any, maxTokens: int = TOOL_OUTPUT_TOKENS) -> str:
+    """Host lines, open/filtered ports, OS and service info and script findings only."""
+    if not rawOutput:
+        return ""
+
+    result = toolResultDict(rawOutput)
+    facts = [statusLine(result)]
+
+    for line in (result.get("stdout") or "").splitlines():
+        stripped = line.strip()
+        if not stripped:
+            continue
+
+        if NMAP_PORT_LINE.match(stripped) or stripped.startswith(NMAP_HOST_LINES):
+            facts.append(stripped)
+        elif stripped.startswith("|"):
+            # NSE script output, keep it short
+            facts.append(stripped[:160])
+
+    facts.extend(stderrLines(result))
+    return truncateText("\n".join(facts), maxTokens)
+
+
+def compactSqlmapOutput(rawOutput: Any, maxTokens: int = TOOL_OUTPUT_TOKENS) -> str:
+    """Injection findings, DBMS fingerprint and warnings, without sqlmap's repetition."""
+    if not rawOutput:
+        return ""
+
+    result = toolResultDict(rawOutput)
+    facts = [statusLine(result)]
+    seen = set()
+
+    for line in (result.get("stdout") or "").splitlines():
+        stripped = SQLMAP_PREFIX.sub("", line.strip())
+        if not stripped or stripped in seen:
+            continue
+
+        if any(keyword in stripped.lower() for keyword in SQLMAP_KEYWORDS):
+            seen.add(stripped)
+            facts.append(stripped[:300])
+
+    facts.extend(stderrLines(result))
+    return truncateText("\n".join(facts), maxTokens)
+
+
+def compactToolOutput(rawOutput: Any, maxTokens: int = TOOL_OUTPUT_TOKENS) -> str:
+    """Generic fallback: stdout without banners and separators, capped at the budget."""
+    if not rawOutput:
+        return ""
+
+    result = toolResultDict(rawOutput)
+    lines = [statusLine(result)]
+
+    for line in (result.get("stdout") or "").splitlines():
+        stripped = line.strip()
+        if stripped and not stripped.startswith(("===", "[+]", "Progress:")):
+            lines.append(stripped)
+
+    lines.extend(stderrLines(result))
+    return truncateText("\n".join(lines), maxTokens)
+
+
+# ------------------------------------------------------------------------------- #
+#                                 State and memory                                #
+# ------------------------------------------------------------------------------- #
+
+
+def pruneValue(value: Any, maxString: int, maxItems: int) -> Any:
+    # drop empty fields, shorten long strings and lists
+    if hasattr(value, "model_dump"):
+        value = value.model_dump(mode="json")
+
+    if isinstance(value, dict):
+        pruned = {}
+        for key, item in value.items():
+            item = pruneValue(item, maxString, maxItems)
+            if item not in (None, "", [], {}):
+                pruned[key] = item
+        return pruned
+
+    if isinstance(value, (list, tuple)):
+        items = [pruneValue(item, maxString, maxItems) for item in value[:maxItems]]
+        if len(value) > maxItems:
+            items.append(f"... {len(value) - maxItems} more")
+        return items
+
+    if isinstance(value, str) and len(value) > maxString:
+        return value[:maxString] + f"... [{len(value) - maxString} chars omitted]"
+
+    return value
+
+
+def compactState(data: Any, maxTokens: int = STATE_TOKENS) -> str:
+    """
+    Compact JSON of a state/memory object (pydantic models are dumped on the way).
+
+    Strings and lists are shortened step by step until the result fits the budget.
+    """
+    text = ""
+    for maxString, maxItems in [(400, 30), (200, 15), (100, 8), (60, 4)]:
+        pruned = pruneValue(data, maxString, maxItems)
+        text = json.dumps(pruned, separators=(",", ":"), default=str)
+        if estimateTokens(text) <= maxTokens:
+            return text
+
+    return truncateText(text, maxTokens)
+
+
+def compactGobusterMemory(memory: List[Dict[str, Any]], maxTokens: int = STATE_TOKENS) -> str:
+    """One line per scan (arguments, signals) followed by one line per unique endpoint."""
+    lines = []
+    endpoints = {}
+
+    for index, scan in enumerate(memory or []):
+        toolArgs = scan.get("tool_args") or {}
+        lines.append(
+            f"scan {index + 1}: args={json.dumps(toolArgs, default=str)} "
+            f"endpoints={len(scan.get('endpoint', []))} "
+            f"signals={','.join(scan.get('signals', [])) or 'none'}"
+        )
+
+        for endpoint in scan.get("endpoint", []):
+            endpoints[(endpoint.get("path"), endpoint.get("status"))] = endpoint
+
+    for endpoint in endpoints.values():
+        line = f"{endpoint.get('path')} {endpoint.get('status')} {endpoint.get('type')}"
+        if endpoint.get("redirect_address"):
+            line += f" -> {endpoint['redirect_address']}"
+        lines.append(line)
+
+    return truncateText("\n".join(lines), maxTokens)
@@ -0,0 +1,133 @@
+# Deterministic fast paths in front of LLM decision nodes.
+#
+# Some decisions are already answered by the tool output itself: sqlmap prints
+# "is vulnerable" or "all tested parameters do not appear to be injectable", and an
+# nmap scan that finished cleanly with open ports needs no second opinion. The rules
+# below return the decision directly when the evidence is conclusive and None when it
+# is not, in which case the node asks the model as before.
+#
+# Every decision is counted per node, so the runners can report how many inference
+# calls the rules saved.
+
+import logging
+import re
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Optional
+
+from LLM_tools.context_compaction import toolResultDict
+
+logger = logging.getLogger("fast_paths")
+
+fastPathStats: Dict[str, Dict[str, int]] = defaultdict(lambda: {"rule": 0, "llm": 0})
+_statsLock = threading.Lock()
+
+SQLMAP_VULNERABLE = re.compile(
+    r"(parameter '[^']+' is vulnerable|sqlmap identified the following injection point)",
+    re.IGNORECASE,
+)
+SQLMAP_NOT_INJECTABLE = "all tested parameters do not appear to be injectable"
+SQLMAP_DBMS = re.compile(r"the back-end DBMS is (\S+)", re.IGNORECASE)
+
+NMAP_OPEN_PORT = re.compile(r"^\d+/(tcp|udp|sctp)\s+open\s", re.MULTILINE)
+
+# ------------------------------------------------------------------------------- #
+#                                       Rules                                     #
+# ------------------------------------------------------------------------------- #
+
+
+def sqlmapVerdict(rawOutput: Any) -> Optional[Dict[str, Any]]:
+    """agentFeedback fields for a conclusive sqlmap result, None if ambiguous."""
+    if not rawOutput:
+        return None
+
+    stdout = toolResultDict(rawOutput).get("stdout") or ""
+
+    vulnerable = SQLMAP_VULNERABLE.search(stdout)
+    if vulnerable:
+        dbms = SQLMAP_DBMS.search(stdout)
+        reasoning = f"sqlmap reported: {vulnerable.group(0)}."
+        if dbms:
+            reasoning += f" Back-end DBMS: {dbms.group(1)}."
+
+        return {
+            "vulnerability_found": True,
+            "exploitation_possible": True,
+            "confidence": 0.95,
+            "reasoning": reasoning,
+        }
+
+    if SQLMAP_NOT_INJECTABLE in stdout.lower():
+        return {
+            "vulnerability_found": False,
+            "exploitation_possible": False,
+            "confidence": 0.0,
+            "reasoning": "No explicit SQL injection evidence found.",
+        }
+
+    return None
+
+
+def nmapEvaluation(rawOutput: Any) -> Optional[Dict[str, Any]]:
+    """agentFeedback fields for a clean scan with open ports or a hard failure."""
+    if not rawOutput:
+        return None
+
+    result = toolResultDict(rawOutput)
+    stdout = result.get("stdout") or ""
+
+    if (
+        result.get("success")
+        and not result.get("timed_out")
+        and result.get("return_code") in (0, None)
+    ):
+        openPorts = len(NMAP_OPEN_PORT.findall(stdout))
+        if openPorts:
+            return {
+                "confidence": 0.8,
+                "reasoning": f"Scan completed cleanly and reported {openPorts} open port(s).",
+            }
+
+    if result.get("success") is False and not stdout.strip():
+        stderr = (result.get("stderr") or "").strip().splitlines()
+        return {
+            "confidence": 0.0,
+            "reasoning": f"Tool call failed without output: {stderr[0] if stderr else 'no error message'}",
+        }
+
+    return None
+
+
+# ------------------------------------------------------------------------------- #
+#                                    Statistics                                   #
+# ------------------------------------------------------------------------------- #
+
+
+def recordDecision(node: str, byRule: bool):
+    with _statsLock:
+        fastPathStats[node]["rule" if byRule else "llm"] += 1
+
+    if byRule:
+        logger.info(f"[FAST PATH] {node} -> decided by rule, LLM call skipped")
+
+
+def fastPathReport(prefix: str = "") -> Dict[str, Dict[str, Any]]:
+    with _statsLock:
+        report = {}
+        for node, counts in fastPathStats.items():
+            if not node.startswith(prefix):
+                continue
+
+            total = counts["rule"] + counts["llm"]
+            report[node] = {
+                **counts,
+                "hit_rate": round(counts["rule"] / total, 3) if total else 0.0,
+            }
+
+        return report
+
+
+def resetFastPathStats(prefix: str = ""):
+    with _statsLock:
+        for node in [n for n in fastPathStats if n.startswith(prefix)]:
+            del fastPathStats[node]
@@ -0,0 +1,55 @@
+# Opt-in rendering of the agent graph diagrams.
+#
+# The agents used to call graph.get_graph().draw_mermaid_png() on every run. Mermaid
+# rendering is slow and by default goes through the remote mermaid.ink service, so it
+# added seconds (or a network failure) to every agent call for a picture that only
+# changes when the graph code does.
+#
+# Diagrams are now written only when asked for: PENAGENT_RENDER_GRAPHS=1 (or
+# "penagent --render-graphs ..."). Each graph is rendered at most once per process.
+
+import logging
+import os
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ------------------------------------------------------------------------------- #
+#                                       Config                                    #
+# ------------------------------------------------------------------------------- #
+
+RENDER_GRAPHS = os.getenv(key="PENAGENT_RENDER_GRAPHS", default="0").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+logger = logging.getLogger("graph_render")
+
+_rendered = set()
+_renderLock = threading.Lock()
+
+# ------------------------------------------------------------------------------- #
+#                                  Helper functions                               #
+# ------------------------------------------------------------------------------- #
+
+
+def renderGraph(graph, path: str):
+    """Write the Mermaid PNG of a compiled graph to path, if rendering is enabled."""
+    if not RENDER_GRAPHS:
+        return
+
+    with _renderLock:
+        if path in _rendered:
+            return
+        _rendered.add(path)
+
+    try:
+        pngBytes = graph.get_graph().draw_mermaid_png()
+        with open(path, "wb") as f:
+            f.write(pngBytes)
+        logger.info(f"[GRAPH RENDER] wrote {path}")
+    except Exception as e:
+        # a diagram is never worth failing an agent run for
+        logger.warning(f"[GRAPH RENDER] unable to render {path}: {e}")
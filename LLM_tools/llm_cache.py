@@ -0,0 +1,211 @@
+# Content-addressed cache for LLM responses.
+#
+# Entries are keyed by a hash of (model, temperature, per-call options, prompt, output
+# schema), so only exact repeats hit. Responses live in a small SQLite database that is bounded by size;
+# once the limit is exceeded the least recently used entries are evicted.
+#
+# The cache is opt-in: set LLM_CACHE=1 (or run "penagent --llm-cache ...").
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ------------------------------------------------------------------------------- #
+#                                       Config                                    #
+# ------------------------------------------------------------------------------- #
+
+CACHE_ENABLED = os.getenv(key="LLM_CACHE", default="0").lower() in ("1", "true", "yes")
+CACHE_PATH = os.getenv(key="LLM_CACHE_PATH", default="llm_cache.sqlite")
+CACHE_MAX_MB = float(os.getenv(key="LLM_CACHE_MAX_MB", default="64"))
+
+logger = logging.getLogger("llm_cache")
+
+_cache = None
+_cacheLock = threading.Lock()
+
+# ------------------------------------------------------------------------------- #
+#                                        Cache                                    #
+# ------------------------------------------------------------------------------- #
+
+
+class llmCache:
+    """SQLite backed exact-match cache with LRU eviction and hit/miss statistics."""
+
+    def __init__(self, path: str = CACHE_PATH, maxBytes: int = None):
+        self.path = path
+        self.maxBytes = maxBytes or int(CACHE_MAX_MB * 1024 * 1024)
+
+        self.hits = 0
+        self.misses = 0
+        self.nodeStats = defaultdict(lambda: {"hits": 0, "misses": 0})
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                node TEXT,
+                response TEXT,
+                size INTEGER,
+                created REAL,
+                last_access REAL,
+                hits INTEGER DEFAULT 0
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_lru ON responses(last_access)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def makeKey(
+        model: str,
+        temperature: float,
+        prompt: str,
+        schema=None,
+        options: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        # options are the extra ChatOllama kwargs (num_predict, stop, reasoning, ...); a
+        # capped or thinking-free answer must not be served to a call without them
+        if schema is None:
+            schemaText = ""
+        elif isinstance(schema, dict):
+            schemaText = json.dumps(schema, sort_keys=True)
+        else:
+            schemaText = json.dumps(schema.model_json_schema(), sort_keys=True)
+
+        material = json.dumps(
+            {
+                "model": model,
+                "temperature": temperature,
+                "options": options or {},
+                "prompt": prompt,
+                "schema": schemaText,
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, key: str, node: str = "") -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                self.nodeStats[node]["misses"] += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE responses SET last_access = ?, hits = hits + 1 WHERE key = ?",
+                (time.time(), key),
+            )
+            self._conn.commit()
+
+        self.hits += 1
+        self.nodeStats[node]["hits"] += 1
+        return row[0]
+
+    def put(self, key: str, response: str, model: str = "", node: str = ""):
+        size = len(response.encode("utf-8"))
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO responses
+                    (key, model, node, response, size, created, last_access, hits)
+                VALUES (?, ?, ?, ?, ?, ?, ?, 0)
+                """,
+                (key, model, node, response, size, now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+
+        if total <= self.maxBytes:
+            return
+
+        evicted = 0
+        rows = self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY last_access ASC"
+        ).fetchall()
+
+        for key, size in rows:
+            if total <= self.maxBytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+
+        logger.info(f"[LLM CACHE] evicted {evicted} entries (size now {total} bytes)")
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            self._conn.execute("VACUUM")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+
+        lookups = self.hits + self.misses
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "entries": entries,
+            "size_bytes": size,
+            "max_bytes": self.maxBytes,
+            "per_node": {node: dict(counts) for node, counts in self.nodeStats.items()},
+        }
+
+
+# ------------------------------------------------------------------------------- #
+#                                  Helper functions                               #
+# ------------------------------------------------------------------------------- #
+
+
+def getCache() -> Optional[llmCache]:
+    # returns None when caching is disabled
+    global _cache
+
+    if not CACHE_ENABLED:
+        return None
+
+    if _cache is None:
+        with _cacheLock:
+            if _cache is None:
+                _cache = llmCache(path=CACHE_PATH)
+
+    return _cache
+
+
+def enableCache(path: Optional[str] = None):
+    global CACHE_ENABLED, CACHE_PATH
+
+    CACHE_ENABLED = True
+    if path:
+        CACHE_PATH = path
@@ -0,0 +1,426 @@
+# Single call path for every LLM invocation made by the agents.
+#
+# Nodes call invokeStructured / invokeText (or the *Sync variants in the orchestrator)
+# with their node name instead of talking to ChatOllama directly. That gives one place
+# to put the response cache, model routing, request scheduling and anything else that
+# has to wrap a model call.
+
+import logging
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Type, TypeVar
+from pydantic import BaseModel
+
+from LLM_tools.llm_factory import getLLM, DEFAULT_TEMPERATURE
+from LLM_tools.llm_cache import getCache, llmCache
+from LLM_tools.context_compaction import estimateTokens
+from LLM_tools.model_router import candidateModels, recordLatency
+from LLM_tools.llm_scheduler import getScheduler
+from LLM_tools.llm_metrics import recordCall
+
+schemaType = TypeVar("schemaType", bound=BaseModel)
+
+logger = logging.getLogger("llm_calls")
+
+# extra attempts when a constrained generation still fails schema validation
+STRUCTURED_RETRIES = int(os.getenv(key="LLM_STRUCTURED_RETRIES", default="1"))
+
+# classification calls: no thinking, a handful of tokens, stop at the first line
+DECISION_MAX_TOKENS = int(os.getenv(key="LLM_DECISION_MAX_TOKENS", default="8"))
+DECISION_OPTIONS = {
+    "reasoning": False,
+    "num_predict": DECISION_MAX_TOKENS,
+    "stop": ["\n"],
+}
+
+# short structured answers (an enum, a score) do not need thinking either
+NO_THINKING = {"reasoning": False}
+
+THINK_BLOCK = re.compile(r"<think>.*?(</think>|$)", re.DOTALL | re.IGNORECASE)
+
+# estimated prompt tokens per node: {"calls", "total", "max"}
+promptStats: Dict[str, Dict[str, int]] = defaultdict(
+    lambda: {"calls": 0, "total": 0, "max": 0}
+)
+
+# structured calls per node: {"calls", "parse_failures", "retries"}
+structuredStats: Dict[str, Dict[str, int]] = defaultdict(
+    lambda: {"calls": 0, "parse_failures": 0, "retries": 0}
+)
+_statsLock = threading.Lock()
+
+
+class structuredOutputError(ValueError):
+    """Raised when a structured call still fails validation after all retries."""
+
+    def __init__(self, node: str, attempts: int, error, llm_output: str = ""):
+        super().__init__(
+            f"{node}: structured output invalid after {attempts} attempt(s): {error}"
+        )
+        self.node = node
+        self.llm_output = llm_output
+
+
+# ------------------------------------------------------------------------------- #
+#                                   Async calls                                   #
+# ------------------------------------------------------------------------------- #
+
+
+async def invokeStructured(
+    node: str,
+    prompt: str,
+    schema: Type[schemaType],
+    temperature: float = DEFAULT_TEMPERATURE,
+    model: Optional[str] = None,
+    options: Optional[Dict[str, Any]] = None,
+) -> schemaType:
+    recordPromptSize(node, prompt)
+    output = None
+
+    # routed model first, larger tiers only if its output does not validate
+    for index, name in enumerate(candidateModels(node, model)):
+        llm = getLLM(model=name, temperature=temperature, **(options or {}))
+
+        key, cached = cacheLookup(node, llm, temperature, prompt, schema, options)
+        if cached is not None:
+            recordCall(node, name, cached=True)
+            return schema.model_validate_json(cached)
+
+        runnable = structuredRunnable(llm, schema)
+        start = time.perf_counter()
+        result = None
+
+        for attempt in range(STRUCTURED_RETRIES + 1):
+            callStart = time.perf_counter()
+            async with getScheduler().asyncSlot(node, name):
+                output = await runnable.ainvoke(prompt)
+            result = checkStructured(node, output, attempt)
+            recordStructured(node, name, output, callStart, attempt, index, result)
+            if result is not None:
+                break
+
+        recordLatency(node, name, time.perf_counter() - start, fallback=index > 0)
+
+        if result is not None:
+            cacheStore(key, node, llm, result.model_dump_json())
+            return result
+
+        logger.warning(f"[LLM CALL] {node} -> {name} failed validation")
+
+    raise structuredFailure(node, output)
+
+
+async def invokeText(
+    node: str,
+    prompt: str,
+    temperature: float = DEFAULT_TEMPERATURE,
+    model: Optional[str] = None,
+    validate: Optional[Callable[[str], bool]] = None,
+    options: Optional[Dict[str, Any]] = None,
+) -> str:
+    recordPromptSize(node, prompt)
+    candidates = candidateModels(node, model)
+    content = ""
+
+    for index, name in enumerate(candidates):
+        llm = getLLM(model=name, temperature=temperature, **(options or {}))
+
+        key, cached = cacheLookup(node, llm, temperature, prompt, options=options)
+        if cached is not None and isValid(cached, validate):
+            recordCall(node, name, cached=True)
+            return cached
+
+        start = time.perf_counter()
+        async with getScheduler().asyncSlot(node, name):
+            message = await llm.ainvoke(prompt)
+        content = stripReasoning(message.content)
+        recordLatency(node, name, time.perf_counter() - start, fallback=index > 0)
+        recordText(node, name, message, start, index, isValid(content, validate))
+
+        if isValid(content, validate):
+            cacheStore(key, node, llm, content)
+            return content
+
+        logger.warning(f"[LLM CALL] {node} -> {name} returned an invalid answer")
+
+    return content
+
+
+async def invokeDecision(
+    node: str,
+    prompt: str,
+    choices: List[str],
+    model: Optional[str] = None,
+) -> str:
+    """
+    One-word classification: thinking off, tight num_predict, stop at the first line.
+
+    Returns the matching choice (as spelled in choices) or the raw stripped answer if
+    no model produced one of the choices.
+    """
+    answer = await invokeText(
+        node=node,
+        prompt=prompt,
+        temperature=0.0,
+        model=model,
+        validate=lambda text: matchChoice(text, choices) is not None,
+        options=DECISION_OPTIONS,
+    )
+    return matchChoice(answer, choices) or answer.strip()
+
+
+async def invokeBound(node: str, runnable, messages: List[Any], config=None):
+    """
+    Call a runnable built from a shared model (ex. getLLM().bind_tools(...)).
+
+    Used by the tool-calling agents that pass message lists instead of a prompt; the
+    call still goes through the scheduler, latency and metrics.
+    """
+    model = getattr(getattr(runnable, "bound", runnable), "model", "") or ""
+    recordPromptSize(node, "\n".join(str(m.content) for m in messages))
+
+    start = time.perf_counter()
+    async with getScheduler().asyncSlot(node, model):
+        message = await runnable.ainvoke(messages, config=config)
+
+    recordLatency(node, model, time.perf_counter() - start)
+    recordText(node, model, message, start, index=0, valid=True)
+    return message
+
+
+# ------------------------------------------------------------------------------- #
+#                                    Sync calls                                   #
+# ------------------------------------------------------------------------------- #
+
+
+def invokeStructuredSync(
+    node: str,
+    prompt: str,
+    schema: Type[schemaType],
+    temperature: float = DEFAULT_TEMPERATURE,
+    model: Optional[str] = None,
+    options: Optional[Dict[str, Any]] = None,
+) -> schemaType:
+    recordPromptSize(node, prompt)
+    output = None
+
+    for index, name in enumerate(candidateModels(node, model)):
+        llm = getLLM(model=name, temperature=temperature, **(options or {}))
+
+        key, cached = cacheLookup(node, llm, temperature, prompt, schema, options)
+        if cached is not None:
+            recordCall(node, name, cached=True)
+            return schema.model_validate_json(cached)
+
+        runnable = structuredRunnable(llm, schema)
+        start = time.perf_counter()
+        result = None
+
+        for attempt in range(STRUCTURED_RETRIES + 1):
+            callStart = time.perf_counter()
+            with getScheduler().slot(node, name):
+                output = runnable.invoke(prompt)
+            result = checkStructured(node, output, attempt)
+            recordStructured(node, name, output, callStart, attempt, index, result)
+            if result is not None:
+                break
+
+        recordLatency(node, name, time.perf_counter() - start, fallback=index > 0)
+
+        if result is not None:
+            cacheStore(key, node, llm, result.model_dump_json())
+            return result
+
+        logger.warning(f"[LLM CALL] {node} -> {name} failed validation")
+
+    raise structuredFailure(node, output)
+
+
+def invokeTextSync(
+    node: str,
+    prompt: str,
+    temperature: float = DEFAULT_TEMPERATURE,
+    model: Optional[str] = None,
+    validate: Optional[Callable[[str], bool]] = None,
+    options: Optional[Dict[str, Any]] = None,
+) -> str:
+    recordPromptSize(node, prompt)
+    candidates = candidateModels(node, model)
+    content = ""
+
+    for index, name in enumerate(candidates):
+        llm = getLLM(model=name, temperature=temperature, **(options or {}))
+
+        key, cached = cacheLookup(node, llm, temperature, prompt, options=options)
+        if cached is not None and isValid(cached, validate):
+            recordCall(node, name, cached=True)
+            return cached
+
+        start = time.perf_counter()
+        with getScheduler().slot(node, name):
+            message = llm.invoke(prompt)
+        content = stripReasoning(message.content)
+        recordLatency(node, name, time.perf_counter() - start, fallback=index > 0)
+        recordText(node, name, message, start, index, isValid(content, validate))
+
+        if isValid(content, validate):
+            cacheStore(key, node, llm, content)
+            return content
+
+        logger.warning(f"[LLM CALL] {node} -> {name} returned an invalid answer")
+
+    return content
+
+
+def invokeDecisionSync(
+    node: str,
+    prompt: str,
+    choices: List[str],
+    model: Optional[str] = None,
+) -> str:
+    answer = invokeTextSync(
+        node=node,
+        prompt=prompt,
+        temperature=0.0,
+        model=model,
+        validate=lambda text: matchChoice(text, choices) is not None,
+        options=DECISION_OPTIONS,
+    )
+    return matchChoice(answer, choices) or answer.strip()
+
+
+# ------------------------------------------------------------------------------- #
+#                                  Helper functions                               #
+# ------------------------------------------------------------------------------- #
+
+
+def stripReasoning(content: str) -> str:
+    # qwen3 may still emit <think> blocks (or an unterminated one when cut by num_predict)
+    if not isinstance(content, str):
+        return content
+    return THINK_BLOCK.sub("", content).strip()
+
+
+def matchChoice(answer: str, choices: List[str]) -> Optional[str]:
+    words = re.findall(r"[A-Za-z_\-]+", stripReasoning(answer or ""))
+    if not words:
+        return None
+
+    for choice in choices:
+        if words[0].lower() == choice.lower():
+            return choice
+    return None
+
+
+def isValid(content: str, validate: Optional[Callable[[str], bool]]) -> bool:
+    return validate is None or validate(content)
+
+
+def structuredRunnable(llm, schema):
+    # json_schema passes the pydantic schema as Ollama's "format", so generation is
+    # constrained to valid JSON with the right fields and Literal values as enums
+    return llm.with_structured_output(schema, method="json_schema", include_raw=True)
+
+
+def checkStructured(node: str, output: Dict[str, Any], attempt: int):
+    # returns the parsed model, or None (and counts the failure) if it did not validate
+    parsed = output.get("parsed")
+    error = output.get("parsing_error")
+
+    with _statsLock:
+        stats = structuredStats[node]
+        stats["calls"] += 1
+        if attempt:
+            stats["retries"] += 1
+        if parsed is None or error is not None:
+            stats["parse_failures"] += 1
+
+    if parsed is None or error is not None:
+        logger.warning(f"[LLM CALL] {node} -> invalid structured output ({error})")
+        return None
+
+    return parsed
+
+
+def recordStructured(node, model, output, start, attempt, index, result):
+    recordCall(
+        node,
+        model,
+        message=output.get("raw") if output else None,
+        latency=time.perf_counter() - start,
+        retry=attempt,
+        fallback=index > 0,
+        status="ok" if result is not None else "invalid",
+    )
+
+
+def recordText(node, model, message, start, index, valid: bool):
+    recordCall(
+        node,
+        model,
+        message=message,
+        latency=time.perf_counter() - start,
+        fallback=index > 0,
+        status="ok" if valid else "invalid",
+    )
+
+
+def structuredFailure(node: str, output: Dict[str, Any]) -> structuredOutputError:
+    raw = output.get("raw") if output else None
+    return structuredOutputError(
+        node=node,
+        attempts=STRUCTURED_RETRIES + 1,
+        error=output.get("parsing_error") if output else None,
+        llm_output=getattr(raw, "content", "") or "",
+    )
+
+
+def structuredReport() -> Dict[str, Dict[str, int]]:
+    with _statsLock:
+        return {node: dict(stats) for node, stats in structuredStats.items()}
+
+
+def recordPromptSize(node: str, prompt: str):
+    tokens = estimateTokens(prompt)
+
+    with _statsLock:
+        stats = promptStats[node]
+        stats["calls"] += 1
+        stats["total"] += tokens
+        stats["max"] = max(stats["max"], tokens)
+
+    logger.info(f"[LLM CALL] {node} -> prompt ~{tokens} tokens")
+
+
+def promptSizeReport() -> Dict[str, Dict[str, int]]:
+    with _statsLock:
+        return {
+            node: {**stats, "avg": stats["total"] // max(stats["calls"], 1)}
+            for node, stats in promptStats.items()
+        }
+
+
+def cacheLookup(
+    node: str,
+    llm,
+    temperature: float,
+    prompt: str,
+    schema=None,
+    options: Optional[Dict[str, Any]] = None,
+):
+    # returns (key, cached response); key is None when the cache is disabled
+    cache = getCache()
+    if not cache:
+        return None, None
+
+    key = llmCache.makeKey(llm.model, temperature, prompt, schema, options)
+    return key, cache.get(key, node=node)
+
+
+def cacheStore(key: Optional[str], node: str, llm, response: str):
+    cache = getCache()
+    if cache and key:
+        cache.put(key, response, model=llm.model, node=node)
@@ -0,0 +1,226 @@
+# Shared Ollama client factory.
+#
+# All agents ask this module for their chat model instead of building their own
+# ChatOllama. Models with the same configuration are created once per process, so
+# every node reuses the same HTTP client (and its connection pool). The factory can
+# also preload a model and keep it resident in Ollama with a configurable keep_alive,
+# and a small monitor reports when Ollama loads or evicts a model.
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ------------------------------------------------------------------------------- #
+#                                       Config                                    #
+# ------------------------------------------------------------------------------- #
+
+LM_API = os.getenv(key="OLLAMA_API", default="http://127.0.0.1:11434")
+DEFAULT_MODEL = os.getenv(key="OLLAMA_MODEL", default="huihui_ai/qwen3-abliterated:8b")
+DEFAULT_TEMPERATURE = 0.2
+
+# how long Ollama keeps the primary model in memory after the last request ("30m", "2h",
+# ...); the default "-1" pins it until Ollama is restarted, so a long scan never pays a reload
+KEEP_ALIVE = os.getenv(key="OLLAMA_KEEP_ALIVE", default="-1")
+# every other model (router tiers, fallbacks) gets Ollama's own default, so it is unloaded
+# again instead of taking memory next to the pinned primary model
+TIER_KEEP_ALIVE = os.getenv(key="OLLAMA_TIER_KEEP_ALIVE", default="5m")
+
+# seconds between two residency checks, 0 disables the monitor
+MONITOR_INTERVAL = float(os.getenv(key="OLLAMA_MONITOR_INTERVAL", default="30"))
+
+logger = logging.getLogger("llm_factory")
+
+_models: Dict[Any, Any] = {}
+_modelsLock = threading.Lock()
+
+_client = None
+_clientLock = threading.Lock()
+
+_warmModels = set()
+_warmLock = threading.Lock()
+_monitor = None
+
+# ------------------------------------------------------------------------------- #
+#                                      Factory                                    #
+# ------------------------------------------------------------------------------- #
+
+
+def parseKeepAlive(value: str):
+    # ollama accepts durations ("30m") or a number of seconds (-1 = forever)
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def keepAliveFor(model: Optional[str] = None):
+    model = model or DEFAULT_MODEL
+    return parseKeepAlive(KEEP_ALIVE if model == DEFAULT_MODEL else TIER_KEEP_ALIVE)
+
+
+def isPinned(model: Optional[str] = None) -> bool:
+    keepAlive = keepAliveFor(model)
+    return isinstance(keepAlive, int) and keepAlive < 0
+
+
+def getLLM(
+    model: Optional[str] = None,
+    temperature: float = DEFAULT_TEMPERATURE,
+    **kwargs,
+):
+    """
+    Return the shared ChatOllama instance for the given configuration.
+
+    Args:
+        model: Ollama model name (default: OLLAMA_MODEL)
+        temperature: Sampling temperature
+        **kwargs: Any other ChatOllama option (num_predict, stop, ...)
+
+    Returns:
+        ChatOllama instance shared by every caller with the same configuration
+    """
+    model = model or DEFAULT_MODEL
+    key = (model, temperature, tuple(sorted((k, repr(v)) for k, v in kwargs.items())))
+
+    llm = _models.get(key)
+    if llm is not None:
+        return llm
+
+    with _modelsLock:
+        if key not in _models:
+            from langchain_ollama import ChatOllama
+
+            options = {"format": None, "keep_alive": keepAliveFor(model)}
+            options.update(kwargs)
+
+            _models[key] = ChatOllama(
+                model=model,
+                base_url=LM_API,
+                temperature=temperature,
+                **options,
+            )
+
+        return _models[key]
+
+
+def getOllamaClient():
+    # one client (and connection pool) for preloads, residency polls and benchmarks
+    global _client
+
+    if _client is None:
+        with _clientLock:
+            if _client is None:
+                from ollama import Client
+
+                _client = Client(host=LM_API)
+
+    return _client
+
+
+# ------------------------------------------------------------------------------- #
+#                                  Model residency                                #
+# ------------------------------------------------------------------------------- #
+
+
+def preloadModel(model: Optional[str] = None, keepAlive: Optional[str] = None):
+    """
+    Load a model into Ollama memory without generating anything.
+
+    Returns:
+        Load time in seconds reported by Ollama (0.0 if it was already resident)
+    """
+    model = model or DEFAULT_MODEL
+    keepAlive = parseKeepAlive(keepAlive) if keepAlive else keepAliveFor(model)
+
+    start = time.perf_counter()
+    # an empty prompt only loads the model and applies keep_alive
+    response = getOllamaClient().generate(model=model, prompt="", keep_alive=keepAlive)
+    elapsed = time.perf_counter() - start
+
+    loadDuration = (getattr(response, "load_duration", None) or 0) / 1e9
+    logger.info(
+        f"[LLM FACTORY] model {model} ready (load {loadDuration:.2f}s, "
+        f"request {elapsed:.2f}s, keep_alive={keepAlive})"
+    )
+    return loadDuration
+
+
+def residentModels() -> Dict[str, Any]:
+    try:
+        running = getOllamaClient().ps()
+    except Exception as e:
+        logger.warning(f"[LLM FACTORY] unable to query loaded models: {e}")
+        return {}
+
+    return {m.model: getattr(m, "expires_at", None) for m in running.models}
+
+
+def warmModel(model: Optional[str] = None):
+    """
+    Preload the model once per process and start the residency monitor.
+
+    Failures are logged and ignored - the first real request will load the model.
+    """
+    global _monitor
+
+    model = model or DEFAULT_MODEL
+
+    with _warmLock:
+        if model in _warmModels:
+            return
+
+        try:
+            preloadModel(model=model)
+        except Exception as e:
+            logger.warning(f"[LLM FACTORY] preloading {model} failed: {e}")
+            return
+
+        _warmModels.add(model)
+
+        if MONITOR_INTERVAL > 0 and _monitor is None:
+            _monitor = residencyMonitor(interval=MONITOR_INTERVAL)
+            _monitor.start()
+
+
+class residencyMonitor(threading.Thread):
+    """Polls Ollama and reports model load/eviction events for the warm models."""
+
+    def __init__(self, interval: float):
+        super().__init__(name="ollama-residency-monitor", daemon=True)
+        self.interval = interval
+        self.loaded = set(residentModels())
+        self.events = []
+        self._stopEvent = threading.Event()
+
+    def run(self):
+        while not self._stopEvent.wait(self.interval):
+            current = set(residentModels())
+
+            for model in current - self.loaded:
+                self.record("loaded", model)
+
+            for model in self.loaded - current:
+                self.record("evicted", model)
+
+                # pinned models are reloaded right away instead of on the next call
+                if model in _warmModels and isPinned(model):
+                    try:
+                        preloadModel(model=model)
+                        current.add(model)
+                        self.record("reloaded", model)
+                    except Exception as e:
+                        logger.warning(f"[LLM FACTORY] reloading {model} failed: {e}")
+
+            self.loaded = current
+
+    def record(self, event: str, model: str):
+        self.events.append({"time": time.time(), "event": event, "model": model})
+        logger.info(f"[LLM FACTORY] model {event}: {model}")
+
+    def stop(self):
+        self._stopEvent.set()
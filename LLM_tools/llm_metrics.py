@@ -0,0 +1,189 @@
+# LLM call instrumentation.
+#
+# One record per model request: node, model, prompt and completion tokens,
+# time-to-first-token, total latency, generation speed and whether it was a retry, a
+# fallback or a cache hit. Records are written to the "llm_metrics" logger (attached
+# to the agent run logs) and appended to a JSONL file for offline analysis.
+#
+# Token counts and timings come from the metadata Ollama returns with every response.
+# Requests are not streamed, so time-to-first-token is Ollama's load + prompt
+# evaluation time, i.e. the moment the first output token could be produced.
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ------------------------------------------------------------------------------- #
+#                                       Config                                    #
+# ------------------------------------------------------------------------------- #
+
+METRICS_PATH = os.getenv(key="LLM_METRICS_PATH", default="llm_metrics.jsonl")
+
+logger = logging.getLogger("llm_metrics")
+
+# every agent runner starts its own run; records are tagged with the current one
+currentRun: ContextVar[str] = ContextVar("llm_run", default="default")
+
+_records: List[Dict[str, Any]] = []
+_recordsLock = threading.Lock()
+
+# ------------------------------------------------------------------------------- #
+#                                      Records                                    #
+# ------------------------------------------------------------------------------- #
+
+
+def startRun(name: str) -> str:
+    runId = f"{name}-{uuid.uuid4().hex[:8]}"
+    currentRun.set(runId)
+    return runId
+
+
+def usageFromMessage(message) -> Dict[str, Any]:
+    # ChatOllama puts eval counts in usage_metadata and durations (ns) in response_metadata
+    usage = getattr(message, "usage_metadata", None) or {}
+    meta = getattr(message, "response_metadata", None) or {}
+
+    promptTokens = usage.get("input_tokens") or meta.get("prompt_eval_count") or 0
+    completionTokens = usage.get("output_tokens") or meta.get("eval_count") or 0
+
+    firstToken = (meta.get("load_duration") or 0) + (meta.get("prompt_eval_duration") or 0)
+    evalDuration = meta.get("eval_duration") or 0
+
+    return {
+        "prompt_tokens": promptTokens,
+        "completion_tokens": completionTokens,
+        "ttft_s": round(firstToken / 1e9, 3) if firstToken else None,
+        "tokens_per_s": (
+            round(completionTokens / (evalDuration / 1e9), 1) if evalDuration else None
+        ),
+    }
+
+
+def recordCall(
+    node: str,
+    model: str,
+    message=None,
+    latency: float = 0.0,
+    retry: int = 0,
+    fallback: bool = False,
+    cached: bool = False,
+    status: str = "ok",
+):
+    record = {
+        "time": time.time(),
+        "run_id": currentRun.get(),
+        "node": node,
+        "model": model,
+        **usageFromMessage(message),
+        "latency_s": round(latency, 3),
+        "retry": retry,
+        "fallback": fallback,
+        "cached": cached,
+        "status": status,
+    }
+
+    with _recordsLock:
+        _records.append(record)
+
+        if METRICS_PATH:
+            try:
+                with open(METRICS_PATH, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record) + "\n")
+            except OSError as e:
+                logger.warning(f"[LLM METRICS] unable to write {METRICS_PATH}: {e}")
+
+    logger.info(
+        "[LLM METRICS] %s model=%s prompt=%s completion=%s ttft=%ss latency=%ss retry=%s "
+        "status=%s%s",
+        node,
+        model,
+        record["prompt_tokens"],
+        record["completion_tokens"],
+        record["ttft_s"],
+        record["latency_s"],
+        retry,
+        status,
+        " (cache hit)" if cached else "",
+        extra={"fields": {"llm": record}},
+    )
+
+
+def runRecords(runId: Optional[str] = None) -> List[Dict[str, Any]]:
+    runId = runId or currentRun.get()
+    with _recordsLock:
+        return [record for record in _records if record["run_id"] == runId]
+
+
+# ------------------------------------------------------------------------------- #
+#                                       Summary                                   #
+# ------------------------------------------------------------------------------- #
+
+
+def summarizeRun(runId: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    nodes = defaultdict(
+        lambda: {
+            "calls": 0,
+            "retries": 0,
+            "cache_hits": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "latency_s": 0.0,
+            "ttft": [],
+            "speed": [],
+        }
+    )
+
+    for record in runRecords(runId):
+        stats = nodes[record["node"]]
+        stats["calls"] += 1
+        stats["retries"] += 1 if record["retry"] else 0
+        stats["cache_hits"] += 1 if record["cached"] else 0
+        stats["prompt_tokens"] += record["prompt_tokens"]
+        stats["completion_tokens"] += record["completion_tokens"]
+        stats["latency_s"] += record["latency_s"]
+        if record["ttft_s"] is not None:
+            stats["ttft"].append(record["ttft_s"])
+        if record["tokens_per_s"] is not None:
+            stats["speed"].append(record["tokens_per_s"])
+
+    summary = {}
+    for node, stats in nodes.items():
+        ttft, speed = stats.pop("ttft"), stats.pop("speed")
+        stats["avg_ttft_s"] = round(sum(ttft) / len(ttft), 2) if ttft else None
+        stats["avg_tokens_per_s"] = round(sum(speed) / len(speed), 1) if speed else None
+        stats["latency_s"] = round(stats["latency_s"], 2)
+        summary[node] = stats
+
+    return summary
+
+
+def summaryTable(runId: Optional[str] = None) -> str:
+    summary = summarizeRun(runId)
+    header = (
+        f"{'node':<32}{'calls':>6}{'retry':>6}{'cache':>6}{'prompt tok':>11}"
+        f"{'compl tok':>10}{'ttft s':>8}{'tok/s':>8}{'total s':>9}"
+    )
+    lines = [f"LLM calls for run {runId or currentRun.get()}", header, "-" * len(header)]
+
+    for node, stats in sorted(summary.items(), key=lambda item: -item[1]["latency_s"]):
+        lines.append(
+            f"{node:<32}{stats['calls']:>6}{stats['retries']:>6}{stats['cache_hits']:>6}"
+            f"{stats['prompt_tokens']:>11}{stats['completion_tokens']:>10}"
+            f"{str(stats['avg_ttft_s'] or '-'):>8}{str(stats['avg_tokens_per_s'] or '-'):>8}"
+            f"{stats['latency_s']:>9}"
+        )
+
+    totalLatency = round(sum(stats["latency_s"] for stats in summary.values()), 2)
+    lines.append("-" * len(header))
+    lines.append(f"{'total':<32}{sum(s['calls'] for s in summary.values()):>6}{totalLatency:>58}")
+
+    return "\n".join(lines)
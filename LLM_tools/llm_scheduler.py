@@ -0,0 +1,241 @@
+# Process-wide LLM request scheduler.
+#
+# All agents share one Ollama instance, which serves at most OLLAMA_NUM_PARALLEL
+# requests at a time and queues the rest in arrival order. The scheduler keeps that
+# queue on our side instead, so it can:
+#
+#   - cap in-flight requests to what Ollama actually runs in parallel
+#   - hand a free slot to latency critical calls (orchestrator routing) before bulk
+#     ones (summaries, reports)
+#   - within a priority, prefer requests for a model that is already running, so
+#     compatible requests end up in the same Ollama batch instead of swapping models
+#
+# Time spent waiting for a slot and time spent generating are recorded separately.
+
+import asyncio
+import itertools
+import logging
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ------------------------------------------------------------------------------- #
+#                                       Config                                    #
+# ------------------------------------------------------------------------------- #
+
+# keep in sync with the Ollama server setting of the same name, 0 disables scheduling
+NUM_PARALLEL = int(os.getenv(key="OLLAMA_NUM_PARALLEL", default="1"))
+
+PRIORITIES = {"critical": 0, "normal": 1, "bulk": 2}
+
+# everything not listed here is "normal"
+NODE_PRIORITIES = {
+    "orchestrator.reasoning_node": "critical",
+    "orchestrator.memory_node": "critical",
+    "orchestrator.planner_node": "critical",
+    "orchestrator.summary_node": "bulk",
+    "orchestrator.report_node": "bulk",
+    "nmap.output_node": "bulk",
+}
+
+# set inside speculative tasks (LLM_tools.speculation), they always run as "bulk"
+speculativeCall: ContextVar[bool] = ContextVar("speculative_llm_call", default=False)
+
+logger = logging.getLogger("llm_scheduler")
+
+_scheduler = None
+_schedulerLock = threading.Lock()
+
+# ------------------------------------------------------------------------------- #
+#                                      Scheduler                                  #
+# ------------------------------------------------------------------------------- #
+
+
+def nodePriority(node: str) -> int:
+    if speculativeCall.get():
+        return PRIORITIES["bulk"]
+    return PRIORITIES[NODE_PRIORITIES.get(node, "normal")]
+
+
+class llmScheduler:
+    """Priority queue in front of a fixed number of LLM slots."""
+
+    def __init__(self, maxInFlight: int = NUM_PARALLEL):
+        self.maxInFlight = maxInFlight
+
+        self._cond = threading.Condition()
+        self._waiting = []
+        self._sequence = itertools.count()
+        self._inFlight = 0
+        self._activeModels = Counter()
+        self._lastModel = None
+
+        self.stats = defaultdict(
+            lambda: {"calls": 0, "wait_s": 0.0, "max_wait_s": 0.0, "generation_s": 0.0}
+        )
+        self._statsLock = threading.Lock()
+
+    def nextTicket(self):
+        # highest priority first; inside it the oldest request for a running model
+        best = min(ticket[0] for ticket in self._waiting)
+        candidates = [ticket for ticket in self._waiting if ticket[0] == best]
+
+        for ticket in candidates:
+            model = ticket[2]
+            if self._activeModels[model] or model == self._lastModel:
+                return ticket
+
+        return candidates[0]
+
+    def newTicket(self, node: str, model: str, future=None) -> list:
+        # [priority, sequence, model, future of an async waiter, granted]
+        return [nodePriority(node), next(self._sequence), model, future, False]
+
+    def dispatch(self):
+        # hands free slots to waiting tickets; called with self._cond held
+        while self._waiting and self._inFlight < self.maxInFlight:
+            ticket = self.nextTicket()
+            self._waiting.remove(ticket)
+            self._inFlight += 1
+            self._activeModels[ticket[2]] += 1
+            ticket[4] = True
+
+            future = ticket[3]
+            if future is not None:
+                future.get_loop().call_soon_threadsafe(self.grantFuture, future, ticket[2])
+
+        self._cond.notify_all()
+
+    def grantFuture(self, future: asyncio.Future, model: str):
+        # runs on the waiter's loop; a waiter cancelled in the meantime returns the slot
+        if future.cancelled():
+            self.release(model)
+        else:
+            future.set_result(None)
+
+    def acquire(self, node: str, model: str) -> float:
+        """Block until this request may run. Returns the time spent waiting."""
+        start = time.perf_counter()
+        ticket = self.newTicket(node, model)
+
+        with self._cond:
+            self._waiting.append(ticket)
+            self._waiting.sort()
+            self.dispatch()
+
+            while not ticket[4]:
+                self._cond.wait()
+
+        return time.perf_counter() - start
+
+    async def asyncAcquire(self, node: str, model: str) -> float:
+        """acquire for coroutines, waits on a future of the running loop."""
+        start = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        ticket = self.newTicket(node, model, future)
+
+        with self._cond:
+            self._waiting.append(ticket)
+            self._waiting.sort()
+            self.dispatch()
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._cond:
+                if not ticket[4]:
+                    self._waiting.remove(ticket)
+            # a cancelled future is handed back by grantFuture, anything else here
+            if ticket[4] and not future.cancelled():
+                self.release(model)
+            raise
+
+        return time.perf_counter() - start
+
+    def release(self, model: str):
+        with self._cond:
+            self._inFlight -= 1
+            self._activeModels[model] -= 1
+            self._lastModel = model
+            self.dispatch()
+
+    def record(self, node: str, waitSeconds: float, generationSeconds: float):
+        with self._statsLock:
+            stats = self.stats[node]
+            stats["calls"] += 1
+            stats["wait_s"] += waitSeconds
+            stats["max_wait_s"] = max(stats["max_wait_s"], waitSeconds)
+            stats["generation_s"] += generationSeconds
+
+        if waitSeconds > 1:
+            logger.info(f"[LLM SCHEDULER] {node} waited {waitSeconds:.2f}s for a slot")
+
+    @contextmanager
+    def slot(self, node: str, model: str):
+        if self.maxInFlight <= 0:
+            yield
+            return
+
+        waitSeconds = self.acquire(node, model)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.release(model)
+            self.record(node, waitSeconds, time.perf_counter() - start)
+
+    @asynccontextmanager
+    async def asyncSlot(self, node: str, model: str):
+        if self.maxInFlight <= 0:
+            yield
+            return
+
+        # waiting is a future on this loop, no thread is parked while the queue is full
+        waitSeconds = await self.asyncAcquire(node, model)
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.release(model)
+            self.record(node, waitSeconds, time.perf_counter() - start)
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        with self._statsLock:
+            return {
+                node: {
+                    "calls": stats["calls"],
+                    "avg_wait_s": round(stats["wait_s"] / stats["calls"], 3),
+                    "max_wait_s": round(stats["max_wait_s"], 3),
+                    "avg_generation_s": round(stats["generation_s"] / stats["calls"], 3),
+                }
+                for node, stats in self.stats.items()
+                if stats["calls"]
+            }
+
+
+# ------------------------------------------------------------------------------- #
+#                                  Helper functions                               #
+# ------------------------------------------------------------------------------- #
+
+
+def getScheduler() -> llmScheduler:
+    global _scheduler
+
+    if _scheduler is None:
+        with _schedulerLock:
+            if _scheduler is None:
+                _scheduler = llmScheduler(maxInFlight=NUM_PARALLEL)
+
+    return _scheduler
+
+
+def schedulerReport() -> Dict[str, Dict[str, Any]]:
+    return getScheduler().report()
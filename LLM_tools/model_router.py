@@ -0,0 +1,144 @@
+# Per-node model routing.
+#
+# Every node name ("orchestrator.memory_node", "nmap.planning_node", ...) is mapped to
+# a model tier. Cheap classification nodes go to a small model, planning stays on the
+# default model. When the small model's answer fails validation, the call falls back
+# to the next tier (see LLM_tools.llm_calls).
+#
+# Routes are configured with LLM_MODEL_ROUTES, a JSON object that maps node names (or
+# prefixes ending with "*") to a tier name or a concrete model:
+#
+#   LLM_MODEL_ROUTES='{"nmap.*": "large", "orchestrator.planner_node": "qwen3:14b"}'
+#
+# Without OLLAMA_SMALL_MODEL every tier resolves to the default model, so routing only
+# changes behaviour once a small model is configured.
+
+import json
+import logging
+import os
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+from dotenv import load_dotenv
+
+from LLM_tools.llm_factory import DEFAULT_MODEL
+
+load_dotenv()
+
+# ------------------------------------------------------------------------------- #
+#                                       Config                                    #
+# ------------------------------------------------------------------------------- #
+
+SMALL_MODEL = os.getenv(key="OLLAMA_SMALL_MODEL", default="")
+
+TIERS = {
+    "small": SMALL_MODEL or DEFAULT_MODEL,
+    "large": DEFAULT_MODEL,
+}
+
+# fallback order when a tier fails validation
+FALLBACK = {"small": "large"}
+
+# classification style nodes - one word, a yes/no or a confidence value
+DEFAULT_ROUTES = {
+    "orchestrator.memory_node": "small",
+    "orchestrator.reasoning_node": "small",
+    "nmap.evaluate_node": "small",
+}
+
+logger = logging.getLogger("model_router")
+
+# latency per node and model: {"calls", "total_s", "max_s", "fallbacks"}
+latencyStats: Dict[str, Dict[str, Dict[str, float]]] = defaultdict(
+    lambda: defaultdict(lambda: {"calls": 0, "total_s": 0.0, "max_s": 0.0, "fallbacks": 0})
+)
+_statsLock = threading.Lock()
+
+
+def loadRoutes() -> Dict[str, str]:
+    routes = dict(DEFAULT_ROUTES)
+    custom = os.getenv(key="LLM_MODEL_ROUTES", default="")
+
+    if custom:
+        try:
+            routes.update(json.loads(custom))
+        except ValueError as e:
+            logger.warning(f"[MODEL ROUTER] ignoring invalid LLM_MODEL_ROUTES: {e}")
+
+    return routes
+
+
+ROUTES = loadRoutes()
+
+# ------------------------------------------------------------------------------- #
+#                                      Routing                                    #
+# ------------------------------------------------------------------------------- #
+
+
+def routeTier(node: str) -> str:
+    # exact match first, then the longest matching "prefix*" route
+    if node in ROUTES:
+        return ROUTES[node]
+
+    prefixes = [r for r in ROUTES if r.endswith("*") and node.startswith(r[:-1])]
+    if prefixes:
+        return ROUTES[max(prefixes, key=len)]
+
+    return "large"
+
+
+def candidateModels(node: str, model: Optional[str] = None) -> List[str]:
+    """
+    Models to try for a node, in order.
+
+    An explicit model always wins and gets no fallback. Otherwise the routed tier (or
+    model) is followed by its fallback tiers, with duplicates removed.
+    """
+    if model:
+        return [model]
+
+    models = []
+    tier = routeTier(node)
+
+    while tier:
+        name = TIERS.get(tier, tier)
+        if name not in models:
+            models.append(name)
+        # concrete model names fall back to the large tier
+        tier = FALLBACK.get(tier) if tier in TIERS else "large"
+
+    return models
+
+
+# ------------------------------------------------------------------------------- #
+#                                      Latency                                    #
+# ------------------------------------------------------------------------------- #
+
+
+def recordLatency(node: str, model: str, seconds: float, fallback: bool = False):
+    with _statsLock:
+        stats = latencyStats[node][model]
+        stats["calls"] += 1
+        stats["total_s"] += seconds
+        stats["max_s"] = max(stats["max_s"], seconds)
+        if fallback:
+            stats["fallbacks"] += 1
+
+    logger.info(f"[MODEL ROUTER] {node} -> {model} in {seconds:.2f}s")
+
+
+def latencyReport() -> Dict[str, Dict[str, Any]]:
+    with _statsLock:
+        return {
+            node: {
+                model: {
+                    "calls": stats["calls"],
+                    "avg_s": round(stats["total_s"] / stats["calls"], 3),
+                    "max_s": round(stats["max_s"], 3),
+                    "fallbacks": stats["fallbacks"],
+                }
+                for model, stats in models.items()
+                if stats["calls"]
+            }
+            for node, models in latencyStats.items()
+        }
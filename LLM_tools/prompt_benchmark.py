@@ -0,0 +1,117 @@
+# Prompt layout benchmark.
+#
+# Sends the same prompt content to Ollama in two layouts and compares how much of the
+# prompt Ollama actually had to evaluate:
+#
+#   dynamic-first: host facts and tool output before the instructions (old layout)
+#   static-first:  instructions and allowed-arguments catalog first (layoutPrompt)
+#
+# Ollama reports prompt_eval_count / prompt_eval_duration only for the tokens it did not
+# take from the KV cache, so the difference between the two layouts is the saving.
+#
+# Run with: penagent bench-prefix [--repeats N] [--model MODEL]
+
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from LLM_tools.llm_factory import DEFAULT_MODEL, getOllamaClient, keepAliveFor
+from LLM_tools.prompt_layout import layoutPrompt, staticBlock
+
+CATALOG = Path(__file__).resolve().parents[1] / "MCP_tools/nmap/nmap_allowed_arguments.json"
+
+INSTRUCTIONS = """
+You are an autonomous nmap agent executing one step of a scan plan.
+
+Decide:
+- which tool call and options are appropriate
+- explain with reasoning
+
+Return ONLY JSON with target, scan_type, ports, additional_args and reasoning.
+"""
+
+
+def sampleContext(index: int) -> Dict[str, Any]:
+    # a different host on every call, like consecutive tool-call nodes
+    return {
+        "Current host - known facts": f"IP: 192.168.157.{10 + index}\nStatus: alive",
+        "Current plan step": "Description: service detection\nProposed scan type: -sV",
+        "Last tool output": (
+            f"success=True return_code=0\nNmap scan report for 192.168.157.{10 + index}\n"
+            f"22/tcp open ssh OpenSSH 8.{index}\n80/tcp open http Apache 2.4.{index}"
+        ),
+    }
+
+
+def dynamicFirst(static: List[str], dynamic: Dict[str, Any]) -> str:
+    # the layout the agents used before: state first, instructions after it
+    parts = [f"{title}:\n{value}" for title, value in dynamic.items()]
+    parts.extend(staticBlock(block) for block in static)
+    return "\n\n".join(parts)
+
+
+def measure(client, model: str, prompt: str) -> Dict[str, float]:
+    start = time.perf_counter()
+    response = client.generate(
+        model=model,
+        prompt=prompt,
+        options={"temperature": 0, "num_predict": 1},
+        keep_alive=keepAliveFor(model),
+    )
+    return {
+        "prompt_tokens": getattr(response, "prompt_eval_count", None) or 0,
+        "prompt_eval_ms": (getattr(response, "prompt_eval_duration", None) or 0) / 1e6,
+        "wall_ms": (time.perf_counter() - start) * 1000,
+    }
+
+
+def benchmarkPrefixReuse(model: Optional[str] = None, repeats: int = 5) -> Dict[str, Any]:
+    model = model or DEFAULT_MODEL
+    client = getOllamaClient()
+    static = [INSTRUCTIONS, f"Available nmap options:\n{CATALOG.read_text()}"]
+
+    layouts = {
+        "dynamic-first": lambda i: dynamicFirst(static, sampleContext(i)),
+        "static-first": lambda i: layoutPrompt(static=static, dynamic=sampleContext(i)),
+    }
+
+    results = {}
+    for name, build in layouts.items():
+        # first call only loads the model / fills the cache
+        measure(client, model, build(0))
+        samples = [measure(client, model, build(i)) for i in range(1, repeats + 1)]
+
+        results[name] = {
+            key: round(sum(sample[key] for sample in samples) / len(samples), 1)
+            for key in ["prompt_tokens", "prompt_eval_ms", "wall_ms"]
+        }
+        results[name]["prompt_chars"] = len(build(1))
+
+    old, new = results["dynamic-first"], results["static-first"]
+    results["saved_prompt_eval_ms"] = round(old["prompt_eval_ms"] - new["prompt_eval_ms"], 1)
+    results["saved_prompt_tokens"] = round(old["prompt_tokens"] - new["prompt_tokens"], 1)
+    results["model"] = model
+    results["repeats"] = repeats
+
+    return results
+
+
+def printReport(results: Dict[str, Any]):
+    print(f"Model: {results['model']} ({results['repeats']} calls per layout)\n")
+    print(f"{'layout':<15}{'prompt chars':>14}{'evaluated tok':>15}{'prompt eval ms':>16}{'wall ms':>10}")
+
+    for name in ["dynamic-first", "static-first"]:
+        row = results[name]
+        print(
+            f"{name:<15}{row['prompt_chars']:>14}{row['prompt_tokens']:>15}"
+            f"{row['prompt_eval_ms']:>16}{row['wall_ms']:>10}"
+        )
+
+    print(
+        f"\nSaved per call: {results['saved_prompt_tokens']} evaluated tokens, "
+        f"{results['saved_prompt_eval_ms']} ms prompt evaluation"
+    )
+
+
+if __name__ == "__main__":
+    printReport(benchmarkPrefixReuse())
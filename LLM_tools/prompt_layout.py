@@ -0,0 +1,45 @@
+# Prefix-cache-friendly prompt assembly.
+#
+# Ollama reuses the KV cache of the previous request for the longest common prompt
+# prefix. The agents used to start prompts with dynamic state (objective, host facts,
+# the last tool output) and put the long static parts (rules, the allowed-arguments
+# catalog, the output format) after it, so nothing could be reused.
+#
+# layoutPrompt puts the static parts first, byte for byte identical between calls,
+# and appends the dynamic sections last in a fixed order.
+
+import textwrap
+from typing import Any, Dict, List, Union
+
+SECTION_SEPARATOR = "\n\n"
+DYNAMIC_HEADER = "### CURRENT CONTEXT ###"
+
+
+def staticBlock(text: str) -> str:
+    # indentation of triple quoted strings depends on where they are written
+    return textwrap.dedent(text).strip()
+
+
+def layoutPrompt(static: Union[str, List[str]], dynamic: Dict[str, Any]) -> str:
+    """
+    Build a prompt as <static prefix> + <dynamic sections>.
+
+    Args:
+        static: Instruction text (or list of texts) that does not change between calls
+        dynamic: Section title -> value, rendered in insertion order; empty values are
+                 rendered as "None." so the layout itself never changes
+
+    Returns:
+        Prompt string with the static prefix first
+    """
+    if isinstance(static, str):
+        static = [static]
+
+    parts = [staticBlock(block) for block in static if block]
+    parts.append(DYNAMIC_HEADER)
+
+    for title, value in dynamic.items():
+        value = "None." if value in (None, "", [], {}) else str(value).strip()
+        parts.append(f"{title}:\n{value}")
+
+    return SECTION_SEPARATOR.join(parts)
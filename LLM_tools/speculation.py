@@ -0,0 +1,174 @@
+# Speculative LLM work during tool execution.
+#
+# The nmap and sqlmap graphs are strictly serial: plan -> select -> execute -> parse ->
+# evaluate. While a scan runs on the Kali box the model is idle, and while the model
+# thinks the Kali box is idle. With speculation enabled, the execute nodes start the
+# planning and first tool selection for the *next* host / attack vector as a background
+# task before they await the tool.
+#
+# Every speculative result is stored under a slot ("nmap.plan:10.0.0.5") together with
+# the exact prompt it was generated from. The real node rebuilds its prompt from the
+# current state and only takes the result when the prompts match, so anything that was
+# invalidated by new evidence is discarded instead of used.
+#
+# The mode is opt-in: set LLM_SPECULATION=1 (or run "penagent --speculate ...").
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Optional
+from dotenv import load_dotenv
+
+from LLM_tools.llm_scheduler import speculativeCall
+
+load_dotenv()
+
+# ------------------------------------------------------------------------------- #
+#                                       Config                                    #
+# ------------------------------------------------------------------------------- #
+
+SPECULATION_ENABLED = os.getenv(key="LLM_SPECULATION", default="0").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+logger = logging.getLogger("speculation")
+
+_speculator = None
+_speculatorLock = threading.Lock()
+
+# ------------------------------------------------------------------------------- #
+#                                     Speculator                                  #
+# ------------------------------------------------------------------------------- #
+
+
+class speculator:
+    """Background LLM results keyed by slot and validated by their prompt."""
+
+    def __init__(self, enabled: bool = SPECULATION_ENABLED):
+        self.enabled = enabled
+
+        # slot -> {"key", "task" or "value", "started", "finished"}
+        self._entries: Dict[str, Dict[str, Any]] = {}
+
+        self.stats = defaultdict(
+            lambda: {"launched": 0, "used": 0, "discarded": 0, "failed": 0, "saved_s": 0.0}
+        )
+
+    def launch(self, slot: str, key: str, factory: Callable[[], Awaitable[Any]]):
+        # one speculation per slot; the first one is kept until it is taken or dropped
+        if not self.enabled or slot in self._entries:
+            return
+
+        async def run():
+            # lets the scheduler put speculative calls behind the real ones
+            speculativeCall.set(True)
+            return await factory()
+
+        entry = {"key": key, "task": asyncio.create_task(run()), "started": time.perf_counter()}
+
+        def finished(task):
+            entry["finished"] = time.perf_counter()
+            # failures of speculations that are never taken must not be reported as unhandled
+            task.cancelled() or task.exception()
+
+        entry["task"].add_done_callback(finished)
+
+        self._entries[slot] = entry
+        self.stats[statsName(slot)]["launched"] += 1
+        logger.info(f"[SPECULATION] {slot} -> launched")
+
+    def offer(self, slot: str, key: str, value: Any):
+        # store an already computed result (second stage of a speculative chain)
+        if not self.enabled:
+            return
+
+        self._entries[slot] = {"key": key, "value": value, "started": time.perf_counter()}
+
+    async def take(self, slot: str, key: str) -> Optional[Any]:
+        """
+        Result of the speculation for a slot, or None.
+
+        A result whose prompt does not match the current one is dropped. A speculation
+        that is still running is awaited - it was started earlier than a fresh call could.
+        """
+        entry = self._entries.pop(slot, None)
+        if entry is None:
+            return None
+
+        stats = self.stats[statsName(slot)]
+
+        if entry["key"] != key:
+            cancelEntry(entry)
+            stats["discarded"] += 1
+            logger.info(f"[SPECULATION] {slot} -> discarded (inputs changed)")
+            return None
+
+        if "value" in entry:
+            stats["used"] += 1
+            logger.info(f"[SPECULATION] {slot} -> used")
+            return entry["value"]
+
+        # time the speculation already ran in the background is what we saved
+        saved = entry.get("finished", time.perf_counter()) - entry["started"]
+
+        try:
+            value = await entry["task"]
+        except Exception as e:
+            stats["failed"] += 1
+            logger.info(f"[SPECULATION] {slot} -> failed: {e}")
+            return None
+
+        stats["used"] += 1
+        stats["saved_s"] += saved
+        logger.info(f"[SPECULATION] {slot} -> used ({saved:.2f}s ahead)")
+        return value
+
+    def discard(self, prefix: str = ""):
+        # drop everything that was never taken, e.g. at the end of an agent run
+        for slot in [s for s in self._entries if s.startswith(prefix)]:
+            cancelEntry(self._entries.pop(slot))
+            self.stats[statsName(slot)]["discarded"] += 1
+            logger.info(f"[SPECULATION] {slot} -> discarded (never used)")
+
+    def report(self, prefix: str = "") -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {**stats, "saved_s": round(stats["saved_s"], 2)}
+            for name, stats in self.stats.items()
+            if name.startswith(prefix)
+        }
+
+
+# ------------------------------------------------------------------------------- #
+#                                  Helper functions                               #
+# ------------------------------------------------------------------------------- #
+
+
+def statsName(slot: str) -> str:
+    # "nmap.plan:10.0.0.5" -> "nmap.plan"
+    return slot.split(":", 1)[0]
+
+
+def cancelEntry(entry: Dict[str, Any]):
+    task = entry.get("task")
+    if task and not task.done():
+        task.cancel()
+
+
+def getSpeculator() -> speculator:
+    global _speculator
+
+    if _speculator is None:
+        with _speculatorLock:
+            if _speculator is None:
+                _speculator = speculator(enabled=SPECULATION_ENABLED)
+
+    return _speculator
+
+
+def speculationReport(prefix: str = "") -> Dict[str, Dict[str, Any]]:
+    return getSpeculator().report(prefix=prefix)
@@ -0,0 +1,68 @@
+import pytest
+
+from LLM_tools import artifact_store
+from LLM_tools.artifact_store import artifactStore, isArtifact
+
+OUTPUT = {"success": True, "return_code": 0, "stdout": "22/tcp open ssh\n" * 100, "stderr": ""}
+
+
+def test_put_returns_a_reference_with_summary_fields(tmp_path):
+    store = artifactStore(root=str(tmp_path))
+
+    reference = store.put(OUTPUT)
+
+    assert isArtifact(reference)
+    assert reference["success"] is True and reference["return_code"] == 0
+    assert "stdout" not in reference
+    assert store.pathOf(reference["artifact"]).exists()
+
+
+def test_identical_outputs_are_stored_once(tmp_path):
+    store = artifactStore(root=str(tmp_path))
+
+    first = store.put(OUTPUT)
+    second = store.put(dict(OUTPUT))
+
+    assert first == second
+    assert store.stats()["files"] == 1
+    assert store.stats()["deduplicated"] == 1
+
+
+def test_get_reads_back_from_disk(tmp_path):
+    digest = artifactStore(root=str(tmp_path)).put(OUTPUT)["artifact"]
+
+    assert artifactStore(root=str(tmp_path)).get(digest) == OUTPUT
+
+
+def test_get_returns_a_copy(tmp_path):
+    store = artifactStore(root=str(tmp_path))
+    digest = store.put(OUTPUT)["artifact"]
+
+    store.get(digest)["stdout"] = "changed"
+
+    assert store.get(digest) == OUTPUT
+
+
+def test_unknown_digest_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        artifactStore(root=str(tmp_path)).get("ab" * 32)
+
+
+def test_prune_removes_everything_with_zero_age(tmp_path):
+    store = artifactStore(root=str(tmp_path))
+    digest = store.put(OUTPUT)["artifact"]
+
+    assert store.prune(maxAgeDays=0) == 1
+    with pytest.raises(FileNotFoundError):
+        store.get(digest)
+
+
+def test_small_outputs_stay_inline(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifact_store, "_artifactStore", artifactStore(root=str(tmp_path)))
+
+    small = {"success": True, "stdout": "ok"}
+    reference = artifact_store.storeOutput(OUTPUT)
+
+    assert artifact_store.storeOutput(small) is small
+    assert artifact_store.loadOutput(reference) == OUTPUT
+    assert artifact_store.loadOutput(small) is small
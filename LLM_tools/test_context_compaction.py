@@ -0,0 +1,84 @@
+from LLM_tools.context_compaction import (
+    compactNmapOutput,
+    compactSqlmapOutput,
+    compactState,
+    estimateTokens,
+    toolResultDict,
+    truncateText,
+)
+
+NMAP_STDOUT = """Starting Nmap 7.94 ( https://nmap.org )
+Nmap scan report for 10.0.0.5
+Host is up (0.00041s latency).
+Not shown: 995 closed tcp ports (reset)
+PORT     STATE         SERVICE VERSION
+22/tcp   open          ssh     OpenSSH 8.9p1
+53/udp   open|filtered domain
+80/tcp   filtered      http
+443/tcp  closed        https
+2905/sctp open         m3ua
+| http-title: Welcome
+Nmap done: 1 IP address (1 host up) scanned in 3.21 seconds
+"""
+
+
+def test_estimate_and_truncate():
+    assert estimateTokens("") == 0
+    assert estimateTokens("abcde") == 2
+
+    text = "head " + "x" * 400 + " tail"
+    truncated = truncateText(text, maxTokens=20)
+
+    assert truncated.startswith("head ")
+    assert truncated.endswith(" tail")
+    assert "characters omitted" in truncated
+    assert truncateText("short", maxTokens=20) == "short"
+
+
+def test_tool_result_shapes():
+    result = {"stdout": "out", "success": True}
+
+    assert toolResultDict(([], {"result": result})) == result
+    assert toolResultDict(result) == result
+    assert toolResultDict('{"stdout": "out", "success": true}') == result
+    assert toolResultDict("plain text") == {"stdout": "plain text"}
+    assert toolResultDict(None) == {"stdout": ""}
+
+
+def test_nmap_output_keeps_open_and_filtered_ports():
+    compact = compactNmapOutput({"stdout": NMAP_STDOUT, "success": True, "return_code": 0})
+    lines = compact.splitlines()
+
+    assert lines[0] == "success=True return_code=0"
+    assert "22/tcp   open          ssh     OpenSSH 8.9p1" in lines
+    assert "53/udp   open|filtered domain" in lines
+    assert "80/tcp   filtered      http" in lines
+    assert "2905/sctp open         m3ua" in lines
+    assert "| http-title: Welcome" in lines
+    assert not any(line.startswith(("443/tcp", "PORT", "Starting")) for line in lines)
+
+
+def test_sqlmap_output_drops_repeats_and_timestamps():
+    stdout = (
+        "[10:00:01] [INFO] testing connection to the target URL\n"
+        "[10:00:02] [INFO] GET parameter 'id' appears to be injectable\n"
+        "[10:00:03] [INFO] GET parameter 'id' appears to be injectable\n"
+        "Type: boolean-based blind\n"
+    )
+
+    compact = compactSqlmapOutput({"stdout": stdout, "success": True})
+
+    assert compact.count("appears to be injectable") == 1
+    assert "[10:00" not in compact
+    assert "Type: boolean-based blind" in compact
+    assert "testing connection" not in compact
+
+
+def test_state_is_pruned_to_the_budget():
+    state = {"ip": "10.0.0.5", "empty": "", "notes": ["n" * 500] * 50}
+
+    compact = compactState(state, maxTokens=200)
+
+    assert estimateTokens(compact) <= 200
+    assert '"empty"' not in compact
+    assert "more" in compact
@@ -0,0 +1,55 @@
+from LLM_tools.fast_paths import (
+    fastPathReport,
+    nmapEvaluation,
+    recordDecision,
+    resetFastPathStats,
+    sqlmapVerdict,
+)
+
+
+def test_sqlmap_vulnerable_with_dbms():
+    stdout = (
+        "[10:00:02] [INFO] GET parameter 'id' is vulnerable. Do you want to keep testing?\n"
+        "[10:00:03] [INFO] the back-end DBMS is MySQL\n"
+    )
+
+    verdict = sqlmapVerdict({"stdout": stdout, "success": True})
+
+    assert verdict["vulnerability_found"] is True
+    assert verdict["reasoning"] == "sqlmap reported: parameter 'id' is vulnerable. Back-end DBMS: MySQL."
+
+
+def test_sqlmap_not_injectable_and_ambiguous():
+    notInjectable = "[CRITICAL] all tested parameters do not appear to be injectable."
+
+    assert sqlmapVerdict({"stdout": notInjectable})["vulnerability_found"] is False
+    assert sqlmapVerdict({"stdout": "[INFO] testing connection to the target URL"}) is None
+    assert sqlmapVerdict(None) is None
+
+
+def test_nmap_clean_scan_with_open_ports():
+    stdout = "22/tcp open  ssh\n53/udp open|filtered domain\n2905/sctp open  m3ua\n80/tcp closed http\n"
+
+    evaluation = nmapEvaluation({"stdout": stdout, "success": True, "return_code": 0})
+
+    assert evaluation["reasoning"] == "Scan completed cleanly and reported 2 open port(s)."
+
+
+def test_nmap_failures_and_ambiguous_scans():
+    failed = nmapEvaluation({"stdout": "", "success": False, "stderr": "Failed to resolve host\n"})
+    timedOut = {"stdout": "22/tcp open  ssh\n", "success": True, "timed_out": True}
+
+    assert failed == {"confidence": 0.0, "reasoning": "Tool call failed without output: Failed to resolve host"}
+    assert nmapEvaluation(timedOut) is None
+    assert nmapEvaluation({"stdout": "All 1000 scanned ports are closed", "success": True}) is None
+
+
+def test_decisions_are_counted_per_node():
+    resetFastPathStats("test.")
+    recordDecision("test.evaluate", byRule=True)
+    recordDecision("test.evaluate", byRule=False)
+
+    assert fastPathReport("test.") == {"test.evaluate": {"rule": 1, "llm": 1, "hit_rate": 0.5}}
+
+    resetFastPathStats("test.")
+    assert fastPathReport("test.") == {}
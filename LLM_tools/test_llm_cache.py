@@ -0,0 +1,44 @@
+from LLM_tools.llm_cache import llmCache
+
+DECISION = {"reasoning": False, "num_predict": 8, "stop": ["\n"]}
+
+
+def test_key_depends_on_every_input():
+    base = llmCache.makeKey("qwen3", 0.0, "prompt")
+
+    assert llmCache.makeKey("qwen3", 0.0, "prompt") == base
+    assert llmCache.makeKey("llama3", 0.0, "prompt") != base
+    assert llmCache.makeKey("qwen3", 0.7, "prompt") != base
+    assert llmCache.makeKey("qwen3", 0.0, "other prompt") != base
+    assert llmCache.makeKey("qwen3", 0.0, "prompt", {"type": "object"}) != base
+
+
+def test_key_depends_on_call_options():
+    base = llmCache.makeKey("qwen3", 0.0, "prompt")
+    decision = llmCache.makeKey("qwen3", 0.0, "prompt", options=DECISION)
+
+    assert decision != base
+    assert llmCache.makeKey("qwen3", 0.0, "prompt", options={}) == base
+    assert llmCache.makeKey("qwen3", 0.0, "prompt", options=dict(reversed(DECISION.items()))) == decision
+
+
+def test_get_put_and_stats(tmp_path):
+    cache = llmCache(path=str(tmp_path / "cache.sqlite"))
+    key = llmCache.makeKey("qwen3", 0.0, "prompt")
+
+    assert cache.get(key, node="nmap.planner_node") is None
+    cache.put(key, "answer", model="qwen3", node="nmap.planner_node")
+
+    assert cache.get(key, node="nmap.planner_node") == "answer"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = llmCache(path=str(tmp_path / "cache.sqlite"), maxBytes=10)
+
+    cache.put("old", "x" * 6)
+    cache.put("new", "y" * 6)
+
+    assert cache.get("old") is None
+    assert cache.get("new") == "y" * 6
@@ -0,0 +1,13 @@
+from LLM_tools import llm_factory
+
+
+def test_only_the_primary_model_is_pinned(monkeypatch):
+    monkeypatch.setattr(llm_factory, "DEFAULT_MODEL", "qwen3:8b")
+    monkeypatch.setattr(llm_factory, "KEEP_ALIVE", "-1")
+    monkeypatch.setattr(llm_factory, "TIER_KEEP_ALIVE", "5m")
+    monkeypatch.setattr(llm_factory, "_models", {})
+
+    assert llm_factory.getLLM().keep_alive == -1
+    assert llm_factory.getLLM(model="qwen3:1.7b").keep_alive == "5m"
+    assert llm_factory.isPinned()
+    assert not llm_factory.isPinned("qwen3:1.7b")
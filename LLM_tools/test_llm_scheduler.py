@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from LLM_tools.llm_scheduler import llmScheduler
+
+
+async def test_async_waiters_run_by_priority():
+    scheduler = llmScheduler(maxInFlight=1)
+    order = []
+
+    async def call(node):
+        async with scheduler.asyncSlot(node, "qwen3"):
+            order.append(node)
+            await asyncio.sleep(0)
+
+    async with scheduler.asyncSlot("nmap.planner_node", "qwen3"):
+        tasks = [
+            asyncio.create_task(call("orchestrator.report_node")),
+            asyncio.create_task(call("nmap.planner_node")),
+            asyncio.create_task(call("orchestrator.reasoning_node")),
+        ]
+        await asyncio.sleep(0)
+
+    await asyncio.gather(*tasks)
+
+    assert order == [
+        "orchestrator.reasoning_node",
+        "nmap.planner_node",
+        "orchestrator.report_node",
+    ]
+
+
+async def test_cancelled_waiter_gives_its_slot_back():
+    scheduler = llmScheduler(maxInFlight=1)
+
+    async with scheduler.asyncSlot("nmap.planner_node", "qwen3"):
+        waiter = asyncio.create_task(scheduler.asyncAcquire("nmap.planner_node", "qwen3"))
+        await asyncio.sleep(0)
+        waiter.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    await asyncio.sleep(0)
+
+    assert (scheduler._inFlight, scheduler._waiting) == (0, [])
+
+
+async def test_sync_and_async_callers_share_the_slots():
+    scheduler = llmScheduler(maxInFlight=1)
+
+    def blocking():
+        with scheduler.slot("nmap.output_node", "qwen3"):
+            pass
+
+    async with scheduler.asyncSlot("nmap.planner_node", "qwen3"):
+        thread = asyncio.create_task(asyncio.to_thread(blocking))
+        await asyncio.sleep(0.05)
+        assert not thread.done()
+
+    await asyncio.wait_for(thread, timeout=5)
+
+    assert scheduler._inFlight == 0
@@ -0,0 +1,35 @@
+from LLM_tools.prompt_layout import DYNAMIC_HEADER, layoutPrompt, staticBlock
+
+RULES = """
+    You are an nmap expert.
+      Only use allowed arguments.
+"""
+
+
+def test_static_block_is_dedented():
+    assert staticBlock(RULES) == "You are an nmap expert.\n  Only use allowed arguments."
+
+
+def test_static_parts_come_first():
+    prompt = layoutPrompt([RULES, "", "Answer in JSON."], {"Target": "10.0.0.5"})
+
+    assert prompt == (
+        "You are an nmap expert.\n  Only use allowed arguments.\n\n"
+        "Answer in JSON.\n\n"
+        f"{DYNAMIC_HEADER}\n\n"
+        "Target:\n10.0.0.5"
+    )
+
+
+def test_prefix_is_identical_between_calls():
+    first = layoutPrompt(RULES, {"Target": "10.0.0.5", "Last output": "22/tcp open"})
+    second = layoutPrompt(RULES, {"Target": "10.0.0.6", "Last output": ""})
+
+    prefix = first[: first.index(DYNAMIC_HEADER) + len(DYNAMIC_HEADER)]
+    assert second.startswith(prefix)
+
+
+def test_empty_sections_keep_the_layout():
+    prompt = layoutPrompt("Rules.", {"Findings": [], "Notes": None, "Host": " 10.0.0.5 \n"})
+
+    assert prompt.endswith("Findings:\nNone.\n\nNotes:\nNone.\n\nHost:\n10.0.0.5")
@@ -0,0 +1,62 @@
+import asyncio
+
+from LLM_tools.speculation import speculator
+
+SLOT = "nmap.plan:10.0.0.5"
+
+
+async def test_offered_value_is_taken_once():
+    spec = speculator(enabled=True)
+    spec.offer(SLOT, "prompt", "plan")
+
+    assert await spec.take(SLOT, "prompt") == "plan"
+    assert await spec.take(SLOT, "prompt") is None
+    assert spec.report()["nmap.plan"]["used"] == 1
+
+
+async def test_key_mismatch_discards_and_cancels():
+    spec = speculator(enabled=True)
+    started = asyncio.Event()
+
+    async def slow():
+        started.set()
+        await asyncio.sleep(60)
+
+    spec.launch(SLOT, "old prompt", slow)
+    await started.wait()
+    task = spec._entries[SLOT]["task"]
+
+    assert await spec.take(SLOT, "new prompt") is None
+    await asyncio.sleep(0)
+
+    assert task.cancelled()
+    assert spec.report()["nmap.plan"]["discarded"] == 1
+
+
+async def test_failed_speculation_returns_none():
+    spec = speculator(enabled=True)
+
+    async def broken():
+        raise RuntimeError("model unavailable")
+
+    spec.launch(SLOT, "prompt", broken)
+
+    assert await spec.take(SLOT, "prompt") is None
+    assert spec.report()["nmap.plan"] == {
+        "launched": 1,
+        "used": 0,
+        "discarded": 0,
+        "failed": 1,
+        "saved_s": 0.0,
+    }
+
+
+async def test_disabled_speculator_launches_nothing():
+    spec = speculator(enabled=False)
+
+    async def factory():
+        return "plan"
+
+    spec.launch(SLOT, "prompt", factory)
+
+    assert await spec.take(SLOT, "prompt") is None
@@ -1,4 +1,4 @@
-from MCP_tools.mcp_server import KaliToolsClient, setup_mcp_server
+from MCP_tools.mcp_registry import callTool
 import os
 from dotenv import load_dotenv
 import asyncio
@@ -8,12 +8,8 @@ import asyncio
 # ------------------------------------------------------------------------------- #
 load_dotenv()
 
-KALI_API = os.getenv(key="KALI_API", default="http://192.168.157.137:5000")
 URL = os.getenv(key="TEST_TARGET", default="http://192.168.157.136")
 
-client = KaliToolsClient(server_url=KALI_API)
-mcp = setup_mcp_server(kali_client=client)
-
 # ------------------------------------------------------------------------------- #
 #                                   Login                                         #
 # ------------------------------------------------------------------------------- #
@@ -21,14 +17,12 @@ mcp = setup_mcp_server(kali_client=client)
 
 async def dvwa_login(baseURL):
     command = f"/home/kali/DVWA_login/venv/bin/python /home/kali/DVWA_login/dvwa_login.py {baseURL}"
-    response = await mcp.call_tool(
-        name="execute_command", arguments={"command": command}
-    )
+    response = await callTool(name="execute_command", arguments={"command": command})
     return response[1]["result"]["stdout"]
 
 
 async def serverHealth():
-    return await mcp.call_tool(name="server_health", arguments={})
+    return await callTool(name="server_health", arguments={})
 
 
 # ------------------------------------------------------------------------------- #
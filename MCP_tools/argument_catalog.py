@@ -0,0 +1,300 @@
+# Allowed-arguments catalogs and tool call validation.
+#
+# nmap_allowed_arguments.json and sqlmap_allowed_arguments.json list the options the
+# agents may use. They are shown to the model in the tool selection prompts, and used
+# to be read from disk for every prompt and never checked against what the model
+# actually returned - a typo or an option outside the catalog only failed on the Kali
+# box, one API round trip and one scan later.
+#
+# Each catalog is loaded once per process into an argumentCatalog (prompt text plus an
+# option table). validateNmapCall / validateSqlmapSelection check a tool call against
+# it, normalize what can be normalized (whitespace, "--opt=value", "-sCV", duplicates,
+# case) and return the errors for everything else, so an invalid call is rejected locally.
+
+import json
+import re
+import shlex
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+CATALOG_DIR = Path(__file__).resolve().parent
+
+NMAP_CATALOG = CATALOG_DIR / "nmap" / "nmap_allowed_arguments.json"
+SQLMAP_CATALOG = CATALOG_DIR / "sqlmap" / "sqlmap_allowed_arguments.json"
+
+COMBINED_SCAN = re.compile(r"^-s[A-Za-z]{2,}$")
+PORT_SPEC = re.compile(r"^(?:[TUS]:)?(?:\d*-\d*|\d+)(?:,(?:[TUS]:)?(?:\d*-\d*|\d+))*$")
+TARGET = re.compile(r"^[\w.:/\-]+(?: [\w.:/\-]+)*$")
+
+# option types that are followed by a value
+VALUE_TYPES = {"int", "float", "ports", "string", "list", "file"}
+
+_catalogs: Dict[str, "argumentCatalog"] = {}
+_catalogLock = threading.Lock()
+
+# ------------------------------------------------------------------------------- #
+#                                      Catalog                                    #
+# ------------------------------------------------------------------------------- #
+
+
+class argumentCatalog:
+    """Options of one allowed-arguments file, indexed by option name."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.text = path.read_text(encoding="utf-8")
+
+        # "--level" -> {"type", "range", "default", "values"}
+        self.options: Dict[str, Dict[str, Any]] = {}
+
+        for entry in catalogEntries(json.loads(self.text)):
+            name, value = splitOption(entry["name"])
+            spec = self.options.setdefault(name, {"type": None, "values": set()})
+
+            if value is not None:
+                # "--script vuln", "--level=5": one allowed value of the option (numeric
+                # options are checked against their range, their values are examples)
+                spec["values"].add(value)
+                spec["type"] = spec["type"] or "string"
+            else:
+                spec["type"] = entry.get("type") or spec["type"]
+                spec["range"] = entry.get("range")
+                spec["default"] = entry.get("default")
+
+        # value options with attached values (-PS80, -p22), longest first
+        self._prefixes = sorted(
+            (name for name, spec in self.options.items() if spec["type"] in ("ports", "int")),
+            key=len,
+            reverse=True,
+        )
+
+    def resolve(self, token: str, following: Optional[str]) -> Tuple[str, Optional[str], int]:
+        """Option name, its value and how many tokens it used. Unknown options raise."""
+        if token.startswith("--") and "=" in token:
+            name, value = token.split("=", 1)
+            if name in self.options:
+                return name, value, 1
+
+        if token in self.options:
+            spec = self.options[token]
+            if spec["type"] not in VALUE_TYPES:
+                return token, None, 1
+
+            # probes (-PS, -PA) take attached ports only, a separate token is a target
+            if token.startswith("-P"):
+                return token, None, 1
+
+            if following is None or following.startswith("-") and spec["type"] != "ports":
+                raise ValueError(f"option {token} needs a value")
+            return token, following, 2
+
+        for prefix in self._prefixes:
+            if token.startswith(prefix) and len(token) > len(prefix):
+                return prefix, token[len(prefix) :], 1
+
+        raise ValueError(f"option {token} is not in the allowed arguments")
+
+    def checkValue(self, name: str, value: Optional[str]):
+        spec = self.options[name]
+        kind = spec["type"]
+
+        if value is None:
+            return
+
+        if kind in ("int", "float"):
+            try:
+                number = int(value) if kind == "int" else float(value)
+            except ValueError:
+                raise ValueError(f"{name} expects a number, got {value!r}")
+            checkRange(name, number, spec.get("range"))
+        elif kind == "ports" and not PORT_SPEC.match(value):
+            raise ValueError(f"{name} got an invalid port list {value!r}")
+        elif not value:
+            raise ValueError(f"{name} needs a value")
+        elif spec["values"] and not set(value.split(",")) <= spec["values"]:
+            allowed = ", ".join(sorted(spec["values"]))
+            raise ValueError(f"{name} only accepts {allowed}, got {value!r}")
+
+
+# ------------------------------------------------------------------------------- #
+#                                     Validators                                  #
+# ------------------------------------------------------------------------------- #
+
+
+def validateNmapCall(call: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Check an nmap tool call (target, scan_type, ports, additional_args).
+
+    Returns:
+        The normalized call and a list of errors (empty when the call may run)
+    """
+    catalog = getCatalog(NMAP_CATALOG)
+    errors = []
+
+    target = " ".join((call.get("target") or "").split())
+    if not target or not TARGET.match(target):
+        errors.append(f"invalid target {call.get('target')!r}")
+
+    ports = (call.get("ports") or "").replace(" ", "")
+    if ports and not PORT_SPEC.match(ports):
+        errors.append(f"invalid port list {call.get('ports')!r}")
+
+    normalized = {}
+    seen = set()
+    portSpecs = [ports] if ports else []
+    for field in ("scan_type", "additional_args"):
+        try:
+            tokens = expandScanFlags(catalog, shlex.split(call.get(field) or ""))
+        except ValueError as e:
+            errors.append(f"{field}: {e}")
+            tokens = []
+
+        kept, index = [], 0
+        while index < len(tokens):
+            following = tokens[index + 1] if index + 1 < len(tokens) else None
+            try:
+                name, value, used = catalog.resolve(tokens[index], following)
+            except ValueError as e:
+                errors.append(str(e))
+                index += 1
+                continue
+            index += used
+
+            try:
+                catalog.checkValue(name, value)
+            except ValueError as e:
+                errors.append(str(e))
+                continue
+
+            if (name, value) in seen:
+                continue
+            seen.add((name, value))
+            if name in ("-p", "-p-"):
+                portSpecs.append(value or "-")
+
+            if value is None:
+                kept.append(name)
+            elif name.startswith("-P"):
+                kept.append(f"{name}{value}")
+            else:
+                kept.append(f"{name} {shlex.quote(value)}")
+
+        normalized[field] = " ".join(kept)
+
+    if len(portSpecs) > 1:
+        # nmap silently uses one of them
+        errors.append(f"conflicting port specs: {' / '.join(portSpecs)}")
+
+    return {**call, "target": target, "ports": ports, **normalized}, errors
+
+
+def validateSqlmapSelection(
+    selection: Dict[str, Any], tampers: Iterable[str]
+) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Check the fields of a sqlmapToolSelection against the sqlmap catalog.
+
+    Returns:
+        The normalized fields and a list of errors (empty when the call may run)
+    """
+    catalog = getCatalog(SQLMAP_CATALOG)
+    errors, normalized = [], dict(selection)
+
+    method = (selection.get("method") or "GET").upper()
+    if method not in ("GET", "POST"):
+        errors.append(f"unsupported method {selection.get('method')!r}")
+    normalized["method"] = method
+
+    for field in ("level", "risk", "threads"):
+        if selection.get(field) is not None:
+            try:
+                catalog.checkValue(f"--{field}", str(selection[field]))
+            except ValueError as e:
+                errors.append(str(e))
+
+    technique = selection.get("technique")
+    if technique:
+        technique = technique.upper()
+        allowed = catalog.options["--technique"].get("default") or ""
+        if not set(technique) <= set(allowed):
+            errors.append(f"--technique only accepts letters of {allowed}, got {technique!r}")
+        normalized["technique"] = technique
+
+    # "--current-db", "current-db" and "current_db" are the same enumeration
+    enumeration = []
+    for item in selection.get("enumeration") or []:
+        name = "--" + item.strip().lstrip("-").replace("_", "-").lower()
+        if name not in catalog.options:
+            errors.append(f"unknown enumeration {item!r}")
+        elif name[2:].replace("-", "_") not in enumeration:
+            enumeration.append(name[2:].replace("-", "_"))
+    normalized["enumeration"] = enumeration or selection.get("enumeration")
+
+    tamperNames = []
+    for tamper in selection.get("tamper") or []:
+        tamper = tamper.strip().lower()
+        if tamper not in tampers:
+            errors.append(f"unknown tamper script {tamper!r}")
+        elif tamper not in tamperNames:
+            tamperNames.append(tamper)
+    normalized["tamper"] = tamperNames or selection.get("tamper")
+
+    return normalized, errors
+
+
+# ------------------------------------------------------------------------------- #
+#                                  Helper functions                               #
+# ------------------------------------------------------------------------------- #
+
+
+def getCatalog(path: Path) -> argumentCatalog:
+    key = str(path)
+
+    if key not in _catalogs:
+        with _catalogLock:
+            if key not in _catalogs:
+                _catalogs[key] = argumentCatalog(path)
+
+    return _catalogs[key]
+
+
+def expandScanFlags(catalog: argumentCatalog, tokens: List[str]) -> List[str]:
+    # -sCV -> -sC -sV, like scan_dedup.canonicalOptions; only for unknown combinations
+    expanded = []
+    for token in tokens:
+        if COMBINED_SCAN.match(token) and token not in catalog.options:
+            expanded.extend(f"-s{letter}" for letter in token[2:])
+        else:
+            expanded.append(token)
+    return expanded
+
+
+def catalogEntries(node) -> Iterable[Dict[str, Any]]:
+    # the catalogs group options by purpose and risk, only the entries matter here
+    if isinstance(node, dict):
+        if "name" in node:
+            yield node
+        else:
+            for child in node.values():
+                yield from catalogEntries(child)
+    elif isinstance(node, list):
+        for child in node:
+            yield from catalogEntries(child)
+
+
+def splitOption(name: str) -> Tuple[str, Optional[str]]:
+    for separator in (" ", "="):
+        if separator in name:
+            option, value = name.split(separator, 1)
+            return option, value
+    return name, None
+
+
+def checkRange(name: str, number: float, valueRange: Optional[str]):
+    if not valueRange:
+        return
+
+    low, high = (float(bound) for bound in valueRange.split("-"))
+    if not low <= number <= high:
+        raise ValueError(f"{name} must be within {valueRange}, got {number:g}")
@@ -2,7 +2,7 @@ import os
 import asyncio
 import json
 from dotenv import load_dotenv
-from MCP_tools.mcp_server import KaliToolsClient, setup_mcp_server
+from MCP_tools.mcp_registry import callTool
 from pydantic import BaseModel, Field
 from typing import List, Dict
 from urllib.parse import urlparse, parse_qs, urlunparse
@@ -13,11 +13,6 @@ load_dotenv()
 #                                       Config                                    #
 # ------------------------------------------------------------------------------- #
 
-KALI_API = os.getenv(key="KALI_API", default="http://192.168.157.137:5000")
-
-client = KaliToolsClient(server_url=KALI_API)
-mcp = setup_mcp_server(kali_client=client)
-
 savedPayload = {}
 
 # ------------------------------------------------------------------------------- #
@@ -52,11 +47,11 @@ class AttackVector(BaseModel):
 
 
 async def execute_command(command: str):
-    return await mcp.call_tool(name="execute_command", arguments={"command": command})
+    return await callTool(name="execute_command", arguments={"command": command})
 
 
 async def serverHealth():
-    return await mcp.call_tool(name="server_health", arguments={})
+    return await callTool(name="server_health", arguments={})
 
 
 # filter out directories and endpoints with certain http status codes
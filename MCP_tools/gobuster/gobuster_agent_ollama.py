@@ -1,9 +1,9 @@
 import os
 from dotenv import load_dotenv
-from langchain_ollama import ChatOllama
 import json
 import re
 import asyncio
+from functools import lru_cache
 from typing import Dict, Any, List, Optional
 from pydantic import Field, BaseModel
 from langchain.messages import SystemMessage, ToolCall, ToolMessage, HumanMessage
@@ -13,6 +13,10 @@ from MCP_tools.gobuster.gobuster_tool import gobuster_scan, returnGobusterToolCa
 from datetime import datetime
 from collections import Counter
 from MCP_tools.MCP_dvwa_login import dvwa_login
+from LLM_tools.llm_factory import getLLM, warmModel
+from LLM_tools.llm_calls import invokeBound
+from LLM_tools.llm_metrics import startRun, summaryTable
+from LLM_tools.context_compaction import compactGobusterMemory, compactToolOutput
 
 
 load_dotenv()
@@ -21,18 +25,13 @@ load_dotenv()
 #                                  LLM setup                                      #
 # ------------------------------------------------------------------------------- #
 
-LM_API = os.getenv(key="OLLAMA_API", default="http://127.0.0.1:11434")
 LOGIN_TOGGLE = os.getenv(key="LOGIN_TOGGLE", default=False)
 TEST_TARGET = os.getenv(key="TEST_TARGET", default="http://192.168.157.136")
 
-llm = ChatOllama(
-    model="huihui_ai/qwen3-abliterated:8b",
-    base_url=LM_API,
-    temperature=0.2,
-    format=None,
-)
 
-finalAgent = llm.bind_tools([gobuster_scan])
+@lru_cache(maxsize=None)
+def getAgent():
+    return getLLM().bind_tools([gobuster_scan])
 
 
 # ------------------------------------------------------------------------------- #
@@ -186,12 +185,11 @@ async def callModel(
     messages: List[BaseMessage], customAgentState: customAgentState, toolOutput: None
 ):
 
-    state_snapshot = json.dumps(
-        {
-            "target": customAgentState.target,
-            "memory": customAgentState.memory,
-        }
-    )
+    state_snapshot = f"""
+        Target: {customAgentState.target}
+        Memory (one line per scan, then path status type per endpoint):
+        {compactGobusterMemory(customAgentState.memory)}
+        """
 
     lastToolCall = await returnGobusterToolCall(mode="read")
 
@@ -207,7 +205,7 @@ async def callModel(
         {lastToolCall}
         
         LAST TOOL OUTPUT:
-        {toolOutput}
+        {compactToolOutput(toolOutput.content)}
         """
     else:
         customMessage = f"""
@@ -232,8 +230,10 @@ async def callModel(
     )
     print("============================================\n\n")
 
-    return await finalAgent.ainvoke(
-        [SystemMessage(content=context), SystemMessage(content=customMessage)],
+    return await invokeBound(
+        node="gobuster.call_model",
+        runnable=getAgent(),
+        messages=[SystemMessage(content=context), SystemMessage(content=customMessage)],
         config={"recursion_limit": 40},
     )
 
@@ -503,6 +503,8 @@ def createSummary(uniqueEndpoints):
 
 
 async def agentRunner(message):
+    startRun(name="gobuster")
+    await asyncio.to_thread(warmModel)
 
     response = await agent.ainvoke(input=message, config={"recursion_limit": 40})
 
@@ -557,3 +559,4 @@ if __name__ == "__main__":
         message = [HumanMessage(content=supervisorInput)]
 
         asyncio.run(agentRunner(message=message))
+        print(summaryTable())
@@ -4,14 +4,10 @@ from langchain.tools import tool
 from dotenv import load_dotenv
 import os
 import asyncio
-from MCP_tools.mcp_server import KaliToolsClient, setup_mcp_server
+from MCP_tools.mcp_registry import callTool
 
 load_dotenv()
 
-KALI_API = os.getenv(key="KALI_API", default="http://192.168.157.137:5000")
-client = KaliToolsClient(server_url=KALI_API)
-mcp = setup_mcp_server(kali_client=client)
-
 savedPayload = {}
 
 testGobusterAddr = os.getenv(key="TEST_TARGET", default="http://192.168.157.133")
@@ -49,7 +45,7 @@ async def gobuster_scan(
     }
     await returnGobusterToolCall(mode="write", payload=payload)
 
-    result = await mcp.call_tool(name="gobuster_scan", arguments=payload)
+    result = await callTool(name="gobuster_scan", arguments=payload)
     return result
 
 
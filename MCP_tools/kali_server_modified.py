@@ -8,12 +8,13 @@ import argparse
 import json
 import logging
 import os
+import queue
 import subprocess
 import sys
 import traceback
 import threading
-from typing import Dict, Any
-from flask import Flask, request, jsonify
+from typing import Dict, Any, Iterator
+from flask import Flask, Response, request, jsonify
 import shlex
 
 # Configure logging
@@ -35,9 +36,10 @@ app = Flask(__name__)
 class CommandExecutor:
     """Class to handle command execution with better timeout management"""
 
-    def __init__(self, command: str, timeout: int = COMMAND_TIMEOUT):
+    def __init__(self, command: str, timeout: int = COMMAND_TIMEOUT, on_line=None):
         self.command = command
         self.timeout = timeout
+        self.on_line = on_line
         self.process = None
         self.stdout_data = ""
         self.stderr_data = ""
@@ -50,6 +52,8 @@ class CommandExecutor:
         """Thread function to continuously read stdout"""
         for line in iter(self.process.stdout.readline, ""):
             self.stdout_data += line
+            if self.on_line:
+                self.on_line(line)
 
     def _read_stderr(self):
         """Thread function to continuously read stderr"""
@@ -147,6 +151,49 @@ def execute_command(command: str) -> Dict[str, Any]:
     return executor.execute()
 
 
+def stream_command(command: str) -> Iterator[str]:
+    """
+    Execute a shell command and stream its output
+
+    Args:
+        command: The command to execute
+
+    Returns:
+        NDJSON lines: {"line": ...} for every stdout line while the command runs,
+        then {"result": ...} with the same fields as execute_command
+    """
+    records = queue.Queue()
+    executor = CommandExecutor(command, on_line=records.put)
+
+    worker = threading.Thread(target=lambda: records.put(executor.execute()))
+    worker.daemon = True
+    worker.start()
+
+    while True:
+        record = records.get()
+        if isinstance(record, dict):
+            yield json.dumps({"result": record}) + "\n"
+            return
+        yield json.dumps({"line": record}) + "\n"
+
+
+def build_nmap_command(params: Dict[str, Any]) -> str:
+    scan_type = params.get("scan_type", "-sCV")
+    ports = params.get("ports", "")
+    additional_args = params.get("additional_args", "-T4 -Pn")
+
+    command = f"nmap {scan_type}"
+
+    if ports:
+        command += f" -p {ports}"
+
+    if additional_args:
+        # Basic validation for additional args - more sophisticated validation would be better
+        command += f" {additional_args}"
+
+    return command + f" {params.get('target', '')}"
+
+
 @app.route("/api/command", methods=["POST"])
 def generic_command():
     """Execute any command provided in the request."""
@@ -171,30 +218,34 @@ def nmap():
     """Execute nmap scan with the provided parameters."""
     try:
         params = request.json
-        target = params.get("target", "")
-        scan_type = params.get("scan_type", "-sCV")
-        ports = params.get("ports", "")
-        additional_args = params.get("additional_args", "-T4 -Pn")
 
-        if not target:
+        if not params.get("target", ""):
             logger.warning("Nmap called without target parameter")
             return jsonify({"error": "Target parameter is required"}), 400
 
-        command = f"nmap {scan_type}"
+        result = execute_command(build_nmap_command(params))
+        return jsonify(result)
+    except Exception as e:
+        logger.error(f"Error in nmap endpoint: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({"error": f"Server error: {str(e)}"}), 500
 
-        if ports:
-            command += f" -p {ports}"
 
-        if additional_args:
-            # Basic validation for additional args - more sophisticated validation would be better
-            command += f" {additional_args}"
+@app.route("/api/tools/nmap/stream", methods=["POST"])
+def nmap_stream():
+    """Execute nmap and stream its output line by line while it runs."""
+    try:
+        params = request.json
 
-        command += f" {target}"
+        if not params.get("target", ""):
+            logger.warning("Nmap stream called without target parameter")
+            return jsonify({"error": "Target parameter is required"}), 400
 
-        result = execute_command(command)
-        return jsonify(result)
+        return Response(
+            stream_command(build_nmap_command(params)), mimetype="application/x-ndjson"
+        )
     except Exception as e:
-        logger.error(f"Error in nmap endpoint: {str(e)}")
+        logger.error(f"Error in nmap stream endpoint: {str(e)}")
         logger.error(traceback.format_exc())
         return jsonify({"error": f"Server error: {str(e)}"}), 500
 
@@ -0,0 +1,146 @@
+# Process-wide registry for the Kali client and the MCP server.
+#
+# Every tool module used to build its own KaliToolsClient + FastMCP pair at import
+# time. The registry creates a single pair lazily on first use, so all agents share
+# one connection pool and one concurrency limit towards the Kali API.
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from dotenv import load_dotenv
+
+try:
+    from MCP_tools.mcp_server import (
+        KaliToolsClient,
+        setup_mcp_server,
+        DEFAULT_KALI_SERVER,
+        DEFAULT_REQUEST_TIMEOUT,
+        DEFAULT_MAX_CONCURRENCY,
+    )
+except Exception:
+    from mcp_server import (
+        KaliToolsClient,
+        setup_mcp_server,
+        DEFAULT_KALI_SERVER,
+        DEFAULT_REQUEST_TIMEOUT,
+        DEFAULT_MAX_CONCURRENCY,
+    )
+
+load_dotenv()
+
+# ------------------------------------------------------------------------------- #
+#                                       Config                                    #
+# ------------------------------------------------------------------------------- #
+
+KALI_API = os.getenv(key="KALI_API", default=DEFAULT_KALI_SERVER)
+KALI_TIMEOUT = int(os.getenv(key="KALI_TIMEOUT", default=DEFAULT_REQUEST_TIMEOUT))
+KALI_MAX_CONCURRENCY = int(
+    os.getenv(key="KALI_MAX_CONCURRENCY", default=DEFAULT_MAX_CONCURRENCY)
+)
+
+_client: Optional[KaliToolsClient] = None
+_mcp = None
+_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+
+# event loop of each Kali worker thread, created once per thread
+_workerState = threading.local()
+
+# ------------------------------------------------------------------------------- #
+#                                      Registry                                   #
+# ------------------------------------------------------------------------------- #
+
+
+def getClient() -> KaliToolsClient:
+    global _client
+
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = KaliToolsClient(
+                    server_url=KALI_API,
+                    timeout=KALI_TIMEOUT,
+                    max_concurrency=KALI_MAX_CONCURRENCY,
+                )
+
+    return _client
+
+
+def getMCP():
+    global _mcp
+
+    if _mcp is None:
+        client = getClient()
+        with _lock:
+            if _mcp is None:
+                _mcp = setup_mcp_server(kali_client=client)
+
+    return _mcp
+
+
+def getExecutor() -> ThreadPoolExecutor:
+    # Kali calls block a thread for the whole scan; they get their own pool, sized like
+    # the client's limit, so they never starve asyncio.to_thread users (LLM calls etc.)
+    global _executor
+
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=KALI_MAX_CONCURRENCY,
+                    thread_name_prefix="kali",
+                    initializer=startWorkerLoop,
+                )
+
+    return _executor
+
+
+def startWorkerLoop():
+    _workerState.loop = asyncio.new_event_loop()
+
+
+def runTool(name: str, arguments: Dict[str, Any]):
+    # FastMCP runs the blocking tool function inline; the worker's own loop drives it
+    # without creating and tearing down a loop per call
+    return _workerState.loop.run_until_complete(
+        getMCP().call_tool(name=name, arguments=arguments)
+    )
+
+
+async def callTool(name: str, arguments: Dict[str, Any]):
+    # the tool functions are blocking HTTP calls to the Kali API; running them on the
+    # Kali executor keeps the event loop free for LLM calls while a scan is running
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(getExecutor(), runTool, name, arguments)
+
+
+async def streamTool(
+    endpoint: str, arguments: Dict[str, Any], onLine: Callable[[str], None]
+) -> Dict[str, Any]:
+    # streaming endpoints bypass MCP; every output line is handed to onLine on the
+    # event loop while the tool runs, the final result is returned like callTool's
+    loop = asyncio.get_running_loop()
+
+    def consume():
+        result = {}
+        for record in getClient().stream_post(endpoint, arguments):
+            if "line" in record:
+                loop.call_soon_threadsafe(onLine, record["line"])
+            else:
+                result = record.get("result", record)
+        return result
+
+    return await loop.run_in_executor(getExecutor(), consume)
+
+
+def resetRegistry():
+    # drop the shared instances (ex. after changing KALI_API at runtime)
+    global _client, _mcp
+
+    with _lock:
+        if _client is not None:
+            _client.session.close()
+        _client = None
+        _mcp = None
@@ -7,9 +7,12 @@
 import sys
 import os
 import argparse
+import json
 import logging
-from typing import Dict, Any, Optional
+import threading
+from typing import Dict, Any, Iterator, Optional
 import requests
+from requests.adapters import HTTPAdapter
 
 from mcp.server.fastmcp import FastMCP
 
@@ -22,23 +25,41 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Default configuration
-DEFAULT_KALI_SERVER = "http://192.168.157.129:5000"  # change to your linux IP
+DEFAULT_KALI_SERVER = "http://192.168.157.137:5000"  # change to your linux IP
 DEFAULT_REQUEST_TIMEOUT = 300  # 5 minutes default timeout for API requests
+DEFAULT_MAX_CONCURRENCY = 4  # maximum number of in-flight requests to the Kali API
 
 
 class KaliToolsClient:
     """Client for communicating with the Kali Linux Tools API Server"""
 
-    def __init__(self, server_url: str, timeout: int = DEFAULT_REQUEST_TIMEOUT):
+    def __init__(
+        self,
+        server_url: str,
+        timeout: int = DEFAULT_REQUEST_TIMEOUT,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ):
         """
         Initialize the Kali Tools Client
 
         Args:
             server_url: URL of the Kali Tools API Server
             timeout: Request timeout in seconds
+            max_concurrency: Maximum number of simultaneous requests to the server
         """
         self.server_url = server_url.rstrip("/")
         self.timeout = timeout
+        self.max_concurrency = max(1, max_concurrency)
+
+        # one pooled session per client, sized to the concurrency limit
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=self.max_concurrency
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+
         logger.info(f"Initialized Kali Tools Client connecting to {server_url}")
 
     def safe_get(
@@ -61,7 +82,8 @@ class KaliToolsClient:
 
         try:
             logger.debug(f"GET {url} with params: {params}")
-            response = requests.get(url, params=params, timeout=self.timeout)
+            with self._slots:
+                response = self.session.get(url, params=params, timeout=self.timeout)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -86,7 +108,10 @@ class KaliToolsClient:
 
         try:
             logger.debug(f"POST {url} with data: {json_data}")
-            response = requests.post(url, json=json_data, timeout=self.timeout)
+            with self._slots:
+                response = self.session.post(
+                    url, json=json_data, timeout=self.timeout
+                )
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -96,6 +121,39 @@ class KaliToolsClient:
             logger.error(f"Unexpected error: {str(e)}")
             return {"error": f"Unexpected error: {str(e)}", "success": False}
 
+    def stream_post(
+        self, endpoint: str, json_data: Dict[str, Any]
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Perform a POST request against a streaming (NDJSON) endpoint.
+
+        Args:
+            endpoint: API endpoint path (without leading slash)
+            json_data: JSON data to send
+
+        Returns:
+            Iterator over the streamed records; a failed request yields a single
+            {"result": {"error": ..., "success": False}} record
+        """
+        url = f"{self.server_url}/{endpoint}"
+
+        try:
+            logger.debug(f"POST (stream) {url} with data: {json_data}")
+            with self._slots:
+                with self.session.post(
+                    url, json=json_data, timeout=self.timeout, stream=True
+                ) as response:
+                    response.raise_for_status()
+                    for line in response.iter_lines(decode_unicode=True):
+                        if line:
+                            yield json.loads(line)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Request failed: {str(e)}")
+            yield {"result": {"error": f"Request failed: {str(e)}", "success": False}}
+        except Exception as e:
+            logger.error(f"Unexpected error: {str(e)}")
+            yield {"result": {"error": f"Unexpected error: {str(e)}", "success": False}}
+
     def execute_command(self, command: str) -> Dict[str, Any]:
         """
         Execute a generic command on the Kali server
@@ -0,0 +1,368 @@
+# Persistent host fingerprint database.
+#
+# Every nmap agent run starts from an empty state, so re-assessing the same lab
+# re-discovers and re-profiles every host. With the host database enabled the agent
+# keeps what it learned in SQLite, keyed by IP:
+#
+#   hosts    status, OS guess, when the host was first / last seen and last scanned
+#   ports    last reported state, service and version per port / protocol
+#   scans    every tool call that ran against a host and when
+#   changes  the diff of every run against what was known before it
+#
+# A new run consults it after discovery:
+#
+#   - hosts that were fully profiled within NMAP_HOST_DB_MAX_AGE_H hours are not
+#     scanned again, their stored record goes into the report
+#   - other known hosts start with their stored ports and their recent scans, so the
+#     scan dedup (scan_dedup.py) only lets through ports whose scans are stale; stored
+#     ports that one of the new scans covered but did not report are left out of the
+#     run's record and show up as removed
+#
+# At the end of the run the results are written back and the changes since the last
+# run (new / vanished hosts, opened / closed ports, changed services and OS) are
+# reported. Staleness is judged per scan: a port counts as fresh while a scan that
+# covered it is recent enough.
+#
+# The database is opt-in: set NMAP_HOST_DB=1 (or run "penagent nmap --host-db ...").
+
+import ipaddress
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ------------------------------------------------------------------------------- #
+#                                       Config                                    #
+# ------------------------------------------------------------------------------- #
+
+HOST_DB_ENABLED = os.getenv(key="NMAP_HOST_DB", default="0").lower() in ("1", "true", "yes")
+HOST_DB_PATH = os.getenv(key="NMAP_HOST_DB_PATH", default="nmap_hosts.sqlite")
+HOST_DB_MAX_AGE_H = float(os.getenv(key="NMAP_HOST_DB_MAX_AGE_H", default="24"))
+
+logger = logging.getLogger("host_db")
+
+_hostDB = None
+_hostDBLock = threading.Lock()
+
+# ------------------------------------------------------------------------------- #
+#                                      Database                                   #
+# ------------------------------------------------------------------------------- #
+
+
+class hostDB:
+    """SQLite host / port / scan history with per-run change tracking."""
+
+    def __init__(self, path: str = HOST_DB_PATH, maxAgeHours: float = HOST_DB_MAX_AGE_H):
+        self.path = path
+        self.maxAge = maxAgeHours * 3600
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS hosts (
+                ip TEXT PRIMARY KEY,
+                status TEXT,
+                os_guess TEXT,
+                first_seen REAL,
+                last_seen REAL,
+                last_scanned REAL
+            );
+            CREATE TABLE IF NOT EXISTS ports (
+                ip TEXT,
+                port INTEGER,
+                protocol TEXT,
+                state TEXT,
+                service TEXT,
+                version TEXT,
+                last_seen REAL,
+                PRIMARY KEY (ip, port, protocol)
+            );
+            CREATE TABLE IF NOT EXISTS scans (
+                ip TEXT,
+                call TEXT,
+                time REAL,
+                PRIMARY KEY (ip, call)
+            );
+            CREATE TABLE IF NOT EXISTS changes (
+                run_id TEXT,
+                time REAL,
+                ip TEXT,
+                change TEXT,
+                detail TEXT
+            );
+            CREATE INDEX IF NOT EXISTS changes_run ON changes(run_id);
+            """
+        )
+        self._conn.commit()
+
+    # ---------------- reads ---------------- #
+
+    def hostRecord(self, ip: str, freshScansOnly: bool = False) -> Optional[Dict[str, Any]]:
+        """Stored host in the record shape of host_store.hostStore, None if unknown."""
+        with self._lock:
+            host = self._conn.execute(
+                "SELECT status, os_guess FROM hosts WHERE ip = ?", (ip,)
+            ).fetchone()
+            if host is None:
+                return None
+
+            ports = self._conn.execute(
+                "SELECT port, protocol, state, service, version FROM ports WHERE ip = ? "
+                "ORDER BY protocol, port",
+                (ip,),
+            ).fetchall()
+            scans = self._conn.execute(
+                "SELECT call FROM scans WHERE ip = ? AND time >= ? ORDER BY time",
+                (ip, time.time() - self.maxAge if freshScansOnly else 0),
+            ).fetchall()
+
+        return {
+            "ip": ip,
+            "status": host[0],
+            "os_guess": host[1],
+            "ports": [
+                {"port": p, "protocol": proto, "state": s, "service": svc, "version": v}
+                for p, proto, s, svc, v in ports
+            ],
+            "scans_performed": [json.loads(call) for (call,) in scans],
+        }
+
+    def isFresh(self, ip: str) -> bool:
+        # fully profiled recently enough to skip the host in this run
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT last_scanned FROM hosts WHERE ip = ?", (ip,)
+            ).fetchone()
+
+        return bool(row and row[0] and time.time() - row[0] < self.maxAge)
+
+    def knownIps(self) -> List[str]:
+        with self._lock:
+            return [ip for (ip,) in self._conn.execute("SELECT ip FROM hosts ORDER BY ip")]
+
+    # ---------------- changes ---------------- #
+
+    def diff(
+        self, records: Dict[str, Dict[str, Any]], networks: Iterable[str] = ()
+    ) -> List[Dict[str, Any]]:
+        """Changes of these host records against the stored state."""
+        changes = []
+
+        for ip, record in records.items():
+            previous = self.hostRecord(ip)
+            if previous is None:
+                changes.append(change(ip, "new_host", f"{len(record['ports'])} port(s)"))
+                continue
+
+            if record.get("os_guess") and record["os_guess"] != previous["os_guess"]:
+                changes.append(
+                    change(ip, "os_changed", f"{previous['os_guess']} -> {record['os_guess']}")
+                )
+
+            before = {portKey(port): port for port in previous["ports"]}
+            after = {portKey(port): port for port in record["ports"]}
+
+            for key in after.keys() - before.keys():
+                changes.append(change(ip, "port_added", f"{key} {after[key]['state']}"))
+            for key in before.keys() - after.keys():
+                changes.append(change(ip, "port_removed", f"{key} {before[key]['state']}"))
+            for key in after.keys() & before.keys():
+                old, new = before[key], after[key]
+                if old["state"] != new["state"]:
+                    changes.append(
+                        change(ip, "port_state", f"{key} {old['state']} -> {new['state']}")
+                    )
+                if (old["service"], old["version"]) != (new["service"], new["version"]):
+                    changes.append(
+                        change(
+                            ip,
+                            "service_changed",
+                            f"{key} {old['service']} {old['version'] or ''} -> "
+                            f"{new['service']} {new['version'] or ''}".strip(),
+                        )
+                    )
+
+        # known hosts inside the swept networks that did not answer this time
+        for ip in self.knownIps():
+            if ip not in records and inNetworks(ip, networks):
+                changes.append(change(ip, "host_gone", "not discovered in this run"))
+
+        return changes
+
+    # ---------------- writes ---------------- #
+
+    def recordRun(
+        self,
+        runId: str,
+        records: Dict[str, Dict[str, Any]],
+        scanned: Iterable[str],
+        networks: Iterable[str] = (),
+        complete: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """
+        Store the results of a run and return what changed.
+
+        Args:
+            runId: Agent run the changes are filed under
+            records: Host records of the run (host_store record shape)
+            scanned: Hosts that were actually scanned, the others were taken from here
+            networks: Networks that were swept, for hosts that disappeared
+            complete: False for failed runs, their hosts are not skipped next time
+        """
+        changes = self.diff(records=records, networks=networks)
+        scanned = set(scanned)
+        now = time.time()
+
+        with self._lock:
+            for ip, record in records.items():
+                self._conn.execute(
+                    """
+                    INSERT INTO hosts (ip, status, os_guess, first_seen, last_seen, last_scanned)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(ip) DO UPDATE SET
+                        status = excluded.status,
+                        os_guess = COALESCE(excluded.os_guess, hosts.os_guess),
+                        last_seen = excluded.last_seen,
+                        last_scanned = COALESCE(excluded.last_scanned, hosts.last_scanned)
+                    """,
+                    (
+                        ip,
+                        record["status"],
+                        record.get("os_guess"),
+                        now,
+                        now,
+                        now if complete and ip in scanned else None,
+                    ),
+                )
+
+                if ip not in scanned:
+                    continue
+
+                self._conn.execute("DELETE FROM ports WHERE ip = ?", (ip,))
+                self._conn.executemany(
+                    "INSERT INTO ports VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            ip,
+                            port["port"],
+                            port["protocol"],
+                            port["state"],
+                            port["service"],
+                            port["version"],
+                            now,
+                        )
+                        for port in record["ports"]
+                    ],
+                )
+                # recent scans taken over from earlier runs keep their time, a stale scan
+                # in the record was run again
+                self._conn.executemany(
+                    """
+                    INSERT INTO scans VALUES (?, ?, ?)
+                    ON CONFLICT(ip, call) DO UPDATE SET time = excluded.time
+                    WHERE scans.time < ?
+                    """,
+                    [
+                        (ip, json.dumps(scan, sort_keys=True), now, now - self.maxAge)
+                        for scan in record["scans_performed"]
+                        if scan.get("success") is not False
+                    ],
+                )
+
+            self._conn.executemany(
+                "INSERT INTO changes VALUES (?, ?, ?, ?, ?)",
+                [(runId, now, c["ip"], c["change"], c["detail"]) for c in changes],
+            )
+            self._conn.commit()
+
+        logger.info(f"[HOST DB] run {runId}: {len(records)} host(s), {len(changes)} change(s)")
+        return changes
+
+    def runChanges(self, runId: Optional[str] = None) -> List[Dict[str, Any]]:
+        # changes of one run, the latest run by default
+        with self._lock:
+            if runId is None:
+                row = self._conn.execute(
+                    "SELECT run_id FROM changes ORDER BY time DESC LIMIT 1"
+                ).fetchone()
+                runId = row[0] if row else None
+
+            rows = self._conn.execute(
+                "SELECT ip, change, detail FROM changes WHERE run_id = ? ORDER BY ip",
+                (runId,),
+            ).fetchall()
+
+        return [change(ip, kind, detail) for ip, kind, detail in rows]
+
+    def clear(self):
+        with self._lock:
+            for table in ("hosts", "ports", "scans", "changes"):
+                self._conn.execute(f"DELETE FROM {table}")
+            self._conn.commit()
+            self._conn.execute("VACUUM")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = {
+                table: self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("hosts", "ports", "scans", "changes")
+            }
+
+        return {"path": self.path, "max_age_h": self.maxAge / 3600, **counts}
+
+
+# ------------------------------------------------------------------------------- #
+#                                  Helper functions                               #
+# ------------------------------------------------------------------------------- #
+
+
+def change(ip: str, kind: str, detail: str) -> Dict[str, str]:
+    return {"ip": ip, "change": kind, "detail": detail}
+
+
+def portKey(port: Dict[str, Any]) -> str:
+    return f"{port['port']}/{port['protocol']}"
+
+
+def inNetworks(ip: str, networks: Iterable[str]) -> bool:
+    address = ipaddress.ip_address(ip)
+
+    for network in networks:
+        for part in network.split():
+            try:
+                if address in ipaddress.ip_network(part, strict=False):
+                    return True
+            except ValueError:
+                continue
+
+    return False
+
+
+def getHostDB() -> Optional[hostDB]:
+    # returns None when the host database is disabled
+    global _hostDB
+
+    if not HOST_DB_ENABLED:
+        return None
+
+    if _hostDB is None:
+        with _hostDBLock:
+            if _hostDB is None:
+                _hostDB = hostDB(path=HOST_DB_PATH)
+
+    return _hostDB
+
+
+def enableHostDB(path: Optional[str] = None):
+    global HOST_DB_ENABLED, HOST_DB_PATH
+
+    HOST_DB_ENABLED = True
+    if path:
+        HOST_DB_PATH = path
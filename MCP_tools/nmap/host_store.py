@@ -0,0 +1,352 @@
+# Compact host / port storage for large sweeps.
+#
+# A /16 discovery can report tens of thousands of live hosts. A pydantic hostMemory per
+# host (portInfo models, dicts, plans, raw tool output) in the LangGraph state means
+# every node copies and checkpoints all of them. hostStore keeps one slot per host in
+# flat arrays instead:
+#
+#   ips       array("I")   IPv4 address as integer
+#   status    bytearray    index into STATUSES
+#   os        array("I")   interned OS guess
+#   ports     array("Q")   per host, one packed record per port
+#   scans     array("I")   per host, interned performed tool calls
+#
+# A port record packs port (16 bits), protocol (2), state (4), service id (20) and
+# version id (22). Service names have their own string table, versions and OS guesses
+# share one; performed tool calls (which contain the target) have a third. packPort
+# refuses ids that do not fit their field instead of spilling into the next one.
+#
+# During a run the store stays loaded in the process: the graph state only carries a
+# handle (compactHosts with store_id set, see hostStore.handle / hostStore.live), so a
+# node that touches one host does not decode and re-encode every other host. The
+# agent checkpointer is in-memory and per run, so a handle never outlives its store.
+# Checkpoints hold no host data: a thread can not be resumed once its run ended (the
+# agent deletes its thread at the end of every run and never resumes one). Stores
+# registered during a run are collected by trackStores and released by releaseStores,
+# whether the run finished or raised.
+# dump / load give the self-contained form (bytes + string tables) for everything
+# that has to leave the process. The agent only builds a pydantic hostMemory for hosts
+# it is actively working on (LLM prompts) and plain records for the report.
+
+import ipaddress
+import json
+import threading
+import uuid
+from array import array
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+from pydantic import BaseModel, Field
+
+STATUSES = ["unknown", "alive", "down"]
+PROTOCOLS = ["tcp", "udp", "sctp"]
+PORT_STATES = [
+    "",
+    "open",
+    "closed",
+    "filtered",
+    "open|filtered",
+    "closed|filtered",
+    "unfiltered",
+    "unknown",
+]
+
+SERVICE_BITS = 20
+VERSION_BITS = 22
+
+# stores of the running agents, by store_id
+_liveStores: Dict[str, "hostStore"] = {}
+_liveLock = threading.Lock()
+
+# ids registered by the agent run of the current context (and the tasks it started)
+_runStores: ContextVar[Optional[set]] = ContextVar("host_stores", default=None)
+
+# ------------------------------------------------------------------------------- #
+#                                 Serialized form                                 #
+# ------------------------------------------------------------------------------- #
+
+
+class compactHosts(BaseModel):
+    # set for a handle to a store loaded in this process, the fields below are then empty
+    store_id: str = Field(default="")
+
+    ips: bytes = Field(default=b"")
+    status: bytes = Field(default=b"")
+    os: bytes = Field(default=b"")
+
+    # per host slices of the flat arrays: slot i owns [offsets[i], offsets[i + 1])
+    port_offsets: bytes = Field(default=b"")
+    ports: bytes = Field(default=b"")
+    scan_offsets: bytes = Field(default=b"")
+    scans: bytes = Field(default=b"")
+
+    strings: List[str] = Field(default_factory=lambda: [""])
+    services: List[str] = Field(default_factory=lambda: [""])
+    calls: List[str] = Field(default_factory=list)
+
+
+# ------------------------------------------------------------------------------- #
+#                                       Store                                     #
+# ------------------------------------------------------------------------------- #
+
+
+def packPort(port: int, protocol: int, state: int, service: int, version: int) -> int:
+    if service >> SERVICE_BITS or version >> VERSION_BITS:
+        raise OverflowError(f"string id does not fit its port field: {service=} {version=}")
+    return port | protocol << 16 | state << 18 | service << 22 | version << 42
+
+
+def unpackPort(record: int):
+    return (
+        record & 0xFFFF,
+        (record >> 16) & 0x3,
+        (record >> 18) & 0xF,
+        (record >> 22) & ((1 << SERVICE_BITS) - 1),
+        record >> 42,
+    )
+
+
+class hostStore:
+    """Slot based host records backed by arrays."""
+
+    def __init__(self):
+        self.ips = array("I")
+        self.status = bytearray()
+        self.os = array("I")
+        self.ports: Dict[int, array] = {}
+        self.scans: Dict[int, array] = {}
+
+        self.strings = [""]
+        self._stringIds = {"": 0}
+        self.services = [""]
+        self._serviceIds = {"": 0}
+        self.calls: List[str] = []
+        self._callIds: Dict[str, int] = {}
+        self._slots: Dict[int, int] = {}
+
+        self.storeId = uuid.uuid4().hex
+
+    def __len__(self) -> int:
+        return len(self.ips)
+
+    # ---------------- strings ---------------- #
+
+    def intern(self, text: Optional[str]) -> int:
+        return internText(self.strings, self._stringIds, text)
+
+    def internService(self, text: Optional[str]) -> int:
+        return internText(self.services, self._serviceIds, text)
+
+    def text(self, stringId: int) -> Optional[str]:
+        return self.strings[stringId] if stringId else None
+
+    def serviceName(self, serviceId: int) -> Optional[str]:
+        return self.services[serviceId] if serviceId else None
+
+    def internCall(self, call: Dict[str, Any]) -> int:
+        text = json.dumps(call, sort_keys=True)
+
+        callId = self._callIds.get(text)
+        if callId is None:
+            callId = len(self.calls)
+            self.calls.append(text)
+            self._callIds[text] = callId
+
+        return callId
+
+    # ---------------- hosts ---------------- #
+
+    def slotOf(self, ip: str) -> Optional[int]:
+        return self._slots.get(int(ipaddress.IPv4Address(ip)))
+
+    def addHost(self, ip: str, status: str = "alive") -> int:
+        address = int(ipaddress.IPv4Address(ip))
+        slot = self._slots.get(address)
+
+        if slot is None:
+            slot = len(self.ips)
+            self._slots[address] = slot
+            self.ips.append(address)
+            self.status.append(0)
+            self.os.append(0)
+
+        self.status[slot] = STATUSES.index(status) if status in STATUSES else 0
+        return slot
+
+    def ipAt(self, slot: int) -> str:
+        return str(ipaddress.IPv4Address(self.ips[slot]))
+
+    def hostIps(self) -> Iterator[str]:
+        return (self.ipAt(slot) for slot in range(len(self.ips)))
+
+    def putRecord(self, record: Dict[str, Any]) -> int:
+        """Store (or replace) a host from its plain record, see hostRecord."""
+        slot = self.addHost(record["ip"], record.get("status") or "unknown")
+        self.os[slot] = self.intern(record.get("os_guess"))
+
+        self.ports[slot] = array(
+            "Q",
+            (
+                packPort(
+                    port["port"],
+                    PROTOCOLS.index(port.get("protocol") or "tcp"),
+                    portState(port.get("state")),
+                    self.internService(port.get("service")),
+                    self.intern(port.get("version")),
+                )
+                for port in record.get("ports", [])
+            ),
+        )
+        self.scans[slot] = array(
+            "I",
+            (self.internCall(scan) for scan in record.get("scans_performed", [])),
+        )
+
+        return slot
+
+    def hostRecord(self, slot: int) -> Dict[str, Any]:
+        ports = []
+        for record in self.ports.get(slot, ()):
+            port, protocol, state, service, version = unpackPort(record)
+            ports.append(
+                {
+                    "port": port,
+                    "protocol": PROTOCOLS[protocol],
+                    "state": PORT_STATES[state],
+                    "service": self.serviceName(service),
+                    "version": self.text(version),
+                }
+            )
+
+        return {
+            "ip": self.ipAt(slot),
+            "status": STATUSES[self.status[slot]],
+            "os_guess": self.text(self.os[slot]),
+            "ports": ports,
+            "scans_performed": [json.loads(self.calls[c]) for c in self.scans.get(slot, ())],
+        }
+
+    # ---------------- serialization ---------------- #
+
+    def dump(self) -> compactHosts:
+        portOffsets, ports = flatten(self.ports, len(self.ips), "Q")
+        scanOffsets, scans = flatten(self.scans, len(self.ips), "I")
+
+        return compactHosts(
+            ips=self.ips.tobytes(),
+            status=bytes(self.status),
+            os=self.os.tobytes(),
+            port_offsets=portOffsets.tobytes(),
+            ports=ports.tobytes(),
+            scan_offsets=scanOffsets.tobytes(),
+            scans=scans.tobytes(),
+            strings=list(self.strings),
+            services=list(self.services),
+            calls=list(self.calls),
+        )
+
+    @classmethod
+    def load(cls, data: Optional[compactHosts]) -> "hostStore":
+        store = cls()
+        if data is None or not data.ips:
+            return store
+
+        store.ips.frombytes(data.ips)
+        store.status = bytearray(data.status)
+        store.os.frombytes(data.os)
+        store.ports = unflatten(data.port_offsets, data.ports, "Q")
+        store.scans = unflatten(data.scan_offsets, data.scans, "I")
+
+        store.strings = list(data.strings)
+        store._stringIds = {text: i for i, text in enumerate(store.strings)}
+        store.services = list(data.services)
+        store._serviceIds = {text: i for i, text in enumerate(store.services)}
+        store.calls = list(data.calls)
+        store._callIds = {text: i for i, text in enumerate(store.calls)}
+        store._slots = {address: slot for slot, address in enumerate(store.ips)}
+
+        return store
+
+    # ---------------- live stores ---------------- #
+
+    def handle(self) -> compactHosts:
+        """Graph state value for this store; the store stays registered until release."""
+        with _liveLock:
+            _liveStores[self.storeId] = self
+
+        runStores = _runStores.get()
+        if runStores is not None:
+            runStores.add(self.storeId)
+        return compactHosts(store_id=self.storeId)
+
+    @classmethod
+    def live(cls, data: Optional[compactHosts]) -> "hostStore":
+        # the registered store behind a handle, or a store decoded from the dumped form
+        if data is not None and data.store_id:
+            with _liveLock:
+                store = _liveStores.get(data.store_id)
+            if store is None:
+                raise KeyError(f"host store {data.store_id} is not loaded in this process")
+            return store
+
+        return cls.load(data)
+
+    def release(self):
+        with _liveLock:
+            _liveStores.pop(self.storeId, None)
+
+
+# ------------------------------------------------------------------------------- #
+#                                  Helper functions                               #
+# ------------------------------------------------------------------------------- #
+
+
+def trackStores() -> set:
+    # every store registered from this context from now on is added to the returned set
+    runStores = set()
+    _runStores.set(runStores)
+    return runStores
+
+
+def releaseStores(storeIds):
+    with _liveLock:
+        for storeId in storeIds:
+            _liveStores.pop(storeId, None)
+
+
+def internText(table: List[str], ids: Dict[str, int], text: Optional[str]) -> int:
+    if not text:
+        return 0
+
+    stringId = ids.get(text)
+    if stringId is None:
+        stringId = len(table)
+        table.append(text)
+        ids[text] = stringId
+
+    return stringId
+
+
+def portState(state: Optional[str]) -> int:
+    if state in PORT_STATES:
+        return PORT_STATES.index(state)
+    return PORT_STATES.index("unknown")
+
+
+def flatten(perSlot: Dict[int, array], slots: int, typecode: str):
+    offsets, flat = array("I", [0]), array(typecode)
+    for slot in range(slots):
+        flat.extend(perSlot.get(slot, ()))
+        offsets.append(len(flat))
+    return offsets, flat
+
+
+def unflatten(offsetBytes: bytes, flatBytes: bytes, typecode: str) -> Dict[int, array]:
+    offsets, flat = array("I"), array(typecode)
+    offsets.frombytes(offsetBytes)
+    flat.frombytes(flatBytes)
+
+    return {
+        slot: flat[offsets[slot] : offsets[slot + 1]]
+        for slot in range(len(offsets) - 1)
+        if offsets[slot + 1] > offsets[slot]
+    }
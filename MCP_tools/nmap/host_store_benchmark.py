@@ -0,0 +1,132 @@
+# Host representation benchmark.
+#
+# Builds N synthetic hosts (a handful of ports and two performed scans each, like a
+# discovery + service scan of a large range) twice:
+#
+#   pydantic: Dict[str, hostMemory] as the nmap agent kept it in the graph state
+#   compact:  hostStore / compactHosts (host_store.py)
+#
+# and compares allocated memory, the cost of copying the state (what LangGraph does on
+# every checkpoint) and the serialized size.
+#
+# Run with: penagent bench-hosts [--hosts N]
+
+import pickle
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from MCP_tools.nmap.host_store import hostStore
+
+SERVICES = [
+    ("ssh", "OpenSSH 8.9p1"),
+    ("http", "nginx 1.24.0"),
+    ("https", "nginx 1.24.0"),
+    ("mysql", "MySQL 8.0.36"),
+    ("smb", None),
+]
+PORTS = [22, 80, 443, 3306, 445]
+
+
+def sampleRecords(hosts: int) -> List[Dict[str, Any]]:
+    records = []
+    for index in range(hosts):
+        ip = f"10.{(index >> 16) & 0xFF}.{(index >> 8) & 0xFF}.{index & 0xFF}"
+        count = 1 + index % len(PORTS)
+        records.append(
+            {
+                "ip": ip,
+                "status": "alive",
+                "os_guess": "Linux 5.x" if index % 3 else None,
+                "ports": [
+                    {
+                        "port": PORTS[i],
+                        "protocol": "tcp",
+                        "state": "open",
+                        "service": SERVICES[i][0],
+                        "version": SERVICES[i][1],
+                    }
+                    for i in range(count)
+                ],
+                "scans_performed": [
+                    {"target": ip, "scan_type": "-sS", "ports": "1-1000", "additional_args": "-T4"},
+                    {"target": ip, "scan_type": "-sV", "ports": "", "additional_args": ""},
+                ],
+            }
+        )
+    return records
+
+
+def buildPydantic(records: List[Dict[str, Any]]):
+    from MCP_tools.nmap.nmap_agent_ollamaV2 import memoryFromRecord
+
+    return {record["ip"]: memoryFromRecord(record) for record in records}
+
+
+def buildCompact(records: List[Dict[str, Any]]):
+    store = hostStore()
+    for record in records:
+        store.putRecord(record)
+    return store.dump()
+
+
+def measure(build: Callable, records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    value = build(records)
+    buildSeconds = time.perf_counter() - start
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # model_copy(deep=True) on the state is a deepcopy of everything in it
+    start = time.perf_counter()
+    copied = (
+        {ip: memory.model_copy(deep=True) for ip, memory in value.items()}
+        if isinstance(value, dict)
+        else value.model_copy(deep=True)
+    )
+    copySeconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    payload = pickle.dumps(copied)
+    serializeSeconds = time.perf_counter() - start
+
+    return {
+        "memory_mb": round(allocated / 2**20, 2),
+        "build_ms": round(buildSeconds * 1000, 1),
+        "copy_ms": round(copySeconds * 1000, 1),
+        "serialize_ms": round(serializeSeconds * 1000, 1),
+        "serialized_mb": round(len(payload) / 2**20, 2),
+    }
+
+
+def benchmarkHosts(hosts: int = 10000) -> Dict[str, Any]:
+    records = sampleRecords(hosts)
+
+    results = {"hosts": hosts}
+    for name, build in [("pydantic", buildPydantic), ("compact", buildCompact)]:
+        results[name] = measure(build, records)
+        results[name]["memory_mb_per_10k"] = round(
+            results[name]["memory_mb"] * 10000 / max(hosts, 1), 2
+        )
+
+    return results
+
+
+def printReport(results: Dict[str, Any]):
+    print(f"Hosts: {results['hosts']}\n")
+    print(
+        f"{'layout':<10}{'memory MB':>11}{'MB/10k':>9}{'build ms':>10}{'copy ms':>9}"
+        f"{'pickle ms':>11}{'pickle MB':>11}"
+    )
+
+    for name in ["pydantic", "compact"]:
+        row = results[name]
+        print(
+            f"{name:<10}{row['memory_mb']:>11}{row['memory_mb_per_10k']:>9}{row['build_ms']:>10}"
+            f"{row['copy_ms']:>9}{row['serialize_ms']:>11}{row['serialized_mb']:>11}"
+        )
+
+
+if __name__ == "__main__":
+    printReport(benchmarkHosts())
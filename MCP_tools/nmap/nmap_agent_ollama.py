@@ -1,9 +1,9 @@
 import os
 from dotenv import load_dotenv
-from langchain_ollama import ChatOllama
 import json
 import re
 import asyncio
+from functools import lru_cache
 from typing import Dict, Any, List
 from pydantic import Field, BaseModel
 from langchain.messages import SystemMessage, ToolCall, ToolMessage, HumanMessage
@@ -16,22 +16,21 @@ try:
 except Exception:
     from MCP_tools.nmap.nmap_tool import nmap_scan, returnToolCall
 
+from LLM_tools.llm_factory import getLLM, warmModel
+from LLM_tools.llm_calls import invokeBound
+from LLM_tools.llm_metrics import startRun, summaryTable
+
 
 load_dotenv()
 # -------------------------------------------------------------------------------#
 #                                  LLM setup                                     #
 # -------------------------------------------------------------------------------#
 
-LM_API = os.getenv(key="OLLAMA_API", default="http://127.0.0.1:11434")
 
-llm = ChatOllama(
-    model="huihui_ai/qwen3-abliterated:8b",
-    base_url=LM_API,
-    temperature=0.2,
-    format=None,
-)
+@lru_cache(maxsize=None)
+def getAgent():
+    return getLLM().bind_tools([nmap_scan])
 
-finalAgent = llm.bind_tools([nmap_scan])
 
 # -------------------------------------------------------------------------------#
 #                                  Agent setup                                   #
@@ -188,8 +187,10 @@ async def callModel(
     )
     print("============================================\n\n")
 
-    return await finalAgent.ainvoke(
-        [SystemMessage(content=context), SystemMessage(content=customMessage)],
+    return await invokeBound(
+        node="nmap_v1.call_model",
+        runnable=getAgent(),
+        messages=[SystemMessage(content=context), SystemMessage(content=customMessage)],
         config={"recursion_limit": 40},
     )
 
@@ -339,6 +340,8 @@ async def runner(message):
 
 
 async def agentRunner(message):
+    startRun(name="nmap_v1")
+    await asyncio.to_thread(warmModel)
 
     response = await agent.ainvoke(input=message, config={"recursion_limit": 40})
 
@@ -391,3 +394,4 @@ if __name__ == "__main__":
         message = [HumanMessage(content=supervisorInput)]
 
         asyncio.run(agentRunner(message=message))
+        print(summaryTable())
@@ -1,40 +1,208 @@
 from langgraph.graph import StateGraph, START, END
 from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Set
 import asyncio
 import os
 from dotenv import load_dotenv
-from langchain_ollama import ChatOllama
 from langgraph.checkpoint.memory import InMemorySaver
 import logging
 from pathlib import Path
 import re
+import time
 
 load_dotenv()
 
-from MCP_tools.nmap.nmap_toolV2 import nmap_scan, nmapInput
+from MCP_tools.nmap.nmap_toolV2 import nmap_scan, nmap_scan_stream, nmapInput
+from MCP_tools.nmap.host_store import hostStore, compactHosts, releaseStores, trackStores
+from MCP_tools.nmap.host_db import getHostDB
+from MCP_tools.argument_catalog import NMAP_CATALOG, getCatalog, validateNmapCall
+from MCP_tools.nmap.scan_dedup import reduceScan, scannedPorts, dedupReport, resetDedupStats
+from MCP_tools.nmap.scan_batcher import (
+    BATCH_MAX_TARGETS,
+    scanBatcher,
+    batcherReport,
+    resetBatcherStats,
+)
+from LLM_tools.llm_factory import warmModel
+from LLM_tools.llm_calls import (
+    invokeStructured,
+    invokeText,
+    structuredReport,
+    NO_THINKING,
+)
+from LLM_tools.model_router import latencyReport
+from LLM_tools.llm_scheduler import schedulerReport
+from LLM_tools.llm_metrics import startRun, summaryTable
+from LLM_tools.context_compaction import compactNmapOutput, compactState
+from LLM_tools.fast_paths import (
+    nmapEvaluation,
+    recordDecision,
+    fastPathReport,
+    resetFastPathStats,
+)
+from LLM_tools.prompt_layout import layoutPrompt
+from LLM_tools.speculation import getSpeculator, speculationReport
+from LLM_tools.batch_planning import PLAN_BATCH_SIZE, planBatch, batchReport
+from LLM_tools.graph_render import renderGraph
+from LLM_tools.agent_logging import setupLogging
+from LLM_tools.artifact_store import loadOutput, storeOutput
 
 # ------------------------------------------------------------------------------- #
-#                                  LLM setup                                      #
+#                                       Config                                    #
 # ------------------------------------------------------------------------------- #
 
-LM_API = os.getenv(key="OLLAMA_API", default="http://127.0.0.1:11434")
+logDir = Path("MCP_tools/nmap/logs")
+
+# hosts scanned at the same time after discovery, 1 walks them one by one
+MAX_PARALLEL_HOSTS = int(os.getenv(key="NMAP_MAX_PARALLEL_HOSTS", default="4"))
 
-llm = ChatOllama(
-    model="huihui_ai/qwen3-abliterated:8b",
-    base_url=LM_API,
-    temperature=0.2,
-    format=None,
+# start host scans while the discovery sweep is still running (parallel mode only)
+STREAM_DISCOVERY = os.getenv(key="NMAP_STREAM_DISCOVERY", default="1").lower() in (
+    "1",
+    "true",
+    "yes",
 )
 
-finalAgent = llm.bind_tools([nmap_scan])
+# streamed hosts wait this long for others to be planned with (LLM_PLAN_BATCH_SIZE > 1)
+PLAN_BATCH_WINDOW = int(os.getenv(key="NMAP_PLAN_BATCH_WINDOW_MS", default="500")) / 1000
 
-logDir = Path("MCP_tools/nmap/logs")
-logCount = 0
+# "Nmap scan report for 10.0.0.5" or "Nmap scan report for name.lan (10.0.0.5)"
+HOST_REPORT = re.compile(r"Nmap scan report for (?:\S+ \()?(\d+\.\d+\.\d+\.\d+)\)?")
+
+# "22/tcp open ssh OpenSSH 8.9p1", "53/udp open|filtered domain"
+PORT_LINE = re.compile(r"(\d+)/(tcp|udp|sctp)\s+(\S+)\s+(\S+)?\s*(.*)")
+
+_agentGraph = None
+_hostGraph = None
+_hostPipeline = None
+
+# ------------------------------------------------------------------------------- #
+#                                      Prompts                                    #
+# ------------------------------------------------------------------------------- #
+
+# static prompt prefixes - dynamic state is appended after them by layoutPrompt so
+# Ollama can reuse the cached prefix between calls
+
+PLANNING_PROMPT = """
+You are an autonomous nmap agent.
+
+Create a scan plan for the target host given in the current context.
+
+Steps must include:
+1. port scan
+2. service detection
+
+IMPORTANT:
+You are working on ONLY the given IP address.
+Do NOT consider any other addresses.
+If a replan warning is present, the previous plan failed - take the reason into account.
+
+For each step return JSON:
+- description
+- target
+- scan_type
+"""
+
+BATCH_PLANNING_PROMPT = """
+You are an autonomous nmap agent.
+
+Create a separate scan plan for EVERY target host listed in the current context.
+
+Steps of every plan must include:
+1. port scan
+2. service detection
 
-for log in os.listdir(logDir):
-    if os.path.isfile(os.path.join(logDir, log)):
-        logCount += 1
+IMPORTANT:
+Each plan works on ONLY its own IP address - use it as the target of its steps.
+Return exactly one plan per listed host.
+
+Return JSON:
+- plans: list of
+    - ip
+    - reasoning
+    - steps: list of
+        - description
+        - target
+        - scan_type
+"""
+
+DISCOVERY_PROMPT = """
+You are an autonomous nmap agent.
+
+First you must perform a host discovery phase for the objective given in the current context.
+
+Decide:
+    - which options are appropriate
+    - explain reasoning
+
+Return ONLY JSON in the following format:
+{
+    "target": "<IP address, hostname or CIDR>",
+    "scan_type": "<List of nmap scan arguments (ex. -sS -sV)>",
+    "ports": "<Comma-separated ports or ranges, empty if host discovery>",
+    "additional_args": "<Any additional nmap arguments if needed>",
+    "reasoning": "<Your reasoning for this tool call>"
+}
+
+Example output:
+{
+    "target": "192.168.157.0/24",
+    "scan_type": "-sn",
+    "ports": "",
+    "additional_args": "",
+    "reasoning": "Performing host discovery to find live hosts in the subnet."
+}
+"""
+
+TOOL_CALL_PROMPT = """
+You are an autonomous nmap agent executing one step of a scan plan.
+
+Decide:
+- which tool call and options are appropriate
+- explain with reasoning
+
+Return ONLY JSON in the following format:
+{
+    "target": "<IP address, hostname or CIDR>",
+    "scan_type": "<List of nmap scan arguments (ex. -sS -sV)>",
+    "ports": "<Comma-separated ports or ranges, empty if host discovery>",
+    "additional_args": "<Any additional nmap arguments if needed>",
+    "reasoning": "<Your reasoning for this tool call>"
+}
+
+Example output:
+{
+    "target": "192.168.157.0/24",
+    "scan_type": "-sn",
+    "ports": "",
+    "additional_args": "",
+    "reasoning": "Performing host discovery to find live hosts in the subnet."
+}
+"""
+
+EVALUATE_PROMPT = """
+You are a professional evaluater agent.
+Your task is to analyze the results listed in the current context and give feedback.
+
+Decide confidence value based on a tool call performed and coresponding result.
+
+Return valid json in the following form:
+- confidence <a number between 0.0 and 1.0>
+- reasoning
+"""
+
+FAILURE_SUMMARY_PROMPT = """
+You failed at performing your task.
+Create a concise summary why that happened based on the facts listed in the current context.
+
+NO markdown, NO emojis.
+"""
+
+SUMMARY_PROMPT = """
+Create a concise summary based on the given initial objective and gathered infromation.
+
+NO markdown, NO emojis.
+"""
 
 # ------------------------------------------------------------------------------- #
 #                                 Custom agent state                              #
@@ -56,6 +224,20 @@ class nmapOutputPlan(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
 
+class nmapHostPlan(BaseModel):
+    ip: str = Field(default="")
+    reasoning: str = Field(default="")
+    steps: List[nmapPlanStep] = Field(default_factory=list)
+
+    model_config = ConfigDict(extra="forbid")
+
+
+class nmapBatchPlan(BaseModel):
+    plans: List[nmapHostPlan] = Field(default_factory=list)
+
+    model_config = ConfigDict(extra="forbid")
+
+
 class agentFeedback(BaseModel):
     confidence: float = Field(default=0.0)
     reasoning: str = Field(default="")
@@ -74,6 +256,7 @@ class nmapToolCall(BaseModel):
 
 class portInfo(BaseModel):
     port: Optional[int] = Field(default=None)
+    protocol: str = Field(default="tcp")
     service: Optional[str] = Field(default=None)
     version: Optional[str] = Field(default=None)
     state: str = Field(default="")
@@ -81,6 +264,7 @@ class portInfo(BaseModel):
 
 class hostDiscovery(BaseModel):
     currentToolCall: Optional[nmapToolCall] = Field(default=None)
+    # raw output as an artifact_store reference, see storeOutput
     last_tool_output: Optional[Any] = Field(default=None)
 
     replan_reason: Optional[str] = Field(default=None)
@@ -95,17 +279,34 @@ class hostMemory(BaseModel):
     ip: str = Field(default="")
     status: str = Field(default="unknown")
 
-    open_ports: List[portInfo] = Field(default_factory=list)
-    services_found: List[str] = Field(default_factory=list)
+    # every reported port keyed by "<port>/<protocol>", merged in place by mergePorts
+    port_index: Dict[str, portInfo] = Field(default_factory=dict)
+    service_index: Dict[str, List[str]] = Field(
+        default_factory=dict, description="Service name -> port keys running it."
+    )
+    port_history: List[Dict[str, Any]] = Field(
+        default_factory=list, description="Port field changes with the scan that caused them."
+    )
     os_guess: Optional[str] = Field(default=None)
     scans_performed: List[Dict[str, Any]] = Field(
         default_factory=list, description="History of tool calls for a specific host."
     )
+    # ports and scans the host started with (host database), see unconfirmedPorts
+    seeded_scans: int = Field(
+        default=0, description="Leading scans_performed entries taken over from earlier runs."
+    )
+    seen_ports: List[str] = Field(
+        default_factory=list, description="Port keys reported by a scan of this run."
+    )
     currentToolCall: Optional[nmapToolCall] = Field(default=None)
+    # raw output as an artifact_store reference, see storeOutput
     last_tool_output: Optional[Dict[str, Any]] = Field(default=None)
 
     plan: Optional[List[nmapPlanStep]] = Field(default=None)
     step_index: int = Field(default=0)
+    batch_planned: bool = Field(
+        default=False, description="Host was already part of a batch planning request."
+    )
 
     feedback: Optional[agentFeedback] = Field(default=None)
 
@@ -116,6 +317,10 @@ class hostMemory(BaseModel):
     replan_flag: bool = Field(default=False)
     done: bool = Field(default=False)
 
+    @property
+    def open_ports(self) -> List[portInfo]:
+        return [port for port in self.port_index.values() if port.state == "open"]
+
 
 class nmapAgentState(BaseModel):
     objective: str = Field(
@@ -129,7 +334,13 @@ class nmapAgentState(BaseModel):
     )
 
     host_index: int = Field(default=0)
-    host_memory: Dict[str, hostMemory] = Field(default_factory=dict)
+    host_memory: Dict[str, hostMemory] = Field(
+        default_factory=dict, description="Hosts that are being worked on right now."
+    )
+    host_store: compactHosts = Field(
+        default_factory=compactHosts,
+        description="Every discovered host in compact form (see host_store.py).",
+    )
 
     decision: Optional[str] = Field(default=None)
 
@@ -144,6 +355,117 @@ class nmapAgentState(BaseModel):
     done: bool = Field(default=False)
 
 
+# ------------------------------------------------------------------------------- #
+#                                  Host pipeline                                  #
+# ------------------------------------------------------------------------------- #
+
+
+class hostPipeline:
+    """Per-host graph runs, each started as soon as its host is known."""
+
+    def __init__(self, objective: str, maxIteration: int, maxParallel: int = MAX_PARALLEL_HOSTS):
+        self.objective = objective
+        self.maxIteration = maxIteration
+        self.limit = asyncio.Semaphore(maxParallel)
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.created = time.perf_counter()
+
+        # hosts that want the same scan at the same time share one nmap run; more than
+        # maxParallel hosts are never scanning at once, so a batch of that size is full
+        self.batcher = scanBatcher(scan=nmap_scan, maxTargets=min(BATCH_MAX_TARGETS, maxParallel))
+
+        # hosts waiting for a batch plan, each run starts once its batch was planned
+        self._unplanned: List[hostMemory] = []
+        self._planned: Dict[str, asyncio.Future] = {}
+        self._planning = set()
+        self._flushPending = False
+
+    def start(self, memory: hostMemory):
+        if memory.ip in self.tasks:
+            return
+
+        # the run works on its own copy, results are merged back by scanHostsNode
+        memory = memory.model_copy(deep=True)
+        if PLAN_BATCH_SIZE > 1 and not memory.plan and not memory.batch_planned:
+            self.queuePlan(memory)
+
+        hostState = nmapAgentState(
+            objective=self.objective,
+            host_discovery=hostDiscovery(done=True),
+            discovered_hosts=[memory.ip],
+            host_memory={memory.ip: memory},
+            max_iteration=self.maxIteration,
+        )
+        self.tasks[memory.ip] = asyncio.create_task(self.scanHost(memory.ip, hostState))
+
+    def queuePlan(self, memory: hostMemory):
+        # a full batch is planned right away, a partial one after PLAN_BATCH_WINDOW
+        self._unplanned.append(memory)
+        self._planned[memory.ip] = asyncio.get_running_loop().create_future()
+
+        if len(self._unplanned) >= PLAN_BATCH_SIZE:
+            self.spawn(self.planPending())
+        elif not self._flushPending:
+            self._flushPending = True
+            self.spawn(self.planLater())
+
+    def spawn(self, coroutine):
+        # the loop only keeps weak references to tasks
+        task = asyncio.create_task(coroutine)
+        self._planning.add(task)
+        task.add_done_callback(self._planning.discard)
+
+    async def planLater(self):
+        await asyncio.sleep(PLAN_BATCH_WINDOW)
+        self._flushPending = False
+        await self.planPending()
+
+    async def planPending(self):
+        batch = self._unplanned[:PLAN_BATCH_SIZE]
+        del self._unplanned[:PLAN_BATCH_SIZE]
+
+        try:
+            # a single host is planned by its own run, as without batching
+            if len(batch) > 1:
+                await planHosts(objective=self.objective, batch=batch)
+        finally:
+            for memory in batch:
+                future = self._planned.pop(memory.ip)
+                if not future.done():
+                    future.set_result(None)
+
+    async def scanHost(self, ip: str, hostState: nmapAgentState) -> nmapAgentState:
+        # planning does not need a Kali slot, so it happens before the host queues for one
+        if ip in self._planned:
+            await self._planned[ip]
+
+        async with self.limit:
+            start = time.perf_counter()
+            logData(
+                message=f"[SCAN HOSTS] -> starting host {ip} "
+                f"({start - self.created:.1f}s after discovery started)"
+            )
+            try:
+                result = await getHostGraph().ainvoke(
+                    hostState.model_dump(), config={"recursion_limit": 1000}
+                )
+            except Exception as e:
+                # one broken host must not abort the sweep, it is reported as failed
+                logData(message=f"[SCAN HOSTS] -> host {ip} failed: {e!r}")
+                hostState.fail = True
+                hostState.fail_reason = f"Host run raised {e!r}"
+                return hostState
+
+            logData(
+                message=f"[SCAN HOSTS] -> host {ip} done in {time.perf_counter() - start:.1f}s"
+            )
+            return nmapAgentState.model_validate(result)
+
+    async def results(self) -> Dict[str, nmapAgentState]:
+        states = await asyncio.gather(*self.tasks.values())
+        return dict(zip(self.tasks, states))
+
+
 # ------------------------------------------------------------------------------- #
 #                                 Agent nodes                                     #
 # ------------------------------------------------------------------------------- #
@@ -164,90 +486,65 @@ async def planningNode(state: nmapAgentState):
         logData(message="[PLANNING NODE] -> exit node: returning to tool call.")
         return {"decision": "continue"}
 
-    if currentMemory.replan_flag:
-        additionalPrompt = f"""
-        [WARNING]
-        
-        You must replan your actions for host {currentMemory.ip}
-        
-        Replan reason: {currentMemory.replan_reason if currentMemory.replan_reason else ""}
-        Last tool output:
-        {currentMemory.last_tool_output if currentMemory.last_tool_output else ""}
-        
-        Feedback:
-        {currentMemory.feedback if currentMemory.feedback else ""}
-        
-        [ORIGINAL TASK]\n\n
-        """
-
-    prompt = f"""
-    You are an autonomous nmap agent.
-    
-    Objective:
-    {state.objective}
-    
-    Target host - known facts:
-    IP: {currentMemory.ip}
-    Status: {currentMemory.status}
-    
-    Create a scan plan.
-
-    Steps must include:
-    1. port scan
-    2. service detection
-    
-    IMPORTANT:
-    You are working on ONLY this IP address.
-    Do NOT consider any other addresses.
-    
-    For each step return JSON:
-    - description
-    - target
-    - scan_type
-    """
-
-    retries = 2
+    # one request for this host and the next unplanned ones, leftovers are planned alone
+    if PLAN_BATCH_SIZE > 1 and not currentMemory.replan_flag and not currentMemory.plan:
+        if await planHostBatch(state=state, current=currentMemory.ip):
+            logData(message="[PLANNING NODE] -> exit node: plan created in batch")
+            return {
+                "host_memory": state.host_memory,
+                "decision": "continue",
+            }
 
-    finalPrompt = additionalPrompt + prompt if currentMemory.replan_flag else prompt
+    finalPrompt = planningPrompt(state=state, memory=currentMemory)
 
     if currentMemory.replan_flag:
         currentMemory.replan_flag = False
         currentMemory.replan_reason = ""
 
-    for attempt in range(retries):
+    # generation is schema constrained, invalid output is retried inside invokeStructured
+    try:
+        # plan (and first tool call) prepared while the previous host was being scanned
+        speculative = await getSpeculator().take(
+            slot=f"nmap.plan:{currentMemory.ip}", key=finalPrompt
+        )
 
-        try:
-            outputPlan = await llm.with_structured_output(nmapOutputPlan).ainvoke(
-                finalPrompt
+        if speculative:
+            outputPlan, toolPrompt, toolCall = speculative
+            if toolCall:
+                getSpeculator().offer(
+                    slot=f"nmap.tool_call:{currentMemory.ip}", key=toolPrompt, value=toolCall
+                )
+        else:
+            outputPlan = await invokeStructured(
+                node="nmap.planning_node", prompt=finalPrompt, schema=nmapOutputPlan
             )
-            logData(message=f"[PLANNING NODE] -> created new plan: {outputPlan}")
-            currentMemory.plan = outputPlan.steps
-            currentMemory.step_index = 0
-            logData(message=f"[PLANNING NODE -> exit node")
-            return {
-                "host_memory": state.host_memory,
-                "decision": "continue",
-            }
+        logData(message=f"[PLANNING NODE] -> created new plan: {outputPlan}")
+        currentMemory.plan = outputPlan.steps
+        currentMemory.step_index = 0
+        logData(message=f"[PLANNING NODE -> exit node")
+        return {
+            "host_memory": state.host_memory,
+            "decision": "continue",
+        }
 
-        except Exception as e:
-            logData(f"Planning JSON parse failed attempt {attempt+1}")
-            finalPrompt += "\n\nWARNING: Your previous output was not valid JSON. Return ONLY raw JSON. No explanations."
+    except Exception as e:
+        planningError = e
 
     logData(
-        message=f"[WARNING] -> Planning failed after {retries} retries -> moving to output node"
+        message=f"[WARNING] -> Planning failed ({planningError}) -> moving to output node"
     )
     currentMemory.plan = []
     currentMemory.step_index = 0
 
     state.fail = True
     state.fail_reason = f"""
-    Planning failed after {retries} retries
+    Planning failed: {planningError}
     
     Final task before failure:
     {finalPrompt}
     
     Last tool output:
-    {currentMemory.last_tool_output if currentMemory.last_tool_output else ""}
+    {compactNmapOutput(currentMemory.last_tool_output)}
     """
 
     return {
@@ -261,73 +558,32 @@ async def planningNode(state: nmapAgentState):
 async def selectToolCall(state: nmapAgentState):
     logData(message="[TOOL CALL NODE] -> enter node")
 
-    # TODO: add allowed arguments
-    with open("MCP_tools/nmap/nmap_allowed_arguments.json") as f:
-        allowedArguments = f.read()
-
     # check host discovery
     hostDiscovery = state.host_discovery
     if not hostDiscovery.done:
 
-        prompt = f"""
-        You are an autonomous nmap agent.
-        
-        Your current objective:
-        {state.objective}
-        
-        First you must perform a host discovery phase.
-        
-        Available nmap options for host discovery:
-        {allowedArguments}
-        
-        Decide:
-            - which options are appropriate
-            - explain reasoning
-            
-        Return ONLY JSON in the following format:
-        {{
-            "target": "<IP address, hostname or CIDR>",
-            "scan_type": "<List of nmap scan arguments (ex. -sS -sV)>",
-            "ports": "<Comma-separated ports or ranges, empty if host discovery>",
-            "additional_args": "<Any additional nmap arguments if needed>",
-            "reasoning": "<Your reasoning for this tool call>"
-        }}
-        
-        Example output:
-        {{
-            "target": "192.168.157.0/24",
-            "scan_type": "-sn",
-            "ports": "",
-            "additional_args": "",
-            "reasoning": "Performing host discovery to find live hosts in the subnet."
-        }}
-        """
-
-        # Return valid json in the following form:
-        # - target <IP address, hostname or CIDR>
-        # - scan_type <List of nmap scan arguments (ex. -sS -sV)>
-        # - ports (!FOR HOST DISCOVERY LEAVE EMPTY!)
-        # - additional_args (!FOR HOST DISCOVERY LEAVE EMPTY!)
-
-        finalPrompt = prompt
+        context = {"Objective": state.objective}
 
         if hostDiscovery.replan_flag:
-            additionalPrompt = f"""
-            [WARNING]
-            
-            You must replan your tool call.
-            
-            Replan reason: {hostDiscovery.replan_reason if hostDiscovery.replan_reason else ""}
-            Last tool output:
-            {hostDiscovery.last_tool_output if hostDiscovery.last_tool_output else ""}
-            
-            [ORIGINAL TASK]\n\n
-            """
-            finalPrompt = additionalPrompt + prompt
+            context["Replan warning"] = (
+                "You must replan your tool call.\n"
+                f"Replan reason: {hostDiscovery.replan_reason or ''}"
+            )
+            context["Last tool output"] = compactNmapOutput(hostDiscovery.last_tool_output)
             hostDiscovery.replan_flag = False
             hostDiscovery.replan_reason = ""
 
-        toolCall = await llm.with_structured_output(nmapToolCall).ainvoke(finalPrompt)
+        finalPrompt = layoutPrompt(
+            static=[
+                DISCOVERY_PROMPT,
+                f"Available nmap options for host discovery:\n{readAllowedArguments()}",
+            ],
+            dynamic=context,
+        )
+
+        toolCall = await invokeStructured(
+            node="nmap.tool_call_node", prompt=finalPrompt, schema=nmapToolCall
+        )
         logData(
             message=f"[SELECT TOOL CALL] -> reasoning for current tool call: {toolCall.reasoning}"
         )
@@ -353,57 +609,15 @@ async def selectToolCall(state: nmapAgentState):
             "host_memory": state.host_memory,
         }
 
-    planStep = currentHostMemory.plan[currentHostMemory.step_index]
-
-    prompt = f"""
-    Current host - known facts:
-    IP: {currentHostMemory.ip}
-    Status: {currentHostMemory.status}
-    Open ports: {currentHostMemory.open_ports if currentHostMemory.open_ports else "None."}
-    Services discovered: {currentHostMemory.services_found if currentHostMemory.services_found else "None."}
-    OS guess: {currentHostMemory.os_guess if currentHostMemory.os_guess else "None."}
-    
-    Current plan step:
-    Description: {planStep.description}
-    Proposed scan type: {planStep.scan_type}
-    
-    Already performed tool calls:
-    {currentHostMemory.scans_performed}
-    
-    Last tool output:
-    {currentHostMemory.last_tool_output}
-    
-    Available nmap options:
-    {allowedArguments}
-    
-    Last feedback:
-    {currentHostMemory.feedback if currentHostMemory.feedback else ""}
-    
-    Decide:
-    - which tool call and options are appropriate
-    - explain with reasoning
-    
-
-    Return ONLY JSON in the following format:
-    {{
-        "target": "<IP address, hostname or CIDR>",
-        "scan_type": "<List of nmap scan arguments (ex. -sS -sV)>",
-        "ports": "<Comma-separated ports or ranges, empty if host discovery>",
-        "additional_args": "<Any additional nmap arguments if needed>",
-        "reasoning": "<Your reasoning for this tool call>"
-    }}
-        
-    Example output:
-    {{
-        "target": "192.168.157.0/24",
-        "scan_type": "-sn",
-        "ports": "",
-        "additional_args": "",
-        "reasoning": "Performing host discovery to find live hosts in the subnet."
-    }}
-    """
+    prompt = toolCallPrompt(memory=currentHostMemory)
 
-    toolCall = await llm.with_structured_output(nmapToolCall).ainvoke(prompt)
+    toolCall = await getSpeculator().take(
+        slot=f"nmap.tool_call:{currentHostMemory.ip}", key=prompt
+    )
+    if toolCall is None:
+        toolCall = await invokeStructured(
+            node="nmap.tool_call_node", prompt=prompt, schema=nmapToolCall
+        )
     currentHostMemory.currentToolCall = toolCall
 
     logData(
@@ -423,23 +637,30 @@ async def toolExecuteNode(state: nmapAgentState):
     hostDiscovery = state.host_discovery
 
     if not hostDiscovery.done:
-        hostDiscoveryToolCall = hostDiscovery.currentToolCall
+        scanCall, errors = validateNmapCall(
+            hostDiscovery.currentToolCall.model_dump(exclude={"reasoning"})
+        )
+        if errors:
+            hostDiscovery.last_tool_output = rejectedCall(errors)
+            logData(message=f"[EXECUTE TOOL] -> exit node - discovery call rejected: {errors}")
+            return {
+                "decision": "continue",
+                "host_discovery": state.host_discovery,
+            }
+
+        scanInput = nmapInput(**scanCall)
         try:
-            rawOutput = await nmap_scan(
-                nmapInput(
-                    target=hostDiscoveryToolCall.target,
-                    scan_type=hostDiscoveryToolCall.scan_type,
-                    ports=hostDiscoveryToolCall.ports,
-                    additional_args=hostDiscoveryToolCall.additional_args,
-                )
-            )
+            if STREAM_DISCOVERY and MAX_PARALLEL_HOSTS > 1:
+                rawOutput = await streamDiscovery(state=state, scanInput=scanInput)
+            else:
+                rawOutput = await nmap_scan(scanInput)
         except Exception as e:
             rawOutput = {"stdout": "", "stderr": str(e), "success": False}
 
         if isinstance(rawOutput, tuple):
             rawOutput = rawOutput[1]["result"]
 
-        hostDiscovery.last_tool_output = rawOutput
+        hostDiscovery.last_tool_output = storeOutput(rawOutput)
         logData(message="[EXECUTE TOOL] -> exit node - discovery done")
         return {
             "decision": "continue",
@@ -449,15 +670,43 @@ async def toolExecuteNode(state: nmapAgentState):
     currentMemory = getCurrentHost(state=state)
     currentToolCall = currentMemory.currentToolCall
 
+    # calls outside the allowed arguments are rejected here instead of failing on Kali
+    scanCall, errors = validateNmapCall(currentToolCall.model_dump(exclude={"reasoning"}))
+    if errors:
+        currentMemory.last_tool_output = rejectedCall(errors)
+        logData(message=f"[TOOL EXECUTE] -> exit node - tool call rejected: {errors}")
+        return {
+            "decision": "evaluate",
+            "host_memory": state.host_memory,
+        }
+
+    # equivalent scans and ports this host was already scanned on never reach Kali
+    scanCall = reduceScan(
+        call=scanCall,
+        performed=currentMemory.scans_performed,
+        node="nmap.execute_tool_node",
+    )
+    if scanCall is None:
+        currentMemory.last_tool_output = {
+            "stdout": "",
+            "stderr": "",
+            "success": True,
+            "skipped": "Scan skipped, every port was already scanned with the same options.",
+        }
+        logData(message=f"[TOOL EXECUTE] -> exit node - redundant scan skipped")
+        return {
+            "decision": "evaluate",
+            "host_memory": state.host_memory,
+        }
+
+    # the model would be idle during the scan - prepare the next host in the meantime
+    speculateNextHost(state=state)
+
     try:
-        rawOutput = await nmap_scan(
-            nmapInput(
-                target=currentToolCall.target,
-                scan_type=currentToolCall.scan_type,
-                ports=currentToolCall.ports,
-                additional_args=currentToolCall.additional_args,
-            )
-        )
+        if _hostPipeline is not None and MAX_PARALLEL_HOSTS > 1:
+            rawOutput = await _hostPipeline.batcher.submit(scanCall)
+        else:
+            rawOutput = await nmap_scan(nmapInput(**scanCall))
     except Exception as e:
         rawOutput = {
             "stdout": "",
@@ -474,14 +723,9 @@ async def toolExecuteNode(state: nmapAgentState):
     if isinstance(rawOutput, tuple):
         rawOutput = rawOutput[1]["result"]
 
-    currentMemory.last_tool_output = rawOutput
+    currentMemory.last_tool_output = storeOutput(rawOutput)
     currentMemory.scans_performed.append(
-        {
-            "target": currentToolCall.target,
-            "scan_type": currentToolCall.scan_type,
-            "ports": currentToolCall.ports,
-            "additional_args": currentToolCall.additional_args,
-        }
+        {**scanCall, "success": bool(rawOutput.get("success"))}
     )
     logData(
         message=f"[TOOL EXECUTE] -> exit node - tool call was successful: {rawOutput.get('success','')}"
@@ -500,25 +744,33 @@ async def parseOutputNode(state: nmapAgentState):
     if not hostDiscovery.done:
         if hostDiscovery.last_tool_output.get("success"):
 
-            output = hostDiscovery.last_tool_output
+            output = loadOutput(hostDiscovery.last_tool_output)
             stdout = output.get("stdout", "")
             discovered = []
 
             stdout = output.get("stdout", "")
 
-            discovered = re.findall(
-                r"Nmap scan report for (\d+\.\d+\.\d+\.\d+)", stdout
-            )
+            discovered = HOST_REPORT.findall(stdout)
 
-            state.discovered_hosts = discovered
+            # hosts only get a full hostMemory once they are worked on
+            store = hostStore.live(state.host_store)
+            db = getHostDB()
+            skipped = []
             for ip in discovered:
-                if ip not in state.host_memory:
-                    # state.host_memory[ip] = hostMemory(
-                    #    ip=ip,
-                    #    status="alive",
-                    # )
+                if store.slotOf(ip) is not None:
+                    continue
+
+                # recently profiled hosts are reported from the host database
+                if db and db.isFresh(ip):
+                    skipped.append(ip)
+                    store.putRecord({**db.hostRecord(ip), "status": "alive"})
+                else:
+                    store.putRecord(seedRecord(ip))
+            state.host_store = store.handle()
 
-                    state.host_memory.setdefault(ip, hostMemory(ip=ip, status="alive"))
+            state.discovered_hosts = [ip for ip in discovered if ip not in skipped]
+            if skipped:
+                logData(f"[PARSE OUTPUT] -> unchanged hosts from the host database: {skipped}")
 
             hostDiscovery.done = True
 
@@ -527,9 +779,9 @@ async def parseOutputNode(state: nmapAgentState):
 
             return {
                 "host_discovery": state.host_discovery,
-                "host_memory": state.host_memory,
+                "host_store": state.host_store,
                 "discovered_hosts": state.discovered_hosts,
-                "decision": "plan",
+                "decision": "scan_hosts",
             }
         else:
             hostDiscovery.replan_count += 1
@@ -544,7 +796,7 @@ async def parseOutputNode(state: nmapAgentState):
                 Reason: {hostDiscovery.replan_reason}
                 
                 Last tool output:
-                {hostDiscovery.last_tool_output}
+                {compactNmapOutput(hostDiscovery.last_tool_output)}
                 """
 
                 return {
@@ -568,7 +820,7 @@ async def parseOutputNode(state: nmapAgentState):
         logData("[PARSE OUTPUT] -> no current host (check discovery)")
         return {"decision": "replan"}
 
-    output = currentHost.last_tool_output
+    output = loadOutput(currentHost.last_tool_output)
 
     if not output:
         logData("[PARSE OUTPUT] -> empty tool output")
@@ -585,16 +837,9 @@ async def parseOutputNode(state: nmapAgentState):
     parsedPorts, os_guess = parsePorts(stdout)
     currentHost.os_guess = os_guess
 
-    for p in parsedPorts:
-
-        exists = any(x.port == p.port for x in currentHost.open_ports)
-
-        if not exists and p.state == "open":
-
-            currentHost.open_ports.append(p)
-
-            if p.service and p.service not in currentHost.services_found:
-                currentHost.services_found.append(p.service)
+    changes = mergePorts(memory=currentHost, parsedPorts=parsedPorts)
+    if changes:
+        logData(f"[PARSE OUTPUT] -> host {currentHost.ip} port changes: {changes}")
 
     logData(
         f"[PARSE OUTPUT] -> host {currentHost.ip} open ports: {len(currentHost.open_ports)}"
@@ -617,28 +862,34 @@ async def evaluateNode(state: nmapAgentState):
         return {"decision": "plan"}
 
     planStep = currentMemory.plan[currentMemory.step_index]
+    output = currentMemory.last_tool_output or {}
 
-    prompt = f"""
-    You are a professional evaluater agent.
-    Your task is to analyze bellow listed results and give feedback.
-    
-    Current plan:
-    {planStep}
-    
-    Last tool call:
-    {currentMemory.scans_performed[-1]}
-    
-    Las tool output:
-    {currentMemory.last_tool_output}
-    
-    Decide confidence value based on a tool call performed and coresponding result.
-      
-    Return valid json in the following form:
-    - confidence <a number between 0.0 and 1.0>
-    - reasoning
-    """
+    # clean scans with open ports, hard failures and skipped redundant scans are scored
+    # without the model
+    if output.get("skipped"):
+        verdict = {"confidence": 1.0, "reasoning": output["skipped"]}
+    else:
+        verdict = nmapEvaluation(currentMemory.last_tool_output)
+    recordDecision(node="nmap.evaluate_node", byRule=verdict is not None)
 
-    feedback = await llm.with_structured_output(agentFeedback).ainvoke(prompt)
+    if verdict:
+        feedback = agentFeedback(**verdict)
+        logData(message=f"[EVALUATE NODE] -> fast path: {feedback.reasoning}")
+    else:
+        prompt = layoutPrompt(
+            static=EVALUATE_PROMPT,
+            dynamic={
+                "Current plan": planStep,
+                "Last tool call": currentMemory.scans_performed[-1],
+                "Last tool output": compactNmapOutput(currentMemory.last_tool_output),
+            },
+        )
+        feedback = await invokeStructured(
+            node="nmap.evaluate_node",
+            prompt=prompt,
+            schema=agentFeedback,
+            options=NO_THINKING,
+        )
     currentMemory.feedback = feedback
 
     state.iteration += 1
@@ -658,13 +909,14 @@ async def evaluateNode(state: nmapAgentState):
 
         # max number of replans reached -> moving to next host
         if currentMemory.replan_count >= currentMemory.max_replans:
-            state.host_index += 1
+            finishHost(state=state, memory=currentMemory)
             logData(
                 message="[EVALUATE NODE] -> exit node (replan cap reached) -> continue with next node"
             )
             return {
                 "decision": "plan",
                 "host_memory": state.host_memory,
+                "host_store": state.host_store,
                 "host_index": state.host_index,
             }
         else:
@@ -686,10 +938,11 @@ async def evaluateNode(state: nmapAgentState):
     # all planned steps executed
     if currentMemory.step_index >= len(currentMemory.plan):
         logData(message="[EVALUATE NODE] -> exit node - moving to next host")
-        state.host_index += 1
+        finishHost(state=state, memory=currentMemory)
         return {
             "decision": "plan",
             "host_memory": state.host_memory,
+            "host_store": state.host_store,
             "host_index": state.host_index,
         }
 
@@ -700,38 +953,90 @@ async def evaluateNode(state: nmapAgentState):
     }
 
 
+async def scanHostsNode(state: nmapAgentState):
+    logData(message="[SCAN HOSTS] -> enter node")
+
+    pipeline = getHostPipeline(state=state)
+
+    # hosts may already be running if they were streamed during discovery
+    if MAX_PARALLEL_HOSTS <= 1 or (len(state.discovered_hosts) < 2 and not pipeline.tasks):
+        logData(message="[SCAN HOSTS] -> exit node: scanning hosts one by one")
+        return {"decision": "plan"}
+
+    # hosts are batch planned by the pipeline, streamed or not
+    store = hostStore.live(state.host_store)
+    for ip in state.discovered_hosts:
+        pipeline.start(memory=hostView(state=state, ip=ip, store=store))
+
+    # wall time follows the slowest host instead of the sum of all hosts
+    start = time.perf_counter()
+    results = await pipeline.results()
+
+    failures = []
+    for ip, hostState in results.items():
+        if ip not in state.discovered_hosts:
+            state.discovered_hosts.append(ip)
+
+        # finished host runs hand their host back in compact form, failed ones as hostMemory
+        hostRun = hostStore.live(hostState.host_store)
+        if ip in hostState.host_memory:
+            store.putRecord(recordFromMemory(hostState.host_memory[ip]))
+        else:
+            store.putRecord(hostRun.hostRecord(hostRun.slotOf(ip)))
+        hostRun.release()
+
+        state.host_memory.pop(ip, None)
+        state.iteration += hostState.iteration
+        if hostState.fail:
+            failures.append(f"Host {ip}: {hostState.fail_reason}")
+
+    logData(
+        message=f"[SCAN HOSTS] -> exit node: {len(results)} hosts scanned in "
+        f"{time.perf_counter() - start:.1f}s, {len(failures)} failed"
+    )
+
+    # one failed host does not fail the whole task, only all of them do
+    return {
+        "host_memory": state.host_memory,
+        "host_store": store.handle(),
+        "discovered_hosts": state.discovered_hosts,
+        "host_index": len(state.discovered_hosts),
+        "iteration": state.iteration,
+        "fail": len(failures) == len(results),
+        "fail_reason": "\n".join(failures),
+        "decision": "plan",
+    }
+
+
 async def outputNode(state: nmapAgentState):
     logData(message="[OUTPUT NODE] -> enter node")
 
     if state.fail:
         logData(message="[OUTPUT NODE] -> general task failed")
-        prompt = f"""
-        You failed at performing your task.
-        Create a concise summary why that happened based on the bollow listed facts.
-        
-        Fail reason:
-        {state.fail_reason}
-        
-        Agent state before failure:
-        {state.model_dump_json()}
-        
-        NO markdown, NO emojis.
-        """
-
-    prompt = f"""
-    Create a concise summary based on the given initial objective and gathered infromation.
-    
-    Objective:
-    {state.objective}
-    
-    Host infromation:
-    {state.host_memory}
-    
-    NO markdown, NO emojis.
-    """
+        prompt = layoutPrompt(
+            static=FAILURE_SUMMARY_PROMPT,
+            dynamic={
+                "Fail reason": state.fail_reason,
+                "Agent state before failure": compactState(
+                    {
+                        **state.model_dump(exclude={"host_memory", "host_store"}),
+                        "hosts": hostRecords(state),
+                    }
+                ),
+            },
+        )
+    else:
+        prompt = layoutPrompt(
+            static=SUMMARY_PROMPT,
+            dynamic={
+                "Objective": state.objective,
+                "Host infromation": compactState(hostRecords(state)),
+                "Changes since the last run": hostChanges(state) or "None or not tracked.",
+            },
+        )
 
     logData(message="[OUTPUT NODE] -> generating summary")
-    state.summary = await llm.ainvoke(prompt)
+    state.summary = await invokeText(node="nmap.output_node", prompt=prompt)
 
     logData(message="[OUTPUT NODE] -> exit node - summary done")
     return {
@@ -746,20 +1051,159 @@ async def outputNode(state: nmapAgentState):
 
 
 def setupLogger():
-    logFile = logDir / f"nmap_agent_log{logCount}.log"
-    logger = logging.getLogger("nmap_agent")
-    logger.setLevel(logging.INFO)
+    # handlers live for the whole process, every run logs into the same rotating file
+    return setupLogging(agent="nmap", logDir=logDir)
+
+
+def logData(message: str, *args):
+    logging.getLogger("nmap_agent").info(message, *args)
+
+
+def readAllowedArguments() -> str:
+    return getCatalog(NMAP_CATALOG).text
+
+
+def rejectedCall(errors: List[str]) -> Dict[str, Any]:
+    # looks like a failed scan, so evaluation and replanning see the reason
+    return {
+        "stdout": "",
+        "stderr": f"Tool call rejected before execution: {'; '.join(errors)}",
+        "success": False,
+    }
+
+
+def planningPrompt(state: nmapAgentState, memory: hostMemory) -> str:
+    context = {
+        "Objective": state.objective,
+        "Target host - known facts": f"IP: {memory.ip}\nStatus: {memory.status}",
+    }
+
+    if memory.replan_flag:
+        context["Replan warning"] = (
+            f"You must replan your actions for host {memory.ip}\n"
+            f"Replan reason: {memory.replan_reason or ''}"
+        )
+        context["Last tool output"] = compactNmapOutput(memory.last_tool_output)
+        context["Feedback"] = memory.feedback
+
+    return layoutPrompt(static=PLANNING_PROMPT, dynamic=context)
+
+
+async def planHostBatch(state: nmapAgentState, current: str) -> bool:
+    # current host first, then the following hosts that were never planned
+    batch = []
+    store = hostStore.live(state.host_store)
+    for ip in state.discovered_hosts[state.host_index :]:
+        memory = hostView(state=state, ip=ip, store=store)
+        if memory and not memory.plan and not memory.replan_flag and not memory.batch_planned:
+            batch.append(memory)
+        if len(batch) >= PLAN_BATCH_SIZE:
+            break
 
-    fileHandler = logging.FileHandler(logFile, mode="w")
-    format = logging.Formatter("%(asctime)s | %(levelname)s | %(message)s")
-    fileHandler.setFormatter(format)
-    logger.addHandler(fileHandler)
+    if len(batch) < 2:
+        return False
 
-    return logger
+    # the plans have to stay with the hosts until they are scanned
+    for memory in batch:
+        state.host_memory[memory.ip] = memory
 
+    plans = await planHosts(objective=state.objective, batch=batch)
+
+    # True only when the host the planning node works on got its plan
+    return current in plans
+
+
+async def planHosts(objective: str, batch: List[hostMemory]) -> Dict[str, nmapHostPlan]:
+    # one planning request for the batch, each host that got a valid plan keeps it
+    prompt = layoutPrompt(
+        static=BATCH_PLANNING_PROMPT,
+        dynamic={
+            "Objective": objective,
+            "Target hosts - known facts": "\n".join(
+                f"IP: {memory.ip} | Status: {memory.status}" for memory in batch
+            ),
+        },
+    )
+
+    plans = await planBatch(
+        node="nmap.batch_planning_node",
+        prompt=prompt,
+        schema=nmapBatchPlan,
+        keys=[memory.ip for memory in batch],
+        itemKey=lambda plan: plan.ip.strip(),
+        # a plan whose steps scan another host of the batch got mixed up
+        itemValid=lambda plan: bool(plan.steps)
+        and all(step.target.strip() in ("", plan.ip.strip()) for step in plan.steps),
+    )
+
+    for memory in batch:
+        memory.batch_planned = True
+        if memory.ip in plans:
+            memory.plan = plans[memory.ip].steps
+            memory.step_index = 0
+            logData(message=f"[PLANNING NODE] -> batch plan for {memory.ip}: {plans[memory.ip]}")
+
+    return plans
+
+
+def toolCallPrompt(memory: hostMemory) -> str:
+    planStep = memory.plan[memory.step_index]
+
+    return layoutPrompt(
+        static=[TOOL_CALL_PROMPT, f"Available nmap options:\n{readAllowedArguments()}"],
+        dynamic={
+            "Current host - known facts": (
+                f"IP: {memory.ip}\n"
+                f"Status: {memory.status}\n"
+                f"Open ports: {memory.open_ports or 'None.'}\n"
+                f"Services discovered: {servicePorts(memory) or 'None.'}\n"
+                f"OS guess: {memory.os_guess or 'None.'}"
+            ),
+            "Current plan step": (
+                f"Description: {planStep.description}\n"
+                f"Proposed scan type: {planStep.scan_type}"
+            ),
+            "Already performed tool calls": memory.scans_performed,
+            "Last tool output": compactNmapOutput(memory.last_tool_output),
+            "Last feedback": memory.feedback,
+        },
+    )
 
-def logData(message: str):
-    logging.getLogger("nmap_agent").info(message)
+
+def speculateNextHost(state: nmapAgentState):
+    # plan + first tool call of the next host do not depend on the running scan; in
+    # parallel mode every host has its own run and there is no next host to prepare
+    if MAX_PARALLEL_HOSTS > 1:
+        return
+
+    nextIndex = state.host_index + 1
+    if nextIndex >= len(state.discovered_hosts):
+        return
+
+    nextMemory = hostView(state=state, ip=state.discovered_hosts[nextIndex])
+    if not nextMemory or nextMemory.plan or nextMemory.replan_flag:
+        return
+
+    # snapshot, the real nodes keep working on the graph state
+    snapshot = nextMemory.model_copy(deep=True)
+    prompt = planningPrompt(state=state, memory=snapshot)
+
+    async def prepareHost():
+        outputPlan = await invokeStructured(
+            node="nmap.planning_node", prompt=prompt, schema=nmapOutputPlan
+        )
+        if not outputPlan.steps:
+            return outputPlan, None, None
+
+        snapshot.plan = outputPlan.steps
+        snapshot.step_index = 0
+        toolPrompt = toolCallPrompt(memory=snapshot)
+        toolCall = await invokeStructured(
+            node="nmap.tool_call_node", prompt=toolPrompt, schema=nmapToolCall
+        )
+        return outputPlan, toolPrompt, toolCall
+
+    getSpeculator().launch(slot=f"nmap.plan:{snapshot.ip}", key=prompt, factory=prepareHost)
 
 
 def getCurrentHost(state: nmapAgentState) -> hostMemory:
@@ -768,7 +1212,121 @@ def getCurrentHost(state: nmapAgentState) -> hostMemory:
 
     host = state.discovered_hosts[state.host_index]
 
-    return state.host_memory.get(host)
+    # the first access moves the host from the compact store into host_memory
+    memory = hostView(state=state, ip=host)
+    if memory is not None:
+        state.host_memory[host] = memory
+
+    return memory
+
+
+def hostView(
+    state: nmapAgentState, ip: str, store: Optional[hostStore] = None
+) -> Optional[hostMemory]:
+    # pydantic view of a host: the active hostMemory or one built from the compact store
+    if ip in state.host_memory:
+        return state.host_memory[ip]
+
+    store = store or hostStore.live(state.host_store)
+    slot = store.slotOf(ip)
+    if slot is None:
+        return None
+
+    return memoryFromRecord(store.hostRecord(slot))
+
+
+def memoryFromRecord(record: Dict[str, Any]) -> hostMemory:
+    memory = hostMemory(
+        ip=record["ip"],
+        status=record["status"],
+        os_guess=record["os_guess"],
+        scans_performed=record["scans_performed"],
+        seeded_scans=len(record["scans_performed"]),
+    )
+
+    for port in record["ports"]:
+        key = f"{port['port']}/{port['protocol']}"
+        memory.port_index[key] = portInfo(**port)
+        if port["service"]:
+            memory.service_index.setdefault(port["service"], []).append(key)
+
+    return memory
+
+
+def seedRecord(ip: str) -> Dict[str, Any]:
+    # known hosts start with their stored ports and the scans that are not stale yet,
+    # scan dedup then keeps the agent from repeating those; a stored port that a new
+    # scan does not report again is dropped from the result, see unconfirmedPorts
+    db = getHostDB()
+    known = db.hostRecord(ip, freshScansOnly=True) if db else None
+
+    if known is None:
+        return {"ip": ip, "status": "alive", "os_guess": None, "ports": [], "scans_performed": []}
+    return {**known, "status": "alive"}
+
+
+def hostChanges(state: nmapAgentState) -> List[Dict[str, str]]:
+    # differences to the host database, empty when it is disabled
+    db = getHostDB()
+    if db is None:
+        return []
+    return db.diff(records=hostRecords(state), networks=sweptNetworks(state))
+
+
+def sweptNetworks(state: nmapAgentState) -> List[str]:
+    toolCall = state.host_discovery.currentToolCall
+    return [toolCall.target] if toolCall and toolCall.target else []
+
+
+def recordFromMemory(memory: hostMemory) -> Dict[str, Any]:
+    dropped = unconfirmedPorts(memory)
+
+    return {
+        "ip": memory.ip,
+        "status": memory.status,
+        "os_guess": memory.os_guess,
+        "ports": [
+            port.model_dump() for key, port in memory.port_index.items() if key not in dropped
+        ],
+        "scans_performed": memory.scans_performed,
+    }
+
+
+def unconfirmedPorts(memory: hostMemory) -> Set[str]:
+    # stored ports that a scan of this run covered without reporting them are gone
+    # (closed now), the host database reports them as removed
+    covered = set()
+    for scan in memory.scans_performed[memory.seeded_scans :]:
+        if scan.get("success") is not False:
+            covered |= scannedPorts(scan) or set()
+
+    return {
+        key
+        for key, port in memory.port_index.items()
+        if key not in memory.seen_ports
+        and (port.protocol[:1].upper(), port.port) in covered
+    }
+
+
+def finishHost(state: nmapAgentState, memory: hostMemory):
+    # a scanned host leaves the pydantic state and is kept in the compact store
+    # only this host's slot changes, the store itself stays loaded for the run
+    store = hostStore.live(state.host_store)
+    store.putRecord(recordFromMemory(memory))
+
+    state.host_store = store.handle()
+    state.host_memory.pop(memory.ip, None)
+    state.host_index += 1
+
+
+def hostRecords(state: nmapAgentState) -> Dict[str, Dict[str, Any]]:
+    # plain records for the summary prompt and the agent result
+    store = hostStore.live(state.host_store)
+
+    records = {ip: store.hostRecord(slot) for slot, ip in enumerate(store.hostIps())}
+    records.update({ip: recordFromMemory(memory) for ip, memory in state.host_memory.items()})
+
+    return records
 
 
 def parsePorts(stdout: str):
@@ -777,14 +1335,16 @@ def parsePorts(stdout: str):
 
     for line in stdout.splitlines():
         # port / service detection
-        match = re.match(r"(\d+)/tcp\s+(\w+)\s+([\w\-\.]+)?\s*(.*)", line)
+        match = PORT_LINE.match(line)
         if match:
-            port = int(match.group(1))
-            state = match.group(2)
-            service = match.group(3)
-            version = match.group(4).strip()
             ports.append(
-                portInfo(port=port, state=state, service=service, version=version)
+                portInfo(
+                    port=int(match.group(1)),
+                    protocol=match.group(2),
+                    state=match.group(3),
+                    service=match.group(4),
+                    version=match.group(5).strip(),
+                )
             )
 
         # os detection
@@ -795,6 +1355,113 @@ def parsePorts(stdout: str):
     return ports, os_guess
 
 
+def mergePorts(memory: hostMemory, parsedPorts: List[portInfo]) -> int:
+    # one dict lookup per parsed port; every changed field is kept in port_history
+    scan = len(memory.scans_performed)
+    changes = 0
+
+    for parsed in parsedPorts:
+        key = f"{parsed.port}/{parsed.protocol}"
+        if key not in memory.seen_ports:
+            memory.seen_ports.append(key)
+        known = memory.port_index.setdefault(
+            key, portInfo(port=parsed.port, protocol=parsed.protocol)
+        )
+
+        for field in ["state", "service", "version"]:
+            old, new = getattr(known, field), getattr(parsed, field)
+            if not new or new == old:
+                continue
+
+            setattr(known, field, new)
+            memory.port_history.append(
+                {"port": key, "field": field, "old": old, "new": new, "scan": scan}
+            )
+            changes += 1
+
+            if field == "service":
+                if old and key in memory.service_index.get(old, []):
+                    memory.service_index[old].remove(key)
+                memory.service_index.setdefault(new, []).append(key)
+
+    return changes
+
+
+def portsWithService(memory: hostMemory, service: str) -> List[portInfo]:
+    # open ports running a service, e.g. all "http" ports for a follow-up script scan
+    ports = (memory.port_index[key] for key in memory.service_index.get(service, []))
+    return [port for port in ports if port.state == "open"]
+
+
+def servicePorts(memory: hostMemory) -> str:
+    # "http: 80/tcp, 8080/tcp; ssh: 22/tcp"
+    return "; ".join(
+        f"{service}: {', '.join(f'{port.port}/{port.protocol}' for port in ports)}"
+        for service in memory.service_index
+        if (ports := portsWithService(memory, service))
+    )
+
+
+async def streamDiscovery(state: nmapAgentState, scanInput: nmapInput):
+    # every live host goes into the host pipeline while the sweep is still running
+    pipeline = getHostPipeline(state=state)
+    db = getHostDB()
+    streamed = []
+
+    def onLine(line: str):
+        match = HOST_REPORT.search(line)
+        if not match or match.group(1) in streamed:
+            return
+
+        ip = match.group(1)
+        streamed.append(ip)
+
+        # parseOutputNode reports it from the host database
+        if db and db.isFresh(ip):
+            return
+
+        logData(message=f"[EXECUTE TOOL] -> live host {ip} - starting its scan")
+        pipeline.start(memory=memoryFromRecord(seedRecord(ip)))
+
+    rawOutput = await nmap_scan_stream(scanInput, onLine=onLine)
+
+    # Kali servers without the streaming endpoint
+    if not streamed and rawOutput.get("error"):
+        logData(message=f"[EXECUTE TOOL] -> streaming failed ({rawOutput['error']}), normal scan")
+        rawOutput = await nmap_scan(scanInput)
+
+    return rawOutput
+
+
+def getHostPipeline(state: nmapAgentState) -> hostPipeline:
+    global _hostPipeline
+
+    if _hostPipeline is None:
+        _hostPipeline = hostPipeline(objective=state.objective, maxIteration=state.max_iteration)
+
+    return _hostPipeline
+
+
+def getAgentGraph():
+    # compiled once per process; every run uses its own checkpointer thread
+    global _agentGraph
+
+    if _agentGraph is None:
+        _agentGraph = buildWorkflow().compile(checkpointer=InMemorySaver())
+        renderGraph(_agentGraph, "MCP_tools/nmap/nmap_agent_graph.png")
+
+    return _agentGraph
+
+
+def getHostGraph():
+    global _hostGraph
+
+    if _hostGraph is None:
+        _hostGraph = buildWorkflow(perHost=True).compile()
+
+    return _hostGraph
+
+
 def retrieveCurrentDecision(state: nmapAgentState):
     currentState = state.decision
 
@@ -807,16 +1474,10 @@ def retrieveCurrentDecision(state: nmapAgentState):
 # ------------------------------------------------------------------------------- #
 #                                    Graph                                        #
 # ------------------------------------------------------------------------------- #
-async def agentRunner(prompt):
-    agentState = nmapAgentState()
-    setupLogger()
-
+def buildWorkflow(perHost: bool = False) -> StateGraph:
+    # perHost: one already discovered host, from planning to its last evaluation
     workflow = StateGraph(nmapAgentState)
-    SESSIN_ID = "default_session"
-
-    # test prompt
-    # agentState.objective = "Position yourself in the network 192.168.157.0 and discover all relevant hosts."
-    agentState.objective = prompt
+    finish = END if perHost else "output_node"
 
     # -------------------------------
     # graph nodes
@@ -827,7 +1488,10 @@ async def agentRunner(prompt):
     workflow.add_node("execute_tool_node", toolExecuteNode)
     workflow.add_node("parse_output_node", parseOutputNode)
     workflow.add_node("evaluate_node", evaluateNode)
-    workflow.add_node("output_node", outputNode)
+
+    if not perHost:
+        workflow.add_node("scan_hosts_node", scanHostsNode)
+        workflow.add_node("output_node", outputNode)
 
     # -------------------------------
     # graph edges
@@ -838,7 +1502,7 @@ async def agentRunner(prompt):
         retrieveCurrentDecision,
         {
             "continue": "tool_call_node",
-            "stop": "output_node",
+            "stop": finish,
         },
     )
     workflow.add_conditional_edges(
@@ -857,50 +1521,106 @@ async def agentRunner(prompt):
             "evaluate": "evaluate_node",
         },
     )
-    workflow.add_conditional_edges(
-        "parse_output_node",
-        retrieveCurrentDecision,
-        {
-            "continue": "evaluate_node",
-            "plan": "planning_node",
-            "stop": "output_node",
-        },
-    )
+
+    parseRoutes = {
+        "continue": "evaluate_node",
+        "plan": "planning_node",
+        "stop": finish,
+    }
+    if not perHost:
+        parseRoutes["scan_hosts"] = "scan_hosts_node"
+
+    workflow.add_conditional_edges("parse_output_node", retrieveCurrentDecision, parseRoutes)
     workflow.add_conditional_edges(
         "evaluate_node",
         retrieveCurrentDecision,
         {
             "continue": "tool_call_node",
             "plan": "planning_node",
-            "stop": "output_node",
+            "stop": finish,
         },
     )
-    workflow.add_edge("output_node", END)
 
-    checkpointer = InMemorySaver()
-    graph = workflow.compile(checkpointer=checkpointer)
+    if not perHost:
+        workflow.add_edge("scan_hosts_node", "planning_node")
+        workflow.add_edge("output_node", END)
 
-    # display workflow
-    pngBytes = graph.get_graph().draw_mermaid_png()
-    pngPath = "MCP_tools/nmap/nmap_agent_graph.png"
+    return workflow
 
-    with open(pngPath, "wb") as f:
-        f.write(pngBytes)
 
-    result = await graph.ainvoke(
-        agentState.model_dump(),
-        config={"thread_id": SESSIN_ID, "recursion_limit": 1000},
+async def agentRunner(prompt):
+    global _hostPipeline
+
+    agentState = nmapAgentState()
+    _hostPipeline = None
+    setupLogger()
+    runId = startRun(name="nmap")
+    await asyncio.to_thread(warmModel)
+    resetFastPathStats(prefix="nmap.")
+    resetDedupStats(prefix="nmap.")
+    resetBatcherStats()
+
+    graph = getAgentGraph()
+
+    if MAX_PARALLEL_HOSTS > 1 and getSpeculator().enabled:
+        logData(
+            message="[SPECULATION] off for nmap: hosts run in parallel, their planning "
+            "already overlaps the other hosts' scans"
+        )
+
+    # test prompt
+    # agentState.objective = "Position yourself in the network 192.168.157.0 and discover all relevant hosts."
+    agentState.objective = prompt
+
+    # host stores of this run (main graph and host runs), released even if the run raises
+    runStores = trackStores()
+    try:
+        result = await graph.ainvoke(
+            agentState.model_dump(),
+            config={"thread_id": runId, "recursion_limit": 1000},
+        )
+
+        finalState = nmapAgentState.model_validate(result)
+        hosts = hostRecords(finalState)
+    finally:
+        # checkpoints of finished runs would pile up in the shared checkpointer; they
+        # only hold store handles and could not be resumed anyway (see host_store.py)
+        graph.checkpointer.delete_thread(runId)
+        releaseStores(runStores)
+
+    logData(message=f"[FAST PATH] decisions per node: {fastPathReport(prefix='nmap.')}")
+    logData(
+        message=f"[STRUCTURED OUTPUT] calls/failures/retries per node: {structuredReport()}"
     )
+    logData(message=f"[MODEL ROUTER] latency per node and model: {latencyReport()}")
+    logData(message=f"[LLM SCHEDULER] queue wait / generation per node: {schedulerReport()}")
+    logData(message=f"[BATCH PLANNING] planned/fallback per node: {batchReport(prefix='nmap.')}")
+    logData(message=f"[SCAN DEDUP] skipped/shrunk scans: {dedupReport(prefix='nmap.')}")
+    logData(message=f"[SCAN BATCHER] nmap runs / hosts per run: {batcherReport()}")
+    getSpeculator().discard(prefix="nmap.")
+    logData(message=f"[SPECULATION] used/discarded per slot: {speculationReport(prefix='nmap.')}")
+    logData(message=summaryTable())
 
     # print(
     #    f"[FINAL RESULT]:\n\nSummary:\n{result.get("summary")}\n\nMemory:{result.get("host_memory")}"
     # )
 
+    changes = []
+    db = getHostDB()
+    if db:
+        changes = db.recordRun(
+            runId=runId,
+            records=hosts,
+            scanned=finalState.discovered_hosts,
+            networks=sweptNetworks(finalState),
+            complete=not finalState.fail,
+        )
+        logData(message=f"[HOST DB] changes since the last run: {changes}")
+
     return {
-        "summary": result.get("summary").content if result.get("summary") else "",
-        "hosts": {
-            ip: host.model_dump() for ip, host in result.get("host_memory", {}).items()
-        },
+        "summary": result.get("summary") or "",
+        "hosts": hosts,
+        "changes": changes,
     }
 
 
@@ -914,5 +1634,6 @@ if __name__ == "__main__":
 
     testPrompt = "Position yourself in the network 192.168.157.0 and discover all relevant hosts."
     result = asyncio.run(agentRunner(prompt=testPrompt))
+    print(summaryTable())
 
     print(f"[FINAL RESULT]:\n\n{result}")
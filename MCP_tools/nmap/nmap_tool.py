@@ -5,16 +5,13 @@ from dotenv import load_dotenv
 import os
 
 try:
-    from MCP_tools.mcp_server import KaliToolsClient, setup_mcp_server
+    from MCP_tools.mcp_registry import callTool
 except Exception:
-    from mcp_server import KaliToolsClient, setup_mcp_server
+    from mcp_registry import callTool
 
 
 load_dotenv()
 
-KALI_API = os.getenv(key="KALI_API", default="http://192.168.157.129:5000")
-client = KaliToolsClient(server_url=KALI_API)
-mcp = setup_mcp_server(kali_client=client)
 savedPayload = {}
 
 # -------------------------------------------------------------------------------#
@@ -54,7 +51,7 @@ async def nmap_scan(
         "additional_args": additional_args,
     }
     await returnToolCall(mode="write", payload=payload)
-    result = await mcp.call_tool(name="nmap_scan", arguments=payload)
+    result = await callTool(name="nmap_scan", arguments=payload)
     return result
 
 
@@ -5,16 +5,13 @@ import os
 import asyncio
 
 try:
-    from MCP_tools.mcp_server import KaliToolsClient, setup_mcp_server
+    from MCP_tools.mcp_registry import callTool, streamTool
 except Exception:
-    from mcp_server import KaliToolsClient, setup_mcp_server
+    from mcp_registry import callTool, streamTool
 
 
 load_dotenv()
 
-KALI_API = os.getenv(key="KALI_API", default="http://192.168.157.129:5000")
-client = KaliToolsClient(server_url=KALI_API)
-mcp = setup_mcp_server(kali_client=client)
 savedPayload = {}
 
 # -------------------------------------------------------------------------------#
@@ -46,7 +43,20 @@ async def nmap_scan(input: nmapInput) -> Dict[str, Any]:
         "additional_args": input.additional_args,
     }
     await returnToolCall(mode="write", payload=payload)
-    result = await mcp.call_tool(name="nmap_scan", arguments=payload)
+    result = await callTool(name="nmap_scan", arguments=payload)
+    return result
+
+
+async def nmap_scan_stream(input: nmapInput, onLine) -> Dict[str, Any]:
+    # same scan, but stdout lines reach onLine while nmap is still running
+    payload = {
+        "target": input.target,
+        "scan_type": input.scan_type,
+        "ports": input.ports,
+        "additional_args": input.additional_args,
+    }
+    await returnToolCall(mode="write", payload=payload)
+    result = await streamTool(endpoint="api/tools/nmap/stream", arguments=payload, onLine=onLine)
     return result
 
 
@@ -0,0 +1,200 @@
+# Multi-target batching of per-host nmap scans.
+#
+# With the host pipeline every host runs its own plan, so several hosts often want the
+# same scan (same options, same ports) at about the same time. Each of them used to be
+# its own nmap process on the Kali box, paying process start, timing calibration and
+# an API round trip. nmap scans many targets in one run just as well.
+#
+# scanBatcher sits in front of nmap_scan: a scan request waits up to
+# NMAP_SCAN_BATCH_WINDOW_MS for compatible requests from other hosts (same canonical
+# options and port set, see scan_dedup.py), then all of them run as one nmap
+# invocation with several targets. The output is cut at the "Nmap scan report for"
+# lines and every caller gets a result that looks like a single-host scan.
+#
+# NMAP_SCAN_BATCH_WINDOW_MS=0 turns batching off.
+
+import asyncio
+import logging
+import os
+import re
+import threading
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from dotenv import load_dotenv
+
+from MCP_tools.nmap.nmap_toolV2 import nmapInput
+from MCP_tools.nmap.scan_dedup import canonicalCall, formatPortSpec, parsePortSpec
+
+load_dotenv()
+
+# ------------------------------------------------------------------------------- #
+#                                       Config                                    #
+# ------------------------------------------------------------------------------- #
+
+BATCH_WINDOW = int(os.getenv(key="NMAP_SCAN_BATCH_WINDOW_MS", default="300")) / 1000
+BATCH_MAX_TARGETS = int(os.getenv(key="NMAP_SCAN_BATCH_MAX_TARGETS", default="8"))
+
+REPORT_LINE = re.compile(r"^Nmap scan report for (?:(\S+) \()?(\S+?)\)?$")
+
+# lines after the last host block that belong to the whole run
+TRAILER_LINE = re.compile(
+    r"^(Nmap done|Service detection performed|OS detection performed|"
+    r"OS and Service detection performed|Read data files from)"
+)
+
+logger = logging.getLogger("scan_batcher")
+
+batcherStats: Dict[str, int] = defaultdict(int)
+_statsLock = threading.Lock()
+
+# ------------------------------------------------------------------------------- #
+#                                      Batcher                                    #
+# ------------------------------------------------------------------------------- #
+
+
+class scanBatcher:
+    """Merges compatible single-host scans into multi-target nmap runs."""
+
+    def __init__(
+        self,
+        scan: Callable[[nmapInput], Awaitable[Any]],
+        window: float = BATCH_WINDOW,
+        maxTargets: int = BATCH_MAX_TARGETS,
+    ):
+        self.scan = scan
+        self.window = window
+        self.maxTargets = maxTargets
+
+        # batch key -> {"call", "targets": {target: [futures]}}
+        self._pending: Dict[Any, Dict[str, Any]] = {}
+        self._tasks = set()
+
+    def spawn(self, coroutine):
+        # the loop only keeps weak references to tasks
+        task = asyncio.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def submit(self, call: Dict[str, Any]) -> Dict[str, Any]:
+        key = batchKey(call)
+        if key is None or self.window <= 0 or self.maxTargets < 2:
+            return toolResult(await self.scan(nmapInput(**call)))
+
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = {"call": call, "targets": {}}
+            self._pending[key] = batch
+            self.spawn(self.flushLater(key, batch))
+
+        future = asyncio.get_running_loop().create_future()
+        batch["targets"].setdefault(call["target"].strip(), []).append(future)
+
+        if len(batch["targets"]) >= self.maxTargets:
+            self._pending.pop(key, None)
+            self.spawn(self.run(batch))
+
+        return await future
+
+    async def flushLater(self, key, batch: Dict[str, Any]):
+        await asyncio.sleep(self.window)
+
+        # a full batch was already started by submit
+        if self._pending.get(key) is batch:
+            del self._pending[key]
+            await self.run(batch)
+
+    async def run(self, batch: Dict[str, Any]):
+        targets = list(batch["targets"])
+        call = {**batch["call"], "target": " ".join(targets)}
+
+        with _statsLock:
+            batcherStats["invocations"] += 1
+            batcherStats["targets"] += len(targets)
+            batcherStats["processes_saved"] += len(targets) - 1
+
+        if len(targets) > 1:
+            logger.info(f"[SCAN BATCHER] one nmap run for {len(targets)} hosts: {targets}")
+
+        try:
+            result = toolResult(await self.scan(nmapInput(**call)))
+        except Exception as e:
+            for futures in batch["targets"].values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        parts = splitResult(result, targets) if len(targets) > 1 else {targets[0]: result}
+        for target, futures in batch["targets"].items():
+            for future in futures:
+                if not future.done():
+                    future.set_result(parts[target])
+
+
+# ------------------------------------------------------------------------------- #
+#                                  Helper functions                               #
+# ------------------------------------------------------------------------------- #
+
+
+def batchKey(call: Dict[str, Any]):
+    # only single-host targets are merged; ranges and CIDRs keep their own run
+    target = (call.get("target") or "").strip()
+    if not target or any(char in target for char in " /,*") or re.search(r"\d-\d", target):
+        return None
+
+    _, options, spec = canonicalCall(call)
+    ports = parsePortSpec(spec)
+
+    return options, formatPortSpec(ports) if ports else (spec or "")
+
+
+def toolResult(rawOutput: Any) -> Dict[str, Any]:
+    # MCP results come back as (content, {"result": ...})
+    if isinstance(rawOutput, tuple):
+        rawOutput = rawOutput[1]["result"]
+    return rawOutput or {}
+
+
+def splitResult(result: Dict[str, Any], targets: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Per-target copies of a multi-target nmap result, each with its own host block."""
+    header, blocks, trailer = [], {}, []
+    current: Optional[List[str]] = None
+
+    for line in (result.get("stdout") or "").splitlines():
+        match = REPORT_LINE.match(line.strip())
+        if match and not trailer:
+            current = []
+            # reported by address, or as "name (address)" for hostname targets
+            for name in filter(None, match.groups()):
+                blocks[name] = current
+
+        if trailer or TRAILER_LINE.match(line):
+            trailer.append(line)
+        elif current is None:
+            header.append(line)
+        else:
+            current.append(line)
+
+    parts = {}
+    for target in targets:
+        block = blocks.get(target)
+        part = {**result, "stdout": "\n".join(header + (block or []) + trailer)}
+
+        if block is None and result.get("timed_out"):
+            # the run ended before nmap got to this host
+            part["success"] = False
+            part["stderr"] = f"Batched nmap run timed out before {target} was reported."
+
+        parts[target] = part
+
+    return parts
+
+
+def batcherReport() -> Dict[str, int]:
+    with _statsLock:
+        return dict(batcherStats)
+
+
+def resetBatcherStats():
+    with _statsLock:
+        batcherStats.clear()
@@ -0,0 +1,356 @@
+# Redundant scan detection for the nmap agent.
+#
+# The prompts ask the model not to repeat a scan, but the calls it returns often differ
+# from earlier ones only in form: "-sV -sC" vs "-sC -sV", "-p 22,80" vs "80,22", the
+# port list in additional_args instead of ports, a different -T template, or a port
+# subset of a scan that already ran. Before a call goes to Kali it is reduced against
+# the host's scans_performed:
+#
+#   canonical form   target, scan options (sorted, -sCV split, -A expanded, options
+#                    that only change timing/verbosity/output dropped) and port set
+#   coverage         earlier successful scans with the same target and options cover
+#                    the union of their port sets
+#
+# A call whose ports are all covered is skipped, one that is partially covered is
+# shrunk to the uncovered ports. Calls that cannot be reasoned about (service names in
+# -p, --top-ports against an explicit list, ...) are left untouched.
+
+import logging
+import shlex
+import threading
+from collections import defaultdict
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+# options followed by a value
+VALUE_OPTIONS = {
+    "-p",
+    "-e",
+    "-g",
+    "-D",
+    "-S",
+    "-iL",
+    "-oN",
+    "-oX",
+    "-oG",
+    "-oA",
+    "--script",
+    "--script-args",
+    "--top-ports",
+    "--port-ratio",
+    "--exclude",
+    "--exclude-ports",
+    "--version-intensity",
+    "--source-port",
+    "--data-length",
+    "--ttl",
+    "--dns-servers",
+    "--max-retries",
+    "--host-timeout",
+    "--min-rate",
+    "--max-rate",
+    "--scan-delay",
+    "--max-scan-delay",
+    "--min-parallelism",
+    "--max-parallelism",
+    "--min-hostgroup",
+    "--max-hostgroup",
+    "--min-rtt-timeout",
+    "--max-rtt-timeout",
+    "--initial-rtt-timeout",
+    "--stats-every",
+}
+
+# options that do not change what a scan finds
+IGNORED_OPTIONS = {
+    "-n",
+    "-R",
+    "--reason",
+    "--open",
+    "--packet-trace",
+    "--max-retries",
+    "--host-timeout",
+    "--min-rate",
+    "--max-rate",
+    "--scan-delay",
+    "--max-scan-delay",
+    "--min-parallelism",
+    "--max-parallelism",
+    "--min-hostgroup",
+    "--max-hostgroup",
+    "--min-rtt-timeout",
+    "--max-rtt-timeout",
+    "--initial-rtt-timeout",
+    "--stats-every",
+    "-oN",
+    "-oX",
+    "-oG",
+    "-oA",
+}
+
+TIMING_TEMPLATES = {"paranoid", "sneaky", "polite", "normal", "aggressive", "insane"}
+
+ALL_PORTS = frozenset(range(1, 65536))
+
+# scan types by the protocol whose ports they probe; no scan type means a TCP scan
+TCP_SCANS = {"-sS", "-sT", "-sA", "-sW", "-sM", "-sN", "-sF", "-sX", "-sI", "-b"}
+UDP_SCANS = {"-sU"}
+SCTP_SCANS = {"-sY", "-sZ"}
+
+logger = logging.getLogger("scan_dedup")
+
+dedupStats: Dict[str, Dict[str, int]] = defaultdict(
+    lambda: {"checked": 0, "skipped": 0, "shrunk": 0, "ports_saved": 0}
+)
+_statsLock = threading.Lock()
+
+# ------------------------------------------------------------------------------- #
+#                                  Canonical form                                 #
+# ------------------------------------------------------------------------------- #
+
+
+def canonicalOptions(scanType: str, additionalArgs: str) -> Tuple[FrozenSet, Optional[str]]:
+    """Scan options as a set and the port spec given with -p (if any)."""
+    try:
+        tokens = shlex.split(f"{scanType or ''} {additionalArgs or ''}")
+    except ValueError:
+        tokens = f"{scanType or ''} {additionalArgs or ''}".split()
+
+    options, portSpec = set(), None
+    index = 0
+
+    while index < len(tokens):
+        token = tokens[index]
+        index += 1
+
+        if "=" in token and token.startswith("--"):
+            name, value = token.split("=", 1)
+        elif token in VALUE_OPTIONS and index < len(tokens):
+            name, value = token, tokens[index]
+            index += 1
+        elif token.startswith("-p") and len(token) > 2 and not token.startswith("--"):
+            name, value = "-p", token[2:]
+        else:
+            name, value = token, None
+
+        if name == "-p":
+            portSpec = value
+        elif name in IGNORED_OPTIONS or noiseOption(name):
+            continue
+        elif name.startswith("-s") and len(name) > 3 and not name.startswith("--"):
+            # -sCV -> -sC -sV
+            options.update(f"-s{letter}" for letter in name[2:])
+        elif name == "-A":
+            options.update(["-sV", "-sC", "-O", "--traceroute"])
+        elif name in ("--script", "--script-args") and value:
+            options.add((name, ",".join(sorted(value.split(",")))))
+        else:
+            options.add((name, value) if value is not None else name)
+
+    return frozenset(options), portSpec
+
+
+def parsePortSpec(spec: Optional[str]) -> Optional[FrozenSet[Tuple[str, int]]]:
+    """
+    "22,80,1000-1010,U:53" -> {("", 22), ("", 80), ..., ("U", 53)}.
+
+    Returns None for an empty spec (nmap's default ports) and for specs that cannot be
+    expanded (service names, wildcards).
+    """
+    if not spec or not spec.strip():
+        return None
+
+    ports, protocol = set(), ""
+    for part in spec.replace(" ", "").split(","):
+        if len(part) > 1 and part[1] == ":" and part[0].upper() in "TUS":
+            protocol, part = part[0].upper(), part[2:]
+        if not part:
+            continue
+
+        try:
+            if part == "-":
+                low, high = 1, 65535
+            elif "-" in part:
+                low, high = part.split("-", 1)
+                low, high = int(low or 1), int(high or 65535)
+            else:
+                low = high = int(part)
+        except ValueError:
+            return None
+
+        ports.update((protocol, port) for port in range(max(low, 1), min(high, 65535) + 1))
+
+    return frozenset(ports)
+
+
+def formatPortSpec(ports) -> str:
+    # inverse of parsePortSpec with consecutive ports folded into ranges
+    byProtocol = defaultdict(list)
+    for protocol, port in ports:
+        byProtocol[protocol].append(port)
+
+    parts = []
+    for protocol in sorted(byProtocol):
+        numbers = sorted(byProtocol[protocol])
+        ranges, start = [], numbers[0]
+        for previous, current in zip(numbers, numbers[1:] + [None]):
+            if current is None or current != previous + 1:
+                ranges.append(str(start) if start == previous else f"{start}-{previous}")
+                start = current
+
+        ranges[0] = f"{protocol}:{ranges[0]}" if protocol else ranges[0]
+        parts.extend(ranges)
+
+    return ",".join(parts)
+
+
+def canonicalCall(call: Dict[str, Any]):
+    options, argPorts = canonicalOptions(call.get("scan_type"), call.get("additional_args"))
+    spec = call.get("ports") or argPorts
+    return (call.get("target") or "").strip(), options, spec
+
+
+# ------------------------------------------------------------------------------- #
+#                                     Coverage                                    #
+# ------------------------------------------------------------------------------- #
+
+
+def reduceScan(call: Dict[str, Any], performed: List[Dict[str, Any]], node: str = "nmap"):
+    """
+    The part of a tool call that earlier scans do not cover.
+
+    Returns the call unchanged, a copy narrowed to the uncovered ports, or None when
+    every port was already scanned with the same options.
+    """
+    target, options, spec = canonicalCall(call)
+    ports = parsePortSpec(spec)
+
+    defaultCovered, covered = False, set()
+    for scan in performed:
+        if scan.get("success") is False:
+            continue
+
+        scanTarget, scanOptions, scanSpec = canonicalCall(scan)
+        if scanTarget != target or scanOptions != options:
+            continue
+
+        scanPorts = parsePortSpec(scanSpec)
+        if scanSpec and scanPorts is None:
+            continue
+        if scanPorts is None:
+            defaultCovered = True
+        else:
+            covered |= scanPorts
+
+    # full ranges cover nmap's default ports, but only once every scanned protocol has one
+    defaultCovered = defaultCovered or all(
+        ALL_PORTS <= {port for proto, port in covered if proto in ("", protocol)}
+        for protocol in scannedProtocols(options)
+    )
+
+    if spec and ports is None:
+        # unknown port syntax, let nmap deal with it
+        result, saved = call, 0
+    elif ports is None:
+        result, saved = (None, 1000) if defaultCovered else (call, 0)
+    else:
+        missing = ports - covered
+        if not missing:
+            result, saved = None, len(ports)
+        elif len(missing) < len(ports):
+            result = dict(call)
+            result["ports"] = formatPortSpec(missing)
+            # -p is accepted in either field, a leftover copy would rescan covered ports
+            result["scan_type"] = withoutPorts(call.get("scan_type"))
+            result["additional_args"] = withoutPorts(call.get("additional_args"))
+            saved = len(ports) - len(missing)
+        else:
+            result, saved = call, 0
+
+    with _statsLock:
+        stats = dedupStats[node]
+        stats["checked"] += 1
+        stats["skipped"] += 1 if result is None else 0
+        stats["shrunk"] += 1 if result is not None and result is not call else 0
+        stats["ports_saved"] += saved
+
+    if result is None:
+        logger.info(f"[SCAN DEDUP] {node} {target} -> skipped, already covered: {call}")
+    elif result is not call:
+        logger.info(f"[SCAN DEDUP] {node} {target} -> ports {spec} shrunk to {result['ports']}")
+
+    return result
+
+
+def scannedPorts(call: Dict[str, Any]) -> Optional[FrozenSet[Tuple[str, int]]]:
+    """
+    Ports a call probes as ("T" / "U" / "S", port).
+
+    Returns None when that is not known: nmap's default ports, unknown port syntax and
+    ping scans.
+    """
+    _, options, spec = canonicalCall(call)
+    ports = parsePortSpec(spec)
+    if ports is None or "-sn" in options:
+        return None
+
+    protocols = scannedProtocols(options)
+    return frozenset(
+        (protocol, port)
+        for proto, port in ports
+        for protocol in (protocols if not proto else [proto])
+        if protocol in protocols
+    )
+
+
+# ------------------------------------------------------------------------------- #
+#                                  Helper functions                               #
+# ------------------------------------------------------------------------------- #
+
+
+def noiseOption(name: str) -> bool:
+    # timing templates (-T4) and verbosity / debug levels (-v, -vv, -d2)
+    if name[:2] == "-T":
+        return name[2:].isdigit() or name[2:] in TIMING_TEMPLATES
+    return name[:2] in ("-v", "-d") and (name[2:].isdigit() or set(name[2:]) <= {name[1]})
+
+
+def scannedProtocols(options: FrozenSet) -> FrozenSet[str]:
+    # port spec prefixes (T, U, S) of the protocols a scan probes
+    protocols = set()
+    if options & UDP_SCANS:
+        protocols.add("U")
+    if options & SCTP_SCANS:
+        protocols.add("S")
+    if options & TCP_SCANS or not protocols:
+        protocols.add("T")
+    return frozenset(protocols)
+
+
+def withoutPorts(additionalArgs: Optional[str]) -> str:
+    # drops "-p X" / "-pX" once the ports moved into the ports field
+    try:
+        tokens = shlex.split(additionalArgs or "")
+    except ValueError:
+        return additionalArgs or ""
+
+    kept, skipNext = [], False
+    for token in tokens:
+        if skipNext:
+            skipNext = False
+        elif token == "-p":
+            skipNext = True
+        elif not (token.startswith("-p") and not token.startswith("--")):
+            kept.append(token)
+
+    return " ".join(kept)
+
+
+def dedupReport(prefix: str = "") -> Dict[str, Dict[str, int]]:
+    with _statsLock:
+        return {node: dict(stats) for node, stats in dedupStats.items() if node.startswith(prefix)}
+
+
+def resetDedupStats(prefix: str = ""):
+    with _statsLock:
+        for node in [n for n in dedupStats if n.startswith(prefix)]:
+            del dedupStats[node]
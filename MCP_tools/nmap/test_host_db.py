@@ -0,0 +1,129 @@
+from MCP_tools.nmap.host_db import hostDB
+
+SCAN = {"target": "10.0.0.5", "scan_type": "-sV", "ports": "22,80", "additional_args": ""}
+
+
+def port(number, state="open", service="ssh", version="OpenSSH 8.9"):
+    return {
+        "port": number,
+        "protocol": "tcp",
+        "state": state,
+        "service": service,
+        "version": version,
+    }
+
+
+def record(ip="10.0.0.5", ports=(), scans=(), os_guess=None):
+    return {
+        "ip": ip,
+        "status": "alive",
+        "os_guess": os_guess,
+        "ports": list(ports),
+        "scans_performed": list(scans),
+    }
+
+
+def makeDB(tmp_path, maxAgeHours=24):
+    return hostDB(path=str(tmp_path / "hosts.sqlite"), maxAgeHours=maxAgeHours)
+
+
+def age(db, table, column, seconds):
+    db._conn.execute(f"UPDATE {table} SET {column} = {column} - ?", (seconds,))
+    db._conn.commit()
+
+
+def test_record_run_stores_hosts_and_reports_new_ones(tmp_path):
+    db = makeDB(tmp_path)
+
+    changes = db.recordRun(
+        runId="run-1",
+        records={"10.0.0.5": record(ports=[port(22)], scans=[SCAN])},
+        scanned=["10.0.0.5"],
+    )
+
+    assert changes == [{"ip": "10.0.0.5", "change": "new_host", "detail": "1 port(s)"}]
+    assert db.runChanges() == changes
+    assert db.hostRecord("10.0.0.5") == record(ports=[port(22)], scans=[SCAN])
+    assert db.stats()["scans"] == 1
+
+
+def test_diff_reports_port_and_service_changes(tmp_path):
+    db = makeDB(tmp_path)
+    db.recordRun(
+        runId="run-1",
+        records={"10.0.0.5": record(ports=[port(22), port(80, service="http", version="")])},
+        scanned=["10.0.0.5"],
+    )
+
+    changes = db.diff(
+        {
+            "10.0.0.5": record(
+                ports=[port(22, version="OpenSSH 9.6"), port(443, service="https", version="")],
+                os_guess="Linux 5.x",
+            )
+        }
+    )
+
+    assert [(c["change"], c["detail"]) for c in changes] == [
+        ("os_changed", "None -> Linux 5.x"),
+        ("port_added", "443/tcp open"),
+        ("port_removed", "80/tcp open"),
+        ("service_changed", "22/tcp ssh OpenSSH 8.9 -> ssh OpenSSH 9.6"),
+    ]
+
+
+def test_hosts_not_found_in_a_swept_network_are_gone(tmp_path):
+    db = makeDB(tmp_path)
+    db.recordRun(
+        runId="run-1",
+        records={ip: record(ip=ip) for ip in ("10.0.0.5", "10.0.1.5")},
+        scanned=["10.0.0.5", "10.0.1.5"],
+    )
+
+    changes = db.diff({}, networks=["10.0.0.0/24"])
+
+    assert changes == [
+        {"ip": "10.0.0.5", "change": "host_gone", "detail": "not discovered in this run"}
+    ]
+
+
+def test_only_complete_recent_runs_are_fresh(tmp_path):
+    db = makeDB(tmp_path, maxAgeHours=1)
+    db.recordRun(runId="run-1", records={"10.0.0.5": record()}, scanned=["10.0.0.5"])
+    db.recordRun(
+        runId="run-1",
+        records={"10.0.0.6": record(ip="10.0.0.6")},
+        scanned=["10.0.0.6"],
+        complete=False,
+    )
+    db.recordRun(runId="run-1", records={"10.0.0.7": record(ip="10.0.0.7")}, scanned=[])
+
+    assert db.isFresh("10.0.0.5")
+    assert not db.isFresh("10.0.0.6")
+    assert not db.isFresh("10.0.0.7")
+    assert not db.isFresh("10.0.0.8")
+
+    age(db, "hosts", "last_scanned", 7200)
+    assert not db.isFresh("10.0.0.5")
+
+
+def test_seeding_only_takes_over_fresh_scans(tmp_path):
+    stale = {**SCAN, "scan_type": "-sS", "ports": "-"}
+    db = makeDB(tmp_path, maxAgeHours=1)
+    db.recordRun(
+        runId="run-1",
+        records={"10.0.0.5": record(ports=[port(22)], scans=[stale])},
+        scanned=["10.0.0.5"],
+    )
+    age(db, "scans", "time", 7200)
+    db.recordRun(
+        runId="run-2",
+        records={"10.0.0.5": record(ports=[port(22)], scans=[SCAN])},
+        scanned=["10.0.0.5"],
+    )
+
+    seeded = db.hostRecord("10.0.0.5", freshScansOnly=True)
+
+    assert seeded["scans_performed"] == [SCAN]
+    assert seeded["ports"] == [port(22)]
+    assert db.hostRecord("10.0.0.5")["scans_performed"] == [stale, SCAN]
@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from MCP_tools.nmap.host_store import (
+    SERVICE_BITS,
+    VERSION_BITS,
+    hostStore,
+    packPort,
+    releaseStores,
+    trackStores,
+    unpackPort,
+)
+
+RECORD = {
+    "ip": "10.0.0.5",
+    "status": "alive",
+    "os_guess": "Linux 5.X",
+    "ports": [
+        {"port": 22, "protocol": "tcp", "state": "open", "service": "ssh", "version": "OpenSSH 8.9p1"},
+        {"port": 53, "protocol": "udp", "state": "open|filtered", "service": "domain", "version": None},
+    ],
+    "scans_performed": [{"target": "10.0.0.5", "scan_type": "-sV", "success": True}],
+}
+
+
+def test_pack_unpack_round_trip():
+    fields = (65535, 2, 7, (1 << SERVICE_BITS) - 1, (1 << VERSION_BITS) - 1)
+
+    assert unpackPort(packPort(*fields)) == fields
+
+
+def test_pack_rejects_ids_that_do_not_fit():
+    with pytest.raises(OverflowError):
+        packPort(80, 0, 1, 1 << SERVICE_BITS, 0)
+    with pytest.raises(OverflowError):
+        packPort(80, 0, 1, 0, 1 << VERSION_BITS)
+
+
+def test_record_round_trip_through_dump():
+    store = hostStore()
+    store.putRecord(RECORD)
+
+    loaded = hostStore.load(store.dump())
+
+    assert loaded.hostRecord(loaded.slotOf("10.0.0.5")) == RECORD
+
+
+def test_services_and_versions_use_separate_tables():
+    store = hostStore()
+    store.putRecord(RECORD)
+
+    assert store.services == ["", "ssh", "domain"]
+    assert "ssh" not in store.strings
+
+
+def test_put_record_replaces_a_host():
+    store = hostStore()
+    store.putRecord(RECORD)
+    store.putRecord({**RECORD, "ports": []})
+
+    assert len(store) == 1
+    assert store.hostRecord(0)["ports"] == []
+
+
+def test_handle_resolves_to_the_same_store():
+    store = hostStore()
+    store.putRecord(RECORD)
+    handle = store.handle()
+
+    assert hostStore.live(handle) is store
+    assert not handle.ips
+
+    store.release()
+    with pytest.raises(KeyError):
+        hostStore.live(handle)
+
+
+async def test_stores_of_a_run_are_released_together():
+    runStores = trackStores()
+    handles = [hostStore().handle() for _ in range(2)]
+
+    async def hostRun():
+        # tasks started by the run register into the same set
+        return hostStore().handle()
+
+    handles.append(await asyncio.create_task(hostRun()))
+    assert len(runStores) == 3
+
+    releaseStores(runStores)
+    for handle in handles:
+        with pytest.raises(KeyError):
+            hostStore.live(handle)
@@ -0,0 +1,95 @@
+import asyncio
+
+from MCP_tools.nmap import nmap_agent_ollamaV2 as agent
+from MCP_tools.nmap.host_db import hostDB
+
+
+class fakeGraph:
+    def __init__(self):
+        self.plans = {}
+
+    async def ainvoke(self, state, config=None):
+        for ip, memory in state["host_memory"].items():
+            self.plans[ip] = memory["plan"]
+        return state
+
+
+def setupPipeline(monkeypatch, batchSize):
+    batches, graph = [], fakeGraph()
+
+    async def planHosts(objective, batch):
+        batches.append([memory.ip for memory in batch])
+        for memory in batch:
+            memory.batch_planned = True
+            memory.plan = [agent.nmapPlanStep(description="scan", scan_type="-sV", target=memory.ip)]
+
+    monkeypatch.setattr(agent, "PLAN_BATCH_SIZE", batchSize)
+    monkeypatch.setattr(agent, "PLAN_BATCH_WINDOW", 0.01)
+    monkeypatch.setattr(agent, "planHosts", planHosts)
+    monkeypatch.setattr(agent, "getHostGraph", lambda: graph)
+
+    return agent.hostPipeline(objective="map the lab", maxIteration=10, maxParallel=2), batches, graph
+
+
+async def test_streamed_hosts_are_planned_in_batches(monkeypatch):
+    pipeline, batches, graph = setupPipeline(monkeypatch, batchSize=2)
+
+    for ip in ("10.0.0.5", "10.0.0.6"):
+        pipeline.start(agent.hostMemory(ip=ip))
+    await asyncio.sleep(0)
+    pipeline.start(agent.hostMemory(ip="10.0.0.7"))
+    pipeline.start(agent.hostMemory(ip="10.0.0.8"))
+
+    await pipeline.results()
+
+    assert batches == [["10.0.0.5", "10.0.0.6"], ["10.0.0.7", "10.0.0.8"]]
+    assert all(graph.plans[ip] for ip in ("10.0.0.5", "10.0.0.6", "10.0.0.7", "10.0.0.8"))
+
+
+async def test_a_lone_host_is_left_to_its_own_run(monkeypatch):
+    pipeline, batches, graph = setupPipeline(monkeypatch, batchSize=4)
+
+    pipeline.start(agent.hostMemory(ip="10.0.0.5"))
+    await pipeline.results()
+
+    assert batches == []
+    assert graph.plans["10.0.0.5"] is None
+
+
+async def test_no_batch_planning_when_disabled(monkeypatch):
+    pipeline, batches, graph = setupPipeline(monkeypatch, batchSize=1)
+
+    for ip in ("10.0.0.5", "10.0.0.6"):
+        pipeline.start(agent.hostMemory(ip=ip))
+    await pipeline.results()
+
+    assert batches == []
+
+
+def test_stored_ports_a_new_scan_does_not_report_are_removed(tmp_path):
+    db = hostDB(path=str(tmp_path / "hosts.sqlite"))
+    stored = {
+        "ip": "10.0.0.5",
+        "status": "alive",
+        "os_guess": None,
+        "ports": [
+            {"port": port, "protocol": "tcp", "state": "open", "service": None, "version": None}
+            for port in (22, 80, 3306)
+        ],
+        "scans_performed": [{"target": "10.0.0.5", "scan_type": "-sS", "ports": "22,80,3306"}],
+    }
+    db.recordRun(runId="run-1", records={"10.0.0.5": stored}, scanned=["10.0.0.5"])
+
+    memory = agent.memoryFromRecord(db.hostRecord("10.0.0.5", freshScansOnly=True))
+    memory.scans_performed.append(
+        {"target": "10.0.0.5", "scan_type": "-sV", "ports": "22,80", "success": True}
+    )
+    agent.mergePorts(memory, [agent.portInfo(port=22, state="open", service="ssh")])
+
+    record = agent.recordFromMemory(memory)
+
+    assert [port["port"] for port in record["ports"]] == [22, 3306]
+    assert [c["change"] for c in db.diff({"10.0.0.5": record})] == [
+        "port_removed",
+        "service_changed",
+    ]
@@ -0,0 +1,64 @@
+import asyncio
+
+from MCP_tools.nmap.scan_batcher import batchKey, scanBatcher, splitResult
+
+STDOUT = """Starting Nmap 7.94 ( https://nmap.org )
+Nmap scan report for 10.0.0.5
+Host is up (0.00041s latency).
+22/tcp open  ssh
+Nmap scan report for web.lab (10.0.0.6)
+Host is up (0.00052s latency).
+80/tcp open  http
+Nmap done: 3 IP addresses (2 hosts up) scanned in 4.10 seconds"""
+
+
+def call(target, scanType="-sV", ports="22,80"):
+    return {"target": target, "scan_type": scanType, "ports": ports, "additional_args": ""}
+
+
+def test_split_result_gives_each_target_its_block():
+    parts = splitResult({"stdout": STDOUT, "success": True}, ["10.0.0.5", "web.lab", "10.0.0.7"])
+
+    first = parts["10.0.0.5"]["stdout"]
+    assert "22/tcp open  ssh" in first
+    assert "80/tcp" not in first
+    assert first.startswith("Starting Nmap") and first.endswith("scanned in 4.10 seconds")
+
+    assert "80/tcp open  http" in parts["web.lab"]["stdout"]
+    assert "Nmap scan report" not in parts["10.0.0.7"]["stdout"]
+    assert parts["10.0.0.7"]["success"] is True
+
+
+def test_split_result_marks_unreported_hosts_of_a_timed_out_run():
+    result = {"stdout": STDOUT, "success": True, "timed_out": True}
+
+    parts = splitResult(result, ["10.0.0.5", "10.0.0.7"])
+
+    assert parts["10.0.0.5"]["success"] is True
+    assert parts["10.0.0.7"]["success"] is False
+    assert "10.0.0.7" in parts["10.0.0.7"]["stderr"]
+
+
+def test_batch_key_only_merges_single_hosts():
+    assert batchKey(call("10.0.0.5")) == batchKey(call("10.0.0.6", ports="80,22"))
+    assert batchKey(call("10.0.0.5")) != batchKey(call("10.0.0.6", scanType="-sS"))
+
+    for target in ("10.0.0.0/24", "10.0.0.1-20", "10.0.0.5 10.0.0.6", ""):
+        assert batchKey(call(target)) is None
+
+
+async def test_compatible_scans_share_one_run():
+    targets = []
+
+    async def scan(input):
+        targets.append(input.target)
+        return {"stdout": STDOUT, "success": True}
+
+    batcher = scanBatcher(scan=scan, window=0.01, maxTargets=8)
+    first, second = await asyncio.gather(
+        batcher.submit(call("10.0.0.5")), batcher.submit(call("web.lab"))
+    )
+
+    assert targets == ["10.0.0.5 web.lab"]
+    assert "22/tcp" in first["stdout"] and "80/tcp" not in first["stdout"]
+    assert "80/tcp" in second["stdout"]
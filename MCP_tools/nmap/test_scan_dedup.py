@@ -0,0 +1,107 @@
+from MCP_tools.nmap.scan_dedup import (
+    canonicalOptions,
+    formatPortSpec,
+    parsePortSpec,
+    reduceScan,
+    scannedPorts,
+    withoutPorts,
+)
+
+TARGET = "10.0.0.5"
+
+
+def scan(scanType="-sV", ports="", additionalArgs="", success=True):
+    return {
+        "target": TARGET,
+        "scan_type": scanType,
+        "ports": ports,
+        "additional_args": additionalArgs,
+        "success": success,
+    }
+
+
+def test_port_spec_round_trip():
+    ports = parsePortSpec("80,22,1000-1002,U:53")
+
+    assert ports == {("", 22), ("", 80), ("", 1000), ("", 1001), ("", 1002), ("U", 53)}
+    assert parsePortSpec(formatPortSpec(ports)) == ports
+    assert formatPortSpec(ports) == "22,80,1000-1002,U:53"
+
+
+def test_port_spec_unknown_syntax():
+    assert parsePortSpec("") is None
+    assert parsePortSpec("http,ssh") is None
+
+
+def test_equivalent_options_are_canonical():
+    assert canonicalOptions("-sCV -T4", "-v")[0] == canonicalOptions("-sV -sC", "")[0]
+    assert canonicalOptions("-A", "")[0] == canonicalOptions("-sV -sC -O --traceroute", "")[0]
+
+
+def test_covered_scan_is_skipped():
+    performed = [scan(ports="22,80,443")]
+
+    assert reduceScan(scan(ports="443,80"), performed) is None
+
+
+def test_partly_covered_scan_is_shrunk():
+    performed = [scan(ports="22,80")]
+
+    result = reduceScan(scan(ports="22,80,443"), performed)
+
+    assert result["ports"] == "443"
+
+
+def test_shrunk_scan_drops_ports_from_scan_type():
+    performed = [scan(scanType="-sCV", ports="22,80")]
+
+    result = reduceScan(scan(scanType="-sCV -p 22,80,443"), performed)
+
+    assert result["ports"] == "443"
+    assert result["scan_type"] == "-sCV"
+    assert "-p" not in result["additional_args"]
+
+
+def test_failed_scans_do_not_cover():
+    performed = [scan(ports="22,80", success=False)]
+    call = scan(ports="22,80")
+
+    assert reduceScan(call, performed) is call
+
+
+def test_different_options_do_not_cover():
+    performed = [scan(scanType="-sS", ports="22")]
+    call = scan(scanType="-sV", ports="22")
+
+    assert reduceScan(call, performed) is call
+
+
+def test_without_ports():
+    assert withoutPorts("-p 22,80 --open -p443 -Pn") == "--open -Pn"
+
+
+def test_full_range_covers_default_ports():
+    performed = [scan(scanType="-sS", ports="-")]
+
+    assert reduceScan(scan(scanType="-sS"), performed) is None
+
+
+def test_full_tcp_range_does_not_cover_a_udp_scan():
+    performed = [scan(scanType="-sS -sU", ports="T:1-65535")]
+    call = scan(scanType="-sS -sU")
+
+    assert reduceScan(call, performed) is call
+
+    performed.append(scan(scanType="-sS -sU", ports="U:1-65535"))
+    assert reduceScan(call, performed) is None
+
+
+def test_scanned_ports_follow_the_scan_protocols():
+    assert scannedPorts(scan(ports="22,U:53")) == {("T", 22)}
+    assert scannedPorts(scan(scanType="-sS -sU", ports="22,U:53")) == {
+        ("T", 22),
+        ("U", 22),
+        ("U", 53),
+    }
+    assert scannedPorts(scan()) is None
+    assert scannedPorts(scan(scanType="-sn", ports="22")) is None
@@ -4,7 +4,6 @@ from typing import Optional, Dict, List, Any, Literal
 import asyncio
 import os
 from dotenv import load_dotenv
-from langchain_ollama import ChatOllama
 from langgraph.checkpoint.memory import InMemorySaver
 import json
 import logging
@@ -12,31 +11,154 @@ from pathlib import Path
 
 load_dotenv()
 
-from MCP_tools.sqlmap.sqlmap_tool import sqlmap_scan, sqlmapConfig
+from MCP_tools.sqlmap.sqlmap_tool import sqlmap_scan, sqlmapConfig, VALID_TAMPER
+from MCP_tools.argument_catalog import SQLMAP_CATALOG, getCatalog, validateSqlmapSelection
+from LLM_tools.llm_factory import warmModel
+from LLM_tools.llm_calls import invokeStructured, structuredReport
+from LLM_tools.model_router import latencyReport
+from LLM_tools.llm_scheduler import schedulerReport
+from LLM_tools.llm_metrics import startRun, summaryTable
+from LLM_tools.context_compaction import compactSqlmapOutput, toolResultDict
+from LLM_tools.prompt_layout import layoutPrompt
+from LLM_tools.speculation import getSpeculator, speculationReport
+from LLM_tools.batch_planning import PLAN_BATCH_SIZE, planBatch, batchReport
+from LLM_tools.graph_render import renderGraph
+from LLM_tools.agent_logging import setupLogging
+from LLM_tools.artifact_store import storeOutput
+from LLM_tools.fast_paths import (
+    sqlmapVerdict,
+    recordDecision,
+    fastPathReport,
+    resetFastPathStats,
+)
 
 # ------------------------------------------------------------------------------- #
-#                                  LLM setup                                      #
+#                                       Config                                    #
 # ------------------------------------------------------------------------------- #
 
-LM_API = os.getenv(key="OLLAMA_API", default="http://127.0.0.1:11434")
+logDir = Path("MCP_tools/sqlmap/logs")
 
-llm = ChatOllama(
-    model="huihui_ai/qwen3-abliterated:8b",
-    base_url=LM_API,
-    temperature=0.2,
-    format=None,
-)
+_agentGraph = None
+
+# ------------------------------------------------------------------------------- #
+#                                      Prompts                                    #
+# ------------------------------------------------------------------------------- #
 
-finalAgent = llm.bind_tools([sqlmap_scan])
+# static prompt prefixes - dynamic state is appended after them by layoutPrompt so
+# Ollama can reuse the cached prefix between calls
 
-# log count
-logDir = Path("MCP_tools/sqlmap/logs")
+PLANNING_PROMPT = """
+You are an autonomous SQL injection agent.
+
+Create a plan for the attack vector given in the current context.
+
+You MUST always create TWO steps:
+1. detection phase
+2. exploitation phase
+
+Exploitation phase must use the same parameters but marked as phase="exploitation".
+
+STRICT RULES:
+1. Do NOT construct URLs.
+2. Do NOT include parameter values.
+3. Only specify parameter NAMES to test.
+4. Do NOT include SQL payloads.
+5. SQLMap performs injection automatically.
+
+IMPORTANT:
+You are working on ONLY this single endpoint.
+Do NOT consider any other endpoints.
+Do NOT reference other attack vectors.
+
+Return JSON:
+- reasoning
+- steps: list of
+    - description
+    - target_url
+    - method
+    - params
+    - phase
+
+Return ONLY valid JSON matching the schema.
+"""
+
+BATCH_PLANNING_PROMPT = """
+You are an autonomous SQL injection agent.
+
+Create a separate plan for EVERY attack vector listed in the current context.
+
+Every plan MUST have TWO steps:
+1. detection phase
+2. exploitation phase
+
+Exploitation phase must use the same parameters but marked as phase="exploitation".
+
+STRICT RULES:
+1. Do NOT construct URLs.
+2. Do NOT include parameter values.
+3. Only specify parameter NAMES of the plan's own vector.
+4. Do NOT include SQL payloads.
+5. SQLMap performs injection automatically.
+
+Return exactly one plan per listed vector, identified by its endpoint and method.
 
-logCount = 0
-for log in os.listdir(logDir):
-    if os.path.isfile(os.path.join(logDir, log)):
-        logCount += 1
+Return JSON:
+- plans: list of
+    - endpoint
+    - method
+    - reasoning
+    - steps: list of
+        - description
+        - method
+        - params
+        - phase
 
+Return ONLY valid JSON matching the schema.
+"""
+
+SELECT_ACTION_PROMPT = """
+You select sqlmap options for the current plan step given in the current context.
+
+IMPORTANT:
+Do NOT modify parameter values.
+Do NOT inject payloads manually.
+Always return clean URL with normal parameter values.
+sqlmap will handle injection automatically.
+
+Decide:
+- which options are appropriate
+- do NOT escalate risk without reason
+- prefer minimal detection first
+- explain reasoning
+
+Rules:
+- Start with safe detection.
+- Escalate only if confidence < 0.5.
+- High risk exploitation allowed only if vulnerability confirmed.
+"""
+
+ANALYZE_PROMPT = """
+You analyze a sqlmap tool result given in the current context.
+
+You MUST analyze ONLY what is explicitly present in the tool result.
+
+If the tool result does not explicitly mention:
+- injectable
+- SQL injection
+- parameter is vulnerable
+- dbms fingerprint
+
+Then you MUST return:
+vulnerability_found = false
+confidence = 0.0
+reasoning = "No explicit SQL injection evidence found."
+
+Return JSON:
+- vulnerability_found
+- exploitation_possible
+- confidence (0-1)
+- reasoning
+"""
 
 # ------------------------------------------------------------------------------- #
 #                                 Custom agent state                              #
@@ -60,6 +182,21 @@ class agentPlanOutput(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
 
+class agentVectorPlan(BaseModel):
+    endpoint: str = Field(default="")
+    method: Literal["GET", "POST"]
+    reasoning: str = Field(default="")
+    steps: List[agentPlanStep] = Field(default_factory=list)
+
+    model_config = ConfigDict(extra="forbid")
+
+
+class agentBatchPlan(BaseModel):
+    plans: List[agentVectorPlan] = Field(default_factory=list)
+
+    model_config = ConfigDict(extra="forbid")
+
+
 class sqlmapToolSelection(BaseModel):
     url: str
     method: str
@@ -96,6 +233,9 @@ class attackVectorMemory(BaseModel):
         default=[], description="Formulated plan for the given attack vector."
     )
     step_index: int = Field(default=0)
+    batch_planned: bool = Field(
+        default=False, description="Vector was already part of a batch planning request."
+    )
 
     selected_command: Optional[sqlmapToolSelection] = Field(default=None)
     last_tool_result: Optional[Any] = Field(default=None)
@@ -129,9 +269,6 @@ class sqlmapAgentState(BaseModel):
 
     decision: Optional[str] = Field(default=None)
 
-    # logging
-    agent_log: List[str] = Field(default_factory=list)
-
 
 # ------------------------------------------------------------------------------- #
 #                                 Agent nodes                                     #
@@ -152,74 +289,48 @@ async def planningNode(state: sqlmapAgentState):
         )
         return {"decision": "continue"}
 
-    print("\n[PLANNING]\n")
-
-    prompt = f"""
-    You are an autonomous SQL injection agent.
-
-    Objective:
-    {state.objective}
-
-    Attack vector:
-    Endpoint: {currentMemory.vector_data['endpoint']}
-    Method: {currentMemory.vector_data['method']}
-    Parameters: {currentMemory.vector_data['params']}
-    
-    You MUST always create TWO steps:
-    1. detection phase
-    2. exploitation phase
-
-    Exploitation phase must use the same parameters but marked as phase="exploitation".
-
-    STRICT RULES:
-    1. Do NOT construct URLs.
-    2. Do NOT include parameter values.
-    3. Only specify parameter NAMES to test.
-    4. Do NOT include SQL payloads.
-    5. SQLMap performs injection automatically.
-    
-    IMPORTANT:
-    You are working on ONLY this single endpoint.
-    Do NOT consider any other endpoints.
-    Do NOT reference other attack vectors.
-
-    Return JSON:
-    - reasoning
-    - steps: list of
-        - description
-        - target_url
-        - method
-        - params
-        - phase
-    
-    Return ONLY valid JSON matching the schema.
-    """
 
-    retries = 2
+    # one request for this vector and the next unplanned ones, leftovers are planned alone;
+    # a replan of a vector that already has a plan always goes through the single prompt
+    if (
+        PLAN_BATCH_SIZE > 1
+        and not currentMemory.plan
+        and await planVectorBatch(state=state, current=currentMemory)
+    ):
+        log_data(state=state, message=f"[PLANNING NODE] -> exit node (plan created in batch)")
+        return {"vectors_memory": state.vectors_memory, "decision": "continue"}
 
-    for attempt in range(retries):
+    prompt = planningPrompt(state=state, memory=currentMemory)
+    vectorKey = vectorMemoryKey(currentMemory.vector_data)
 
-        try:
-            outputPlan = await llm.with_structured_output(agentPlanOutput).ainvoke(
-                prompt
+    # generation is schema constrained, invalid output is retried inside invokeStructured
+    try:
+        # plan (and first action) prepared while the previous vector was being tested
+        speculative = await getSpeculator().take(slot=f"sqlmap.plan:{vectorKey}", key=prompt)
+
+        if speculative:
+            outputPlan, selectPrompt, selection = speculative
+            if selection:
+                getSpeculator().offer(
+                    slot=f"sqlmap.select_action:{vectorKey}", key=selectPrompt, value=selection
+                )
+        else:
+            outputPlan = await invokeStructured(
+                node="sqlmap.planning_node", prompt=prompt, schema=agentPlanOutput
             )
 
-            log_data(state, f"[PLANNING]: {outputPlan.reasoning}")
-
-            currentMemory.plan = outputPlan.steps
-            currentMemory.step_index = 0
-            log_data(state=state, message=f"[PLANNING NODE] -> exit node")
-            return {"vectors_memory": state.vectors_memory, "decision": "continue"}
+        log_data(state, f"[PLANNING]: {outputPlan.reasoning}")
 
-        except Exception as e:
+        currentMemory.plan = outputPlan.steps
+        currentMemory.step_index = 0
+        log_data(state=state, message=f"[PLANNING NODE] -> exit node")
+        return {"vectors_memory": state.vectors_memory, "decision": "continue"}
 
-            print(f"[PLANNING ERROR] Attempt {attempt+1}")
-            print("Raw LLM output:")
-            print(e.llm_output)
-
-            log_data(state, f"Planning JSON parse failed attempt {attempt+1}")
+    except Exception as e:
 
-            prompt += "\n\nWARNING: Your previous output was not valid JSON. Return ONLY raw JSON. No explanations."
+        logging.getLogger("sqlmap_agent").warning(
+            "[PLANNING ERROR] %s, raw LLM output: %s", e, getattr(e, "llm_output", "")
+        )
 
     log_data(state, "Planning failed after retries.")
 
@@ -232,13 +343,8 @@ async def planningNode(state: sqlmapAgentState):
 async def selectActionNode(state: sqlmapAgentState):
     log_data(state=state, message=f"[SELECT ACTION NODE] -> enter node")
 
-    with open("MCP_tools\sqlmap\sqlmap_allowed_arguments.json") as f:
-        allowedArguments = f.read()
-
     currentMemory = getCurrentVector(state=state)
-    vector = currentMemory.vector_data
 
-    print("\n[SELECT_ACTION]\n")
 
     if currentMemory.step_index >= len(currentMemory.plan):
         log_data(
@@ -246,46 +352,15 @@ async def selectActionNode(state: sqlmapAgentState):
         )
         return {"decision": "replan"}
 
-    step = currentMemory.plan[currentMemory.step_index]
+    prompt = selectActionPrompt(state=state, memory=currentMemory)
 
-    prompt = f"""
-    Objective: {state.objective}
-
-    Current attack vector:
-    Endpoint: {currentMemory.vector_data['endpoint']}
-    Method: {currentMemory.vector_data['method']}
-    Parameters: {currentMemory.vector_data['params']}
-
-    Current plan step:
-    Description: {step.description}
-    Phase: {step.phase}
-    Parameters under test: {step.params}
-
-    Previous analysis:
-    {currentMemory.analysis.reasoning if currentMemory.analysis else "None"}
-
-    Available sqlmap options:
-    {allowedArguments}
-    
-    IMPORTANT:
-    Do NOT modify parameter values.
-    Do NOT inject payloads manually.
-    Always return clean URL with normal parameter values.
-    sqlmap will handle injection automatically.
-
-    Decide:
-    - which options are appropriate
-    - do NOT escalate risk without reason
-    - prefer minimal detection first
-    - explain reasoning
-    
-    Rules:
-    - Start with safe detection.
-    - Escalate only if confidence < 0.5.
-    - High risk exploitation allowed only if vulnerability confirmed.
-    """
-
-    selection = await llm.with_structured_output(sqlmapToolSelection).ainvoke(prompt)
+    selection = await getSpeculator().take(
+        slot=f"sqlmap.select_action:{vectorMemoryKey(currentMemory.vector_data)}", key=prompt
+    )
+    if selection is None:
+        selection = await invokeStructured(
+            node="sqlmap.select_action_node", prompt=prompt, schema=sqlmapToolSelection
+        )
 
     # print("\n[SELECT REASONING]")
     # print(selection.reasoning)
@@ -302,7 +377,6 @@ async def selectActionNode(state: sqlmapAgentState):
 
 
 async def toolExecutionNode(state: sqlmapAgentState):
-    print("\n[EXECUTE TOOL]\n")
     log_data(state=state, message="[EXECUTE TOOL] -> enter node")
     currentMemory = getCurrentVector(state=state)
 
@@ -310,7 +384,21 @@ async def toolExecutionNode(state: sqlmapAgentState):
         log_data(state=state, message="[EXECUTE TOOL] -> exit node (replan needed!)")
         return {"decision": "replan"}
 
-    selection = currentMemory.selected_command
+    # selections outside the allowed arguments are rejected here instead of failing on Kali
+    fields, errors = validateSqlmapSelection(
+        currentMemory.selected_command.model_dump(), tampers=VALID_TAMPER
+    )
+    if errors:
+        log_data(state=state, message=f"[EXECUTE TOOL] -> exit node (selection rejected: {errors})")
+        currentMemory.last_tool_result = {
+            "stdout": "",
+            "stderr": f"Tool call rejected before execution: {'; '.join(errors)}",
+            "success": False,
+        }
+        return {"vectors_memory": state.vectors_memory}
+
+    selection = currentMemory.selected_command.model_copy(update=fields)
+    currentMemory.selected_command = selection
 
     config_payload = {
         "level": selection.level or 1,
@@ -363,8 +451,10 @@ async def toolExecutionNode(state: sqlmapAgentState):
     if selection.method != "POST":
         tool_payload["data"] = ""
 
-    print(f"\n[TOOL PAYLOAD]\n{tool_payload}")
-    log_data(state, f"[TOOL PAYLOAD]: {str(tool_payload)}")
+    log_data(state, "[TOOL PAYLOAD]: %s", tool_payload)
+
+    # the model would be idle during the scan - prepare the next vector in the meantime
+    speculateNextVector(state=state)
 
     try:
         rawOutput = await sqlmap_scan(
@@ -379,16 +469,16 @@ async def toolExecutionNode(state: sqlmapAgentState):
             "success": False,
         }
 
-    print(f"\n[LAST RAW TOOL RESULT]\n{rawOutput}")
+    logging.getLogger("sqlmap_agent").debug("[LAST RAW TOOL RESULT] %s", rawOutput)
 
-    currentMemory.last_tool_result = rawOutput
+    # the state only keeps a reference, the output itself goes to the artifact store
+    currentMemory.last_tool_result = storeOutput(toolResultDict(rawOutput))
 
     log_data(state=state, message="[EXECUTE TOOL] -> exit node")
     return {"vectors_memory": state.vectors_memory}
 
 
 async def analyzeNode(state: sqlmapAgentState):
-    print("\n[ANALYZE]\n")
     log_data(state=state, message="[ANALYZE] -> enter node")
 
     # print(f"\n[LAST TOOL RESULT]\n{state.last_tool_result}")
@@ -410,42 +500,38 @@ async def analyzeNode(state: sqlmapAgentState):
         log_data(state=state, message="[ANALYZE] -> exit node")
         return {"vectors_memory": state.vectors_memory}
 
-    prompt = f"""
-    Objective:
-    {state.objective}
-
-    Tool result:
-    {toolResult}
-    
-    Vector context:
-    Endpoint: {currentMemory.vector_data['endpoint']}
-    Method: {currentMemory.vector_data['method']}
-    Parameter under test: {currentMemory.plan[currentMemory.step_index].params}
-
-    You MUST analyze ONLY what is explicitly present in the tool result.
-
-    If the tool result does not explicitly mention:
-    - injectable
-    - SQL injection
-    - parameter is vulnerable
-    - dbms fingerprint
-
-    Then you MUST return:
-    vulnerability_found = false
-    confidence = 0.0
-    reasoning = "No explicit SQL injection evidence found."
-
-    Return JSON:
-    - vulnerability_found
-    - exploitation_possible
-    - confidence (0-1)
-    - reasoning
-    """
+    # conclusive sqlmap verdicts do not need the model
+    verdict = sqlmapVerdict(toolResult)
+    recordDecision(node="sqlmap.analyze_node", byRule=verdict is not None)
+
+    if verdict:
+        feedback = agentFeedback(**verdict)
+        log_data(state=state, message=f"[ANALYZE] -> fast path: {feedback.reasoning}")
+
+        currentMemory.analysis = feedback
+        currentMemory.confidence = feedback.confidence
+        log_data(state=state, message="[ANALYZE] -> exit node")
+        return {"vectors_memory": state.vectors_memory}
+
+    prompt = layoutPrompt(
+        static=ANALYZE_PROMPT,
+        dynamic={
+            "Objective": state.objective,
+            "Vector context": (
+                f"Endpoint: {currentMemory.vector_data['endpoint']}\n"
+                f"Method: {currentMemory.vector_data['method']}\n"
+                f"Parameter under test: {currentMemory.plan[currentMemory.step_index].params}"
+            ),
+            "Tool result": compactSqlmapOutput(toolResult),
+        },
+    )
 
     # response = await llm.ainvoke(prompt)
     # feedback = agentFeedback.model_validate_json(response.content)
 
-    feedback = await llm.with_structured_output(agentFeedback).ainvoke(prompt)
+    feedback = await invokeStructured(
+        node="sqlmap.analyze_node", prompt=prompt, schema=agentFeedback
+    )
     # print(f"Feedback:\n {feedback.reasoning}")
     # print(f"Confidence: {feedback.confidence}")
 
@@ -461,7 +547,6 @@ async def analyzeNode(state: sqlmapAgentState):
 
 
 async def evaluateNode(state: sqlmapAgentState):
-    print("\n[EVALUATE]\n")
 
     log_data(state=state, message="[EVALUATE] -> enter node")
 
@@ -592,65 +677,163 @@ def planningNodeRouting(state: sqlmapAgentState):
 
 
 def setupLogger():
-    logFile = logDir / f"sqlmap_agent_log{logCount}.log"
-    logger = logging.getLogger("sqlmap_agent")
-    logger.setLevel(logging.INFO)
+    # handlers live for the whole process, every run logs into the same rotating file
+    return setupLogging(agent="sqlmap", logDir=logDir)
 
-    fileHandler = logging.FileHandler(logFile, mode="w")
-    format = logging.Formatter("%(asctime)s | %(levelname)s | %(message)s")
-    fileHandler.setFormatter(format)
-    logger.addHandler(fileHandler)
 
-    return logger
+def log_data(state, message: str, *args):
+    logging.getLogger("sqlmap_agent").info(message, *args)
 
 
-def log_data(state, message: str):
-    state.agent_log.append(message)
-    logging.getLogger("sqlmap_agent").info(message)
+def vectorContext(vector: Dict[str, Any]) -> str:
+    return (
+        f"Endpoint: {vector['endpoint']}\n"
+        f"Method: {vector['method']}\n"
+        f"Parameters: {vector['params']}"
+    )
 
 
-def getCurrentVector(state: sqlmapAgentState) -> attackVectorMemory:
-    if state.vector_index >= len(state.attack_vectors):
-        return None
+def vectorMemoryKey(vector: Dict[str, Any]) -> str:
+    return f"{vector['endpoint']}::{vector['method']}"
 
-    vector = state.attack_vectors[state.vector_index]
 
-    key = f"{vector['endpoint']}::{vector['method']}"
+def readAllowedArguments() -> str:
+    return getCatalog(SQLMAP_CATALOG).text
 
-    return state.vectors_memory.get(key)
 
+def planningPrompt(state: sqlmapAgentState, memory: attackVectorMemory) -> str:
+    return layoutPrompt(
+        static=PLANNING_PROMPT,
+        dynamic={
+            "Objective": state.objective,
+            "Attack vector": vectorContext(memory.vector_data),
+        },
+    )
 
-# ------------------------------------------------------------------------------- #
-#                                    Graph                                        #
-# ------------------------------------------------------------------------------- #
 
+async def planVectorBatch(state: sqlmapAgentState, current: attackVectorMemory) -> bool:
+    # current vector first, then the following vectors that were never planned
+    batch = []
+    for vector in state.attack_vectors[state.vector_index :]:
+        memory = state.vectors_memory.get(vectorMemoryKey(vector))
+        if memory and not memory.plan and not memory.batch_planned:
+            batch.append(memory)
+        if len(batch) >= PLAN_BATCH_SIZE:
+            break
+
+    if len(batch) < 2:
+        return False
+
+    prompt = layoutPrompt(
+        static=BATCH_PLANNING_PROMPT,
+        dynamic={
+            "Objective": state.objective,
+            "Attack vectors": "\n\n".join(
+                vectorContext(memory.vector_data) for memory in batch
+            ),
+        },
+    )
 
-async def agentRunner(endpoints):
-    agentState = sqlmapAgentState()
-    logger = setupLogger()
+    paramsByKey = {
+        vectorMemoryKey(memory.vector_data): set(memory.vector_data["params"])
+        for memory in batch
+    }
 
-    workflow = StateGraph(sqlmapAgentState)
-    SESSION_ID = "default_session"
+    plans = await planBatch(
+        node="sqlmap.batch_planning_node",
+        prompt=prompt,
+        schema=agentBatchPlan,
+        keys=list(paramsByKey),
+        itemKey=lambda plan: f"{plan.endpoint.strip()}::{plan.method}",
+        # both phases, and only parameters of the plan's own vector
+        itemValid=lambda plan: len(plan.steps) >= 2
+        and all(
+            set(step.params) <= paramsByKey.get(f"{plan.endpoint.strip()}::{plan.method}", set())
+            for step in plan.steps
+        ),
+    )
 
-    # test initial prompt
-    agentState.objective = "Analyze given attack vectors."
+    for memory in batch:
+        key = vectorMemoryKey(memory.vector_data)
+        memory.batch_planned = True
+        if key in plans:
+            memory.plan = plans[key].steps
+            memory.step_index = 0
+            log_data(state, f"[PLANNING] batch plan for {key}: {plans[key].reasoning}")
+
+    # True only when the vector the planning node works on got its plan
+    return vectorMemoryKey(current.vector_data) in plans
+
+
+def selectActionPrompt(state: sqlmapAgentState, memory: attackVectorMemory) -> str:
+    step = memory.plan[memory.step_index]
+
+    return layoutPrompt(
+        static=[SELECT_ACTION_PROMPT, f"Available sqlmap options:\n{readAllowedArguments()}"],
+        dynamic={
+            "Objective": state.objective,
+            "Current attack vector": vectorContext(memory.vector_data),
+            "Current plan step": (
+                f"Description: {step.description}\n"
+                f"Phase: {step.phase}\n"
+                f"Parameters under test: {step.params}"
+            ),
+            "Previous analysis": memory.analysis.reasoning if memory.analysis else None,
+        },
+    )
 
-    # prepare attack vectors - filter out vectors without parameters
-    for vector in endpoints:
-        if len(vector.get("params", [])) > 0:
-            agentState.attack_vectors.append(vector)
 
-            key = f"{vector['endpoint']}::{vector['method']}"
+def speculateNextVector(state: sqlmapAgentState):
+    # plan + first action of the next vector do not depend on the running scan
+    nextIndex = state.vector_index + 1
+    if nextIndex >= len(state.attack_vectors):
+        return
 
-            agentState.vectors_memory[key] = attackVectorMemory(vector_data=vector)
+    vectorKey = vectorMemoryKey(state.attack_vectors[nextIndex])
+    nextMemory = state.vectors_memory.get(vectorKey)
+    if not nextMemory or nextMemory.plan:
+        return
 
-            print(f"[VALID ATTACK VECTOR]:\n\n {vector}")
+    # snapshot, the real nodes keep working on the graph state
+    snapshot = nextMemory.model_copy(deep=True)
+    prompt = planningPrompt(state=state, memory=snapshot)
 
-    log_data(
-        state=agentState,
-        message=f"[PREPARING] - Number of valid attack vectors to analyse: {len(agentState.vectors_memory)}",
+    async def prepareVector():
+        outputPlan = await invokeStructured(
+            node="sqlmap.planning_node", prompt=prompt, schema=agentPlanOutput
+        )
+        if not outputPlan.steps:
+            return outputPlan, None, None
+
+        snapshot.plan = outputPlan.steps
+        snapshot.step_index = 0
+        selectPrompt = selectActionPrompt(state=state, memory=snapshot)
+        selection = await invokeStructured(
+            node="sqlmap.select_action_node", prompt=selectPrompt, schema=sqlmapToolSelection
+        )
+        return outputPlan, selectPrompt, selection
+
+    getSpeculator().launch(
+        slot=f"sqlmap.plan:{vectorKey}", key=prompt, factory=prepareVector
     )
-    # agentState.attack_vectors = endpoints
+
+
+def getCurrentVector(state: sqlmapAgentState) -> attackVectorMemory:
+    if state.vector_index >= len(state.attack_vectors):
+        return None
+
+    vector = state.attack_vectors[state.vector_index]
+
+    return state.vectors_memory.get(vectorMemoryKey(vector))
+
+
+# ------------------------------------------------------------------------------- #
+#                                    Graph                                        #
+# ------------------------------------------------------------------------------- #
+
+
+def buildWorkflow() -> StateGraph:
+    workflow = StateGraph(sqlmapAgentState)
 
     # -------------------------------
     # graph nodes
@@ -690,20 +873,78 @@ async def agentRunner(endpoints):
     )
     workflow.add_edge("output_node", END)
 
-    checkpointer = InMemorySaver()
-    graph = workflow.compile(checkpointer=checkpointer)
+    return workflow
+
+
+def getAgentGraph():
+    # compiled once per process; every run uses its own checkpointer thread
+    global _agentGraph
+
+    if _agentGraph is None:
+        _agentGraph = buildWorkflow().compile(checkpointer=InMemorySaver())
+        renderGraph(_agentGraph, "MCP_tools/sqlmap/sqlmap_agent_graph.png")
+
+    return _agentGraph
+
 
-    # display workflow
-    pngBytes = graph.get_graph().draw_mermaid_png()
-    pngPath = "MCP_tools\sqlmap\sqlmap_agent_graph.png"
+async def agentRunner(endpoints):
+    agentState = sqlmapAgentState()
+    logger = setupLogger()
+    runId = startRun(name="sqlmap")
+    await asyncio.to_thread(warmModel)
+    resetFastPathStats(prefix="sqlmap.")
+
+    # test initial prompt
+    agentState.objective = "Analyze given attack vectors."
 
-    with open(pngPath, "wb") as f:
-        f.write(pngBytes)
+    # prepare attack vectors - filter out vectors without parameters
+    for vector in endpoints:
+        if len(vector.get("params", [])) > 0:
+            agentState.attack_vectors.append(vector)
 
-    await graph.ainvoke(
-        agentState.model_dump(),
-        config={"thread_id": SESSION_ID, "recursion_limit": 1000},
+            key = vectorMemoryKey(vector)
+
+            agentState.vectors_memory[key] = attackVectorMemory(vector_data=vector)
+
+            log_data(agentState, "[VALID ATTACK VECTOR]: %s", vector)
+
+    log_data(
+        state=agentState,
+        message=f"[PREPARING] - Number of valid attack vectors to analyse: {len(agentState.vectors_memory)}",
+    )
+    # agentState.attack_vectors = endpoints
+
+    graph = getAgentGraph()
+
+    try:
+        await graph.ainvoke(
+            agentState.model_dump(),
+            config={"thread_id": runId, "recursion_limit": 1000},
+        )
+    finally:
+        # checkpoints of finished runs would pile up in the shared checkpointer
+        graph.checkpointer.delete_thread(runId)
+
+    logging.getLogger("sqlmap_agent").info(
+        f"[FAST PATH] decisions per node: {fastPathReport(prefix='sqlmap.')}"
+    )
+    logging.getLogger("sqlmap_agent").info(
+        f"[STRUCTURED OUTPUT] calls/failures/retries per node: {structuredReport()}"
+    )
+    logging.getLogger("sqlmap_agent").info(
+        f"[MODEL ROUTER] latency per node and model: {latencyReport()}"
+    )
+    logging.getLogger("sqlmap_agent").info(
+        f"[LLM SCHEDULER] queue wait / generation per node: {schedulerReport()}"
+    )
+    logging.getLogger("sqlmap_agent").info(
+        f"[BATCH PLANNING] planned/fallback per node: {batchReport(prefix='sqlmap.')}"
+    )
+    getSpeculator().discard(prefix="sqlmap.")
+    logging.getLogger("sqlmap_agent").info(
+        f"[SPECULATION] used/discarded per slot: {speculationReport(prefix='sqlmap.')}"
     )
+    logging.getLogger("sqlmap_agent").info(summaryTable())
 
 
 # ------------------------------------------------------------------------------- #
@@ -714,7 +955,8 @@ if __name__ == "__main__":
     print("#" + "-" * 10 + "SQLmap_agent_test" + 10 * "-" + "#\n")
     print("type 'exit' to close the conversation\n")
 
-    with open("MCP_tools\gobuster\crawler_test_dump3.json", "r") as f:
+    with open("MCP_tools/gobuster/crawler_test_dump3.json", "r") as f:
         endpoints = json.load(f)
 
     result = asyncio.run(agentRunner(endpoints=endpoints))
+    print(summaryTable())
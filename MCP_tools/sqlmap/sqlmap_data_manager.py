@@ -4,7 +4,7 @@ import io
 import os
 from dotenv import load_dotenv
 from pathlib import Path
-from MCP_tools.mcp_server import KaliToolsClient, setup_mcp_server
+from MCP_tools.mcp_registry import callTool
 import asyncio
 
 load_dotenv()
@@ -13,11 +13,8 @@ load_dotenv()
 #                                       Config                                    #
 # ------------------------------------------------------------------------------- #
 
-KALI_API = os.getenv(key="KALI_API", default="http://192.168.157.137:5000")
 TEST_ADDR = os.getenv(key="TEST_IP", default="192.168.157.136")
 
-client = KaliToolsClient(server_url=KALI_API)
-mcp = setup_mcp_server(kali_client=client)
 dataDir = Path("MCP_tools/sqlmap/retrieved_data/")
 
 # ------------------------------------------------------------------------------- #
@@ -26,7 +23,7 @@ dataDir = Path("MCP_tools/sqlmap/retrieved_data/")
 
 
 async def execute_command(command: str):
-    return await mcp.call_tool(name="execute_command", arguments={"command": command})
+    return await callTool(name="execute_command", arguments={"command": command})
 
 
 async def deleteHistory(targetAddress: str):
@@ -4,18 +4,15 @@ from langchain.tools import tool
 from dotenv import load_dotenv
 import os
 import asyncio
-from sqlmapOutputParser import sqlmapOutputParser
-
 try:
-    from MCP_tools.mcp_server import KaliToolsClient, setup_mcp_server
+    from MCP_tools.mcp_registry import callTool
+    from MCP_tools.sqlmap.sqlmapOutputParser import sqlmapOutputParser
 except Exception:
-    from mcp_server import KaliToolsClient, setup_mcp_server
+    from mcp_registry import callTool
+    from sqlmapOutputParser import sqlmapOutputParser
 
 load_dotenv()
 
-KALI_API = os.getenv(key="KALI_API", default="http://192.168.157.137:5000")
-client = KaliToolsClient(server_url=KALI_API)
-mcp = setup_mcp_server(kali_client=client)
 savedPayload = {}
 
 testEndpoint = os.getenv(key="TEST_ENDPOINT", default="http://192.168.157.136/")
@@ -69,7 +66,7 @@ async def sqlmap_scan(
     }
 
     await returnSqlmapToolCall(mode="write", payload=payload)
-    result = await mcp.call_tool(name="sqlmap_scan", arguments=payload)
+    result = await callTool(name="sqlmap_scan", arguments=payload)
     return result
 
 
@@ -0,0 +1,120 @@
+from MCP_tools.argument_catalog import validateNmapCall, validateSqlmapSelection
+
+
+def nmapCall(scanType="-sV", ports="", additionalArgs="", target="10.0.0.5"):
+    return {
+        "target": target,
+        "scan_type": scanType,
+        "ports": ports,
+        "additional_args": additionalArgs,
+    }
+
+
+def test_valid_nmap_call_is_normalized():
+    call, errors = validateNmapCall(
+        nmapCall(scanType="-sV  -sV", ports="22, 80", target=" 10.0.0.5 ")
+    )
+
+    assert errors == []
+    assert call["target"] == "10.0.0.5"
+    assert call["scan_type"] == "-sV"
+    assert call["ports"] == "22,80"
+
+
+def test_attached_and_assigned_values():
+    call, errors = validateNmapCall(
+        nmapCall(additionalArgs="-PS80,443 --top-ports=100 -p22")
+    )
+
+    assert errors == []
+    assert call["additional_args"] == "-PS80,443 --top-ports 100 -p 22"
+
+
+def test_probe_option_does_not_take_the_next_token():
+    call, errors = validateNmapCall(nmapCall(additionalArgs="-PS -Pn"))
+
+    assert errors == []
+    assert call["additional_args"] == "-PS -Pn"
+
+
+def test_unknown_options_and_bad_values_are_reported():
+    _, errors = validateNmapCall(
+        nmapCall(additionalArgs="--version-intensity 12 --top-ports many -Zz")
+    )
+
+    assert errors == [
+        "--version-intensity must be within 0-9, got 12",
+        "--top-ports expects a number, got 'many'",
+        "option -Zz is not in the allowed arguments",
+    ]
+
+
+def test_ports_given_twice_and_invalid_target():
+    _, errors = validateNmapCall(nmapCall(ports="22", additionalArgs="-p 80", target="a;b"))
+
+    assert "invalid target 'a;b'" in errors
+    assert "conflicting port specs: 22 / 80" in errors
+
+
+def test_combined_scan_flags_are_expanded():
+    call, errors = validateNmapCall(nmapCall(scanType="-sCV", additionalArgs="-sSV"))
+
+    assert errors == []
+    assert call["scan_type"] == "-sC -sV"
+    assert call["additional_args"] == "-sS"
+
+
+def test_all_ports_conflicts_with_a_port_list():
+    _, errors = validateNmapCall(nmapCall(additionalArgs="-p 80 -p-"))
+
+    assert errors == ["conflicting port specs: 80 / -"]
+
+
+def test_script_values_are_restricted_to_the_catalog():
+    call, errors = validateNmapCall(nmapCall(additionalArgs="--script vuln,auth"))
+    _, rejected = validateNmapCall(nmapCall(additionalArgs="--script smb-brute,exploit"))
+
+    assert errors == []
+    assert call["additional_args"] == "--script vuln,auth"
+    assert rejected == ["--script only accepts auth, exploit, vuln, got 'smb-brute,exploit'"]
+
+
+def test_sqlmap_selection_is_normalized():
+    selection, errors = validateSqlmapSelection(
+        {
+            "method": "post",
+            "level": 3,
+            "risk": 2,
+            "technique": "beu",
+            "enumeration": ["--current-db", "current_db", "dbs"],
+            "tamper": ["Space2Comment", "space2comment"],
+        },
+        tampers={"space2comment", "between"},
+    )
+
+    assert errors == []
+    assert selection["method"] == "POST"
+    assert selection["technique"] == "BEU"
+    assert selection["enumeration"] == ["current_db", "dbs"]
+    assert selection["tamper"] == ["space2comment"]
+
+
+def test_sqlmap_selection_errors():
+    _, errors = validateSqlmapSelection(
+        {
+            "method": "PUT",
+            "level": 7,
+            "technique": "BX",
+            "enumeration": ["--passwords-all"],
+            "tamper": ["nosuchtamper"],
+        },
+        tampers={"space2comment"},
+    )
+
+    assert errors == [
+        "unsupported method 'PUT'",
+        "--level must be within 1-5, got 7",
+        "--technique only accepts letters of BEUSTQ, got 'BX'",
+        "unknown enumeration '--passwords-all'",
+        "unknown tamper script 'nosuchtamper'",
+    ]
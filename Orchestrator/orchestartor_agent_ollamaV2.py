@@ -4,7 +4,7 @@ from typing import Optional, Dict, List, Any, Literal
 import asyncio
 import os
 from dotenv import load_dotenv
-from langchain_ollama import ChatOllama
+from LLM_tools.llm_factory import getLLM
 from langgraph.checkpoint.memory import InMemorySaver
 import json
 import logging
@@ -22,21 +22,7 @@ load_dotenv()
 #                                  LLM setup                                      #
 # ------------------------------------------------------------------------------- #
 
-LM_API = os.getenv(key="OLLAMA_API", default="http://127.0.0.1:11434")
-
-llm = ChatOllama(
-    model="huihui_ai/qwen3-abliterated:8b",
-    base_url=LM_API,
-    temperature=0.2,
-    format=None,
-)
-
-logDir = Path("MCP_tools/Orchestartor/logs")
-logCount = 0
-
-for log in os.listdir(logDir):
-    if os.path.isfile(os.path.join(logDir, log)):
-        logCount += 1
+llm = getLLM()
 
 # ------------------------------------------------------------------------------- #
 #                                 Custom agent state                              #
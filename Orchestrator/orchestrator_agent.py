@@ -5,21 +5,31 @@ ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(ROOT))
 
 
-from langgraph.graph import StateGraph, START, END
-from langgraph.checkpoint.memory import InMemorySaver
-from langgraph.store.memory import InMemoryStore
-from langgraph.types import Command, Interrupt, RetryPolicy
-from langchain.messages import SystemMessage
+# langgraph, langchain and the tool agents are imported lazily (inside the nodes and
+# buildGraph) so importing this module stays cheap
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Literal
 from dotenv import load_dotenv
-from langchain_ollama import ChatOllama
-from MCP_tools.nmap import nmap_agent_ollama as nmap_agent
-from MCP_tools.gobuster import gobuster_agent_ollama as gobuster_agent
 import os
 import uuid
+import logging
 import asyncio
 from datetime import datetime
+from LLM_tools.llm_factory import warmModel
+from LLM_tools.llm_calls import (
+    invokeTextSync,
+    invokeStructuredSync,
+    invokeDecisionSync,
+    structuredReport,
+    NO_THINKING,
+)
+from LLM_tools.model_router import latencyReport
+from LLM_tools.llm_scheduler import schedulerReport
+from LLM_tools.llm_metrics import startRun, summaryTable
+from LLM_tools.prompt_layout import layoutPrompt
+from LLM_tools.graph_render import renderGraph
+from LLM_tools.agent_logging import setupLogging
+from LLM_tools.artifact_store import loadOutput, storeOutput
 
 # from langgraph.store.sqlite import SqliteStore
 # import sqlite3
@@ -27,6 +37,9 @@ from datetime import datetime
 
 load_dotenv()
 
+logDir = Path("Orchestrator/logs")
+logger = logging.getLogger("orchestrator_agent")
+
 # -------------------------------------------------------------------------------#
 #                                  LLM setup                                     #
 # -------------------------------------------------------------------------------#
@@ -36,28 +49,7 @@ load_dotenv()
 # TODO: add fallback
 # TODO: add interrupts
 
-LM_API = os.getenv(key="OLLAMA_API", default="http://127.0.0.1:11434")
-
-memory_llm = ChatOllama(
-    model="huihui_ai/qwen3-abliterated:8b",
-    base_url=LM_API,
-    temperature=0.2,
-    format=None,
-)
-
-reasoning_llm = ChatOllama(
-    model="huihui_ai/qwen3-abliterated:8b",
-    base_url=LM_API,
-    temperature=0.2,
-    format=None,
-)
-
-planner_llm = ChatOllama(
-    model="huihui_ai/qwen3-abliterated:8b",
-    base_url=LM_API,
-    temperature=0.2,
-    format=None,
-)
+# every node calls the model through LLM_tools.llm_calls (shared model + optional cache)
 
 # -------------------------------------------------------------------------------#
 #                                    Rules                                       #
@@ -72,6 +64,75 @@ globalRules = """
 - Terminate the assessment once the task objectives are clearly satisfied.
 """
 
+# -------------------------------------------------------------------------------#
+#                                   Prompts                                      #
+# -------------------------------------------------------------------------------#
+
+# static prompt prefixes - dynamic state is appended after them by layoutPrompt so
+# Ollama can reuse the cached prefix between calls
+
+REPORT_PROMPT = """
+You are a reporter agent for penetration testing results.
+
+Your job is to write a final concise report for a penetration test based on the saved memories provided in the current context.
+
+Write a concise final report.
+No markdown.
+No direct tool outputs.
+No recommendations or additional commentary unless explicitly asked for.
+No emojis.
+"""
+
+SUMMARY_PROMPT = """
+You are an agent who specializes in writing concise and high-quality summaries for long-term storage.
+
+Write a concise summary based on the facts listed in the current context.
+"""
+
+MEMORY_PROMPT = """
+You are a memory agent who decides whether the following information is worth saving into long-term memory.
+You will be provided with the current task state, the last tool output, and existing memory.
+Some of the fields in the current context can be empty depending on the situation.
+
+You can ONLY respond with YES or NO!
+"""
+
+REASONING_PROMPT = """
+You are a professional penetration testing agent who uses given tools to perform penetration testing tasks and red teaming scenarios.
+Your current position is a supervisor who manages a penetration test, tool agents, and decides what to do next.
+
+Based on the information in the current context you MUST decide what to do next. Return JSON with a single "action" field.
+Allowed actions: nmap, sqlmap, gobuster, memory, output. Following actions should be used according to the scenarios described below:
+
+I. nmap
+    * "nmap" should be returned when usage of the nmap tool is needed.
+
+II. sqlmap
+    * "sqlmap" should be returned when usage of the sqlmap tool is needed.
+
+III. gobuster
+    * "gobuster" should be returned when usage of the gobuster tool is needed.
+
+IV. memory
+    * "memory" should be returned when tool results should be added to memory.
+
+V. output
+    * "output" should be returned when the task goal was achieved and it's time to form a final report.
+
+ANY OTHER ACTIONS ARE NOT ALLOWED!
+"""
+
+PLANNER_PROMPT = """
+You are a planner agent for a penetration testing agent.
+Your job is to translate an intent into a concrete command for a tool agent.
+You make your translation based on the facts listed in the current context (facts provided to you can be empty).
+
+Respond with a SINGLE sentence command for the tool agent.
+Your single sentence command should be formed in plain text with natural language.
+
+DO NOT CREATE MULTIPLE SENTENCES AND DO NOT EXPLAIN!
+"""
+
 
 # -------------------------------------------------------------------------------#
 #                                 Agent state                                    #
@@ -111,7 +172,8 @@ class orchestratorState(BaseModel):
         description="Written summary of last tool output.",
     )
     raw_tool_result: Optional[Dict[str, Any]] = Field(
-        default_factory=dict, description="Raw tool output for certain tool agents."
+        default_factory=dict,
+        description="Raw tool output (artifact_store references) for certain tool agents.",
     )
     # Output
     report: Optional[str] = Field(
@@ -120,6 +182,13 @@ class orchestratorState(BaseModel):
     finished: bool = False
 
 
+class orchestratorAction(BaseModel):
+    # enum constrained decision of the reasoning node
+    action: Literal["nmap", "sqlmap", "gobuster", "memory", "output"] = Field(
+        description="Next step to take."
+    )
+
+
 # -------------------------------------------------------------------------------#
 #                                    Debug                                       #
 # -------------------------------------------------------------------------------#
@@ -132,25 +201,19 @@ def debugFunc(
     memoryFlag: bool = False,
     config=None,
 ):
+    logger.info("[%s] %s", node, message or "")
 
-    print("\n" + "-" * 80)
-    print(f"-NODE: {node}")
-
-    if message:
-        print(f"-MESSAGE: {message}")
+    # snapshots are large, only built when debug logging is on
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
 
     if state:
-        print(f"-STATE SNAPSHOT: {state}")
+        logger.debug("[%s] state snapshot: %s", node, state)
 
     if memoryFlag and config:
         id = config["configurable"]["user_id"]
         memories = memoryStore.search((id, "memories"), limit=50)
-        print(f"-LONG TERM MEMORY SNAPSHOT")
-
-        for i, memory in enumerate(memories, 1):
-            print(f"{i}. {memory}")
-
-    print("\n" + "-" * 80)
+        logger.debug("[%s] long term memory snapshot: %s", node, memories)
 
     return
 
@@ -178,22 +241,9 @@ def reportNode(state: orchestratorState, *, config):  # report building and form
 
     memory = memoryStore.search((id, "memories"), limit=20)
 
-    prompt = f"""
-    You are a reporter agent for penetration testing results.
-    
-    Your job is to write a final concise report for a penetration test based on the saved memories provided below.
-    
-    MEMORIES:
-    {memory}
-    
-    Write a concise final report.
-    No markdown.
-    No direct tool outputs.
-    No recommendations or additional commentary unless explicitly asked for.
-    No emojis.
-    """
-
-    agentReport = reasoning_llm.invoke(prompt).content.strip()
+    prompt = layoutPrompt(static=REPORT_PROMPT, dynamic={"MEMORIES": memory})
+
+    agentReport = invokeTextSync(node="orchestrator.report_node", prompt=prompt).strip()
 
     debugFunc(node="REPORT NODE - (exit)")
     return {"report": agentReport, "finished": True}
@@ -236,22 +286,20 @@ def summaryNode(state: orchestratorState):
     toolUsed = state.current_task.task
 
     finalToolOutput = prepareToolOutput(
-        tool=toolUsed, rawOutput=state.raw_tool_result.get(toolUsed)
+        tool=toolUsed, rawOutput=loadOutput(state.raw_tool_result.get(toolUsed))
     )
 
-    promptSummary = f"""
-    You are an agent who specializes in writing concise and high-quality summaries for long-term storage.
-    
-    Write a concise summary based on the following facts listed below:
-    
-    CURRENT STEP:
-    {state.current_task}
-    
-    LAST TOOL OUTPUT:
-    {finalToolOutput}
-    """
+    promptSummary = layoutPrompt(
+        static=SUMMARY_PROMPT,
+        dynamic={
+            "CURRENT STEP": state.current_task,
+            "LAST TOOL OUTPUT": finalToolOutput,
+        },
+    )
 
-    agentSummary = memory_llm.invoke(promptSummary)
+    agentSummary = invokeTextSync(
+        node="orchestrator.summary_node", prompt=promptSummary
+    )
 
     return {"tool_result": agentSummary}
 
@@ -268,23 +316,17 @@ def memoryNode(state: orchestratorState, *, config):  # node for memory
     if not state.tool_result:
         return {}
 
-    promptDecision = f"""
-    You are a memory agent who decides whether the following information is worth saving into long-term memory.
-    You will be provided with the current task state, the last tool output, and existing memory.
-    Some of the fields below can be empty depending on the situation.
-    
-    CURRENT TASK:
-    {state.current_task}
-    
-    LAST PARSED TOOL OUTPUT:
-    {state.tool_result}
-    
-    EXISTING MEMORIES:
-    {memory}
-    
-    You can ONLY respond with YES or NO!
-    """
-    agentDecision = memory_llm.invoke(promptDecision).content.strip().upper()
+    promptDecision = layoutPrompt(
+        static=MEMORY_PROMPT,
+        dynamic={
+            "CURRENT TASK": state.current_task,
+            "LAST PARSED TOOL OUTPUT": state.tool_result,
+            "EXISTING MEMORIES": memory,
+        },
+    )
+    agentDecision = invokeDecisionSync(
+        node="orchestrator.memory_node", prompt=promptDecision, choices=["YES", "NO"]
+    )
 
     debugFunc(
         node="MEMORY NODE - (decision)",
@@ -318,46 +360,22 @@ def reasoningNode(state: orchestratorState, config):
 
     memory = memoryStore.search((id, "memories"), limit=10)
 
-    prompt = f"""
-    You are a professional penetration testing agent who uses given tools to perform penetration testing tasks and red teaming scenarios.
-    Your current position is a supervisor who manages a penetration test, tool agents, and decides what to do next.
-    
-    GIVEN TASK:
-    {state.task}
-    
-    GLOBAL RULES:
-    {state.rules}
-    
-    MEMORY:
-    {memory}
-    
-    CURRENT STEP:
-    {state.current_task}
-    
-    LAST PARSED TOOL OUTPUT:
-    {state.tool_result}
-    
-    Based on the given information you MUST decide what to do next. You respond with one word only!
-    Words that can be used: nmap, sqlmap, memory, output. Following words should be used according to the scenarios described below:
-    
-    I. nmap
-        * "nmap" should be returned when usage of the nmap tool is needed.
-        
-    II. sqlmap
-        * "sqlmap" should be returned when usage of the sqlmap tool is needed.
-    
-    III. gobuster
-        * "gobuster" should be returned when usage of the gobuster tool is needed.  
-    
-    IV. memory
-        * "memory" should be returned when tool results should be added to memory.
-    
-    V. output
-        * "output" should be returned when the task goal was achieved and it's time to form a final report.
-    
-    ANY OTHER WORDS ARE NOT ALLOWED!
-    """
-    decision = reasoning_llm.invoke(prompt).content.strip().lower()
+    prompt = layoutPrompt(
+        static=REASONING_PROMPT,
+        dynamic={
+            "GLOBAL RULES": state.rules,
+            "GIVEN TASK": state.task,
+            "MEMORY": memory,
+            "CURRENT STEP": state.current_task,
+            "LAST PARSED TOOL OUTPUT": state.tool_result,
+        },
+    )
+    decision = invokeStructuredSync(
+        node="orchestrator.reasoning_node",
+        prompt=prompt,
+        schema=orchestratorAction,
+        options=NO_THINKING,
+    ).action
 
     debugFunc(
         node="REASONING NODE - (exit & state dump)",
@@ -373,27 +391,16 @@ def plannerNode(state: orchestratorState):
 
     debugFunc(node="PLANNER NODE - (entry)")
 
-    prompt = f"""
-    You are a planner agent for a penetration testing agent.
-    Your job is to translate an intent into a concrete command for a tool agent.
-    You make your translation based on the facts listed below (facts provided to you can be empty):
-    
-    NEW INTENT:
-    {state.next_action}
-    
-    PREVIOUS TASK:
-    {state.task}
-    
-    LAST PARSED TOOL OUTPUT:
-    {state.tool_result}
-    
-    Respond with a SINGLE sentence command for the tool agent.
-    Your single sentence command should be formed in plain text with natural language.
-    
-    DO NOT CREATE MULTIPLE SENTENCES AND DO NOT EXPLAIN!
-    """
-
-    newCommand = planner_llm.invoke(prompt).content.strip()
+    prompt = layoutPrompt(
+        static=PLANNER_PROMPT,
+        dynamic={
+            "NEW INTENT": state.next_action,
+            "PREVIOUS TASK": state.task,
+            "LAST PARSED TOOL OUTPUT": state.tool_result,
+        },
+    )
+
+    newCommand = invokeTextSync(node="orchestrator.planner_node", prompt=prompt).strip()
 
     debugFunc(
         node="PLANNER NODE - (exit & command)",
@@ -409,6 +416,9 @@ def plannerNode(state: orchestratorState):
 
 
 def nmapAgentNode(state: orchestratorState):
+    from langchain.messages import SystemMessage
+    from MCP_tools.nmap import nmap_agent_ollama as nmap_agent
+
     command = state.current_task.command
     message = [SystemMessage(content=command)]
 
@@ -427,7 +437,7 @@ def nmapAgentNode(state: orchestratorState):
                 "subagent": "nmap_agent",
                 "status": "Completed.",
             },
-            "raw_tool_result": {"nmap": response.agent_report},
+            "raw_tool_result": {"nmap": storeOutput(response.agent_report)},
         }
 
     else:
@@ -439,7 +449,7 @@ def nmapAgentNode(state: orchestratorState):
                 "subagent": "nmap_agent",
                 "status": "Failed to complete the task.",
             },
-            "raw_tool_result": {"nmap": response.agent_report},
+            "raw_tool_result": {"nmap": storeOutput(response.agent_report)},
         }
 
 
@@ -449,6 +459,9 @@ async def sqlmapAgentNode(state: orchestratorState, command):
 
 
 async def gobusterAgentNode(state: orchestratorState, command):
+    from langchain.messages import SystemMessage
+    from MCP_tools.gobuster import gobuster_agent_ollama as gobuster_agent
+
     command = state.current_task.command
     message = [SystemMessage(content=command)]
 
@@ -468,7 +481,7 @@ async def gobusterAgentNode(state: orchestratorState, command):
                 "subagent": "gobuster_agent",
                 "status": "Completed.",
             },
-            "raw_tool_result": {"gobuster": response},
+            "raw_tool_result": {"gobuster": storeOutput(response)},
         }
     else:
         return {
@@ -479,7 +492,7 @@ async def gobusterAgentNode(state: orchestratorState, command):
                 "subagent": "gobuster_agent",
                 "status": "Failed to complete the task.",
             },
-            "raw_tool_result": {"gobuster": response},
+            "raw_tool_result": {"gobuster": storeOutput(response)},
         }
 
 
@@ -501,14 +514,14 @@ def extractReport(text: str) -> str:
 
 
 def routingFunction(state: orchestratorState) -> str:
-    print(f"- [ROUTUER] entry")
+    logger.debug("[ROUTER] entry")
 
     if not state.next_action:
         return "reasoning"
 
     nextAction = state.next_action.lower()
 
-    print(f"- [ROUTUER] next action: {nextAction}")
+    logger.info("[ROUTER] next action: %s", nextAction)
 
     match nextAction:
         case "nmap":
@@ -522,7 +535,7 @@ def routingFunction(state: orchestratorState) -> str:
         case "output":
             return "output"
 
-    print("- [ROUTER] unknown action, fallback to reasoning")
+    logger.warning("[ROUTER] unknown action %s, fallback to reasoning", nextAction)
     return "reasoning"
 
 
@@ -565,9 +578,17 @@ def prepareToolOutput(tool: str, rawOutput):
 #                                    Graph                                       #
 # -------------------------------------------------------------------------------#
 
-if __name__ == "__main__":
+memoryStore = None
+
+
+def buildGraph():
+    global memoryStore
+
+    from langgraph.graph import StateGraph, START, END
+    from langgraph.checkpoint.memory import InMemorySaver
+    from langgraph.store.memory import InMemoryStore
+
     workflow = StateGraph(orchestratorState)
-    SESSION_ID = "default_session"
 
     # ----------------------
     # graph nodes
@@ -628,14 +649,15 @@ if __name__ == "__main__":
     # debugging with simple InMemoryStore() later change it to sqlite3
     memoryStore = InMemoryStore()
 
-    graph = workflow.compile(checkpointer=checkpointer, store=memoryStore)
+    return workflow.compile(checkpointer=checkpointer, store=memoryStore)
+
 
-    # display the workflow
-    pngBytes = graph.get_graph().draw_mermaid_png()
-    pngPath = "orchestrator_graph.png"
+def main():
+    SESSION_ID = "default_session"
+    graph = buildGraph()
+    warmModel()
 
-    with open(pngPath, "wb") as f:
-        f.write(pngBytes)
+    renderGraph(graph, "orchestrator_graph.png")
 
     while True:
         print("\n" + "=" * 80)
@@ -643,13 +665,19 @@ if __name__ == "__main__":
         print("(Type 'exit' to close the chat)")
         userInput = input("\n> user: ")
 
-        if userInput.strip().lower() == ["exit", "quit"]:
+        if userInput.strip().lower() in ["exit", "quit"]:
             break
 
+        startRun(name="orchestrator")
+        setupLogging(agent="orchestrator", logDir=logDir)
         graph.invoke(
             {"task": userInput},
             config={"configurable": {"thread_id": SESSION_ID, "user_id": SESSION_ID}},
         )
+        print(f"- [STRUCTURED OUTPUT] calls/failures/retries: {structuredReport()}")
+        print(f"- [MODEL ROUTER] latency per node and model: {latencyReport()}")
+        print(f"- [LLM SCHEDULER] queue wait / generation per node: {schedulerReport()}")
+        print(summaryTable())
 
         state = orchestratorState()
 
@@ -659,3 +687,7 @@ if __name__ == "__main__":
             print("\n" + "=" * 80)
             print(state.report)
             print("\n" + "=" * 80)
+
+
+if __name__ == "__main__":
+    main()
@@ -21,7 +21,7 @@ def deleteMemory():
     connect = sqlite3.connect("orchestrator_memory.sqlite")
     cursor = connect.cursor()
 
-    cursor.execute("DELETE * FROM store;")
+    cursor.execute("DELETE FROM store;")
     print("\nFinished deleting memories...")
 
     connect.commit()
@@ -29,7 +29,7 @@ def deleteMemory():
     return
 
 
-if __name__ == "__main__":
+def main():
 
     while True:
 
@@ -42,7 +42,7 @@ if __name__ == "__main__":
 
         choice = input("> ").strip().lower()
 
-        if choice == "exit" | "quit":
+        if choice in ["exit", "quit"]:
             break
         elif choice.strip(".") == "1":
             showMemory()
@@ -56,3 +56,7 @@ if __name__ == "__main__":
         else:
             print("\nInvalid input...")
             continue
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# Shared pytest setup.
+#
+# Most modules load their config through python-dotenv, and the nmap helpers need
+# pydantic and the MCP SDK. Test files that import such a module are listed in
+# REQUIRES and left out of collection where a package is missing, instead of every
+# file repeating its own importorskip. Coroutine tests run in a fresh event loop.
+#
+# The *_test.py files are manual scripts against a live Kali / LM Studio box, they run
+# their checks at import time and are never collected.
+
+import asyncio
+import importlib.util
+import inspect
+
+import pytest
+
+# test file -> packages its module under test imports
+REQUIRES = {
+    "LLM_tools/test_artifact_store.py": ("dotenv",),
+    "LLM_tools/test_context_compaction.py": ("dotenv",),
+    "LLM_tools/test_fast_paths.py": ("dotenv",),
+    "LLM_tools/test_llm_cache.py": ("dotenv",),
+    "LLM_tools/test_llm_factory.py": ("dotenv", "langchain_ollama"),
+    "LLM_tools/test_llm_scheduler.py": ("dotenv",),
+    "LLM_tools/test_speculation.py": ("dotenv",),
+    "MCP_tools/nmap/test_host_db.py": ("dotenv",),
+    "MCP_tools/nmap/test_host_store.py": ("pydantic",),
+    "MCP_tools/nmap/test_nmap_agent_ollamaV2.py": (
+        "dotenv",
+        "pydantic",
+        "mcp",
+        "requests",
+        "langgraph",
+    ),
+    "MCP_tools/nmap/test_scan_batcher.py": ("dotenv", "pydantic", "mcp", "requests"),
+}
+
+SCRIPTS = ["agent_test.py", "MCP_test.py", "MCP_tools/gobuster/gobuster_crawler_test.py"]
+
+collect_ignore = SCRIPTS + [
+    path
+    for path, packages in REQUIRES.items()
+    if any(importlib.util.find_spec(package) is None for package in packages)
+]
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pyfunc_call(pyfuncitem):
+    if not inspect.iscoroutinefunction(pyfuncitem.obj):
+        return None
+
+    arguments = {name: pyfuncitem.funcargs[name] for name in pyfuncitem._fixtureinfo.argnames}
+    asyncio.run(pyfuncitem.obj(**arguments))
+    return True
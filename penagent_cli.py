@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+
+# Single entry point for PenAgent: penagent <subcommand> [options]
+#
+# Only the standard library is imported here. Every subcommand imports its agent
+# (and with it langgraph, langchain, pydantic, ...) when it actually runs, so
+# "penagent --help" and argument errors return immediately.
+
+import argparse
+import asyncio
+import json
+import os
+import runpy
+import subprocess
+import sys
+import time
+
+# modules that must never be loaded just by importing the CLI or the orchestrator
+HEAVY_MODULES = [
+    "langgraph",
+    "langchain",
+    "langchain_core",
+    "langchain_ollama",
+    "mcp",
+    "MCP_tools.nmap.nmap_agent_ollama",
+    "MCP_tools.nmap.nmap_agent_ollamaV2",
+    "MCP_tools.gobuster.gobuster_agent_ollama",
+    "MCP_tools.sqlmap.sqlmap_agent_ollamaV3",
+]
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_STARTUP_BUDGET_MS = int(os.getenv("PENAGENT_STARTUP_BUDGET_MS", "500"))
+
+# ------------------------------------------------------------------------------- #
+#                                    Subcommands                                  #
+# ------------------------------------------------------------------------------- #
+
+
+def runOrchestrator(args):
+    from Orchestrator.orchestrator_agent import main as orchestratorMain
+
+    orchestratorMain()
+
+
+def runNmap(args):
+    if args.max_parallel_hosts is not None:
+        os.environ["NMAP_MAX_PARALLEL_HOSTS"] = str(args.max_parallel_hosts)
+    if args.host_db:
+        os.environ["NMAP_HOST_DB"] = "1"
+    if args.host_db_max_age is not None:
+        os.environ["NMAP_HOST_DB_MAX_AGE_H"] = str(args.host_db_max_age)
+
+    from MCP_tools.nmap.nmap_agent_ollamaV2 import agentRunner
+    from LLM_tools.llm_metrics import summaryTable
+
+    result = asyncio.run(agentRunner(prompt=args.prompt))
+    print(summaryTable())
+    print(f"[FINAL RESULT]:\n\n{json.dumps(result, indent=4, default=str)}")
+
+
+def runSqlmap(args):
+    from MCP_tools.sqlmap.sqlmap_agent_ollamaV3 import agentRunner
+    from LLM_tools.llm_metrics import summaryTable
+
+    with open(args.endpoints, "r") as f:
+        endpoints = json.load(f)
+
+    asyncio.run(agentRunner(endpoints=endpoints))
+    print(summaryTable())
+
+
+def runGobuster(args):
+    from langchain.messages import HumanMessage
+    from MCP_tools.gobuster.gobuster_agent_ollama import agentRunner
+    from LLM_tools.llm_metrics import summaryTable
+
+    asyncio.run(agentRunner(message=[HumanMessage(content=args.command)]))
+    print(summaryTable())
+
+
+def runKaliServer(args):
+    # the Kali API server reads its own options from sys.argv
+    sys.argv = ["kali_server_modified.py", *args.server_args]
+    runpy.run_module("MCP_tools.kali_server_modified", run_name="__main__")
+
+
+def runMCPServer(args):
+    from MCP_tools import mcp_server
+
+    sys.argv = ["mcp_server.py", *args.server_args]
+    mcp_server.main()
+
+
+def runMemory(args):
+    from Orchestrator import orchestrator_memory_manager as memoryManager
+
+    match args.action:
+        case "show":
+            memoryManager.showMemory()
+        case "wipe":
+            memoryManager.deleteMemory()
+        case _:
+            memoryManager.main()
+
+
+def runCache(args):
+    from LLM_tools import llm_cache
+
+    llm_cache.enableCache()
+    cache = llm_cache.getCache()
+
+    if args.action == "clear":
+        cache.clear()
+        print(f"Cleared LLM cache at {cache.path}")
+    else:
+        print(json.dumps(cache.stats(), indent=4))
+
+
+def runHosts(args):
+    from MCP_tools.nmap import host_db
+
+    host_db.enableHostDB()
+    db = host_db.getHostDB()
+
+    match args.action:
+        case "clear":
+            db.clear()
+            print(f"Cleared host database at {db.path}")
+        case "changes":
+            print(json.dumps(db.runChanges(), indent=4))
+        case _:
+            print(json.dumps(db.stats(), indent=4))
+
+
+def runArtifacts(args):
+    from LLM_tools.artifact_store import getArtifactStore
+
+    store = getArtifactStore()
+
+    if args.action == "prune":
+        removed = store.prune(maxAgeDays=args.days)
+        print(f"Removed {removed} artifact(s) older than {args.days:g} day(s) from {store.root}")
+    else:
+        print(json.dumps(store.stats(), indent=4))
+
+
+def runBenchPrefix(args):
+    from LLM_tools.prompt_benchmark import benchmarkPrefixReuse, printReport
+
+    results = benchmarkPrefixReuse(model=args.model, repeats=args.repeats)
+
+    if args.json:
+        print(json.dumps(results, indent=4))
+    else:
+        printReport(results)
+
+
+def runBenchHosts(args):
+    from MCP_tools.nmap.host_store_benchmark import benchmarkHosts, printReport
+
+    results = benchmarkHosts(hosts=args.hosts)
+
+    if args.json:
+        print(json.dumps(results, indent=4))
+    else:
+        printReport(results)
+
+
+def runSelfCheck(args):
+    return importCheck(budgetMs=args.budget_ms)
+
+
+# ------------------------------------------------------------------------------- #
+#                               Import-time check                                 #
+# ------------------------------------------------------------------------------- #
+
+
+def loadedHeavyModules(module: str):
+    # import the module in a clean interpreter and list heavy modules it pulled in
+    code = (
+        "import importlib, json, sys\n"
+        f"importlib.import_module({module!r})\n"
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, cwd=ROOT
+    )
+
+    if result.returncode != 0:
+        return None, result.stderr.strip().splitlines()[-1:]
+
+    return json.loads(result.stdout.strip().splitlines()[-1]), []
+
+
+def importCheck(budgetMs: int = DEFAULT_STARTUP_BUDGET_MS) -> int:
+    failed = False
+
+    # 1. lightweight modules must stay lightweight
+    for module in ["penagent_cli", "Orchestrator.orchestrator_agent"]:
+        heavy, error = loadedHeavyModules(module)
+
+        if heavy is None:
+            print(f"[SKIP] {module}: import failed ({' '.join(error)})")
+        elif heavy:
+            failed = True
+            print(f"[FAIL] {module} imports heavy modules: {', '.join(heavy)}")
+        else:
+            print(f"[OK]   {module} imports no heavy modules")
+
+    # 2. "penagent --help" must return within the startup budget
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", "penagent_cli", "--help"],
+        capture_output=True,
+        cwd=ROOT,
+    )
+    elapsedMs = (time.perf_counter() - start) * 1000
+
+    if elapsedMs > budgetMs:
+        failed = True
+        print(f"[FAIL] penagent --help took {elapsedMs:.0f} ms (budget {budgetMs} ms)")
+    else:
+        print(f"[OK]   penagent --help took {elapsedMs:.0f} ms (budget {budgetMs} ms)")
+
+    return 1 if failed else 0
+
+
+# ------------------------------------------------------------------------------- #
+#                                       Parser                                    #
+# ------------------------------------------------------------------------------- #
+
+
+def buildParser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="penagent", description="PenAgent - LLM driven penetration testing agents"
+    )
+    parser.add_argument(
+        "--llm-cache",
+        action="store_true",
+        help="Reuse cached LLM responses for identical prompts (same as LLM_CACHE=1)",
+    )
+    parser.add_argument(
+        "--speculate",
+        action="store_true",
+        help="Plan the next host / attack vector while a scan is running (same as LLM_SPECULATION=1)",
+    )
+    parser.add_argument(
+        "--plan-batch",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Plan up to N hosts / attack vectors per LLM call (same as LLM_PLAN_BATCH_SIZE=N)",
+    )
+    parser.add_argument(
+        "--render-graphs",
+        action="store_true",
+        help="Write the Mermaid PNG of each agent graph (same as PENAGENT_RENDER_GRAPHS=1)",
+    )
+    parser.add_argument(
+        "--log-level",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        type=str.upper,
+        default=None,
+        help="Level of the agent logs (same as PENAGENT_LOG_LEVEL=LEVEL)",
+    )
+    subparsers = parser.add_subparsers(dest="subcommand", required=True)
+
+    orchestrator = subparsers.add_parser(
+        "orchestrator", help="Run the interactive orchestrator"
+    )
+    orchestrator.set_defaults(func=runOrchestrator)
+
+    nmap = subparsers.add_parser("nmap", help="Run the nmap agent")
+    nmap.add_argument(
+        "--prompt",
+        default="Position yourself in the network 192.168.157.0 and discover all relevant hosts.",
+        help="Objective for the nmap agent",
+    )
+    nmap.add_argument(
+        "--max-parallel-hosts",
+        type=int,
+        default=None,
+        help="Hosts scanned at the same time after discovery, 1 = one by one (default: 4)",
+    )
+    nmap.add_argument(
+        "--host-db",
+        action="store_true",
+        help="Reuse and update the persistent host database (same as NMAP_HOST_DB=1)",
+    )
+    nmap.add_argument(
+        "--host-db-max-age",
+        type=float,
+        default=None,
+        metavar="HOURS",
+        help="Hosts and scans younger than this are not scanned again (default: 24)",
+    )
+    nmap.set_defaults(func=runNmap)
+
+    sqlmap = subparsers.add_parser("sqlmap", help="Run the sqlmap agent")
+    sqlmap.add_argument(
+        "--endpoints",
+        default="MCP_tools/gobuster/crawler_test_dump3.json",
+        help="JSON file with attack vectors produced by the crawler",
+    )
+    sqlmap.set_defaults(func=runSqlmap)
+
+    gobuster = subparsers.add_parser("gobuster", help="Run the gobuster agent")
+    gobuster.add_argument(
+        "--command",
+        required=True,
+        help="Task for the gobuster agent (ex. 'Enumerate HTTP endpoints on http://10.0.0.5')",
+    )
+    gobuster.set_defaults(func=runGobuster)
+
+    kaliServer = subparsers.add_parser(
+        "kali-server", help="Run the Kali Linux API server (on the Kali machine)"
+    )
+    kaliServer.add_argument("server_args", nargs=argparse.REMAINDER)
+    kaliServer.set_defaults(func=runKaliServer)
+
+    mcpServer = subparsers.add_parser("mcp-server", help="Run the Kali MCP server")
+    mcpServer.add_argument("server_args", nargs=argparse.REMAINDER)
+    mcpServer.set_defaults(func=runMCPServer)
+
+    memory = subparsers.add_parser("memory", help="Inspect or wipe orchestrator memory")
+    memory.add_argument("action", nargs="?", choices=["show", "wipe"])
+    memory.set_defaults(func=runMemory)
+
+    cache = subparsers.add_parser(
+        "cache", help="Show statistics or clear the LLM response cache"
+    )
+    cache.add_argument("action", nargs="?", default="stats", choices=["stats", "clear"])
+    cache.set_defaults(func=runCache)
+
+    hosts = subparsers.add_parser(
+        "hosts", help="Show statistics, the last run's changes or clear the nmap host database"
+    )
+    hosts.add_argument("action", nargs="?", default="stats", choices=["stats", "changes", "clear"])
+    hosts.set_defaults(func=runHosts)
+
+    artifacts = subparsers.add_parser(
+        "artifacts", help="Show statistics of or prune the raw tool output store"
+    )
+    artifacts.add_argument("action", nargs="?", default="stats", choices=["stats", "prune"])
+    artifacts.add_argument(
+        "--days",
+        type=float,
+        default=7,
+        help="prune: remove artifacts not produced for this many days (0 removes all)",
+    )
+    artifacts.set_defaults(func=runArtifacts)
+
+    benchPrefix = subparsers.add_parser(
+        "bench-prefix",
+        help="Compare Ollama prompt evaluation for static-first and dynamic-first prompts",
+    )
+    benchPrefix.add_argument("--model", default=None, help="Ollama model (default: OLLAMA_MODEL)")
+    benchPrefix.add_argument("--repeats", type=int, default=5, help="Calls per layout")
+    benchPrefix.add_argument("--json", action="store_true", help="Print raw results as JSON")
+    benchPrefix.set_defaults(func=runBenchPrefix)
+
+    benchHosts = subparsers.add_parser(
+        "bench-hosts",
+        help="Compare memory and copy cost of pydantic and compact nmap host records",
+    )
+    benchHosts.add_argument("--hosts", type=int, default=10000, help="Number of hosts")
+    benchHosts.add_argument("--json", action="store_true", help="Print raw results as JSON")
+    benchHosts.set_defaults(func=runBenchHosts)
+
+    selfCheck = subparsers.add_parser(
+        "selfcheck", help="Import-time regression check for fast startup"
+    )
+    selfCheck.add_argument(
+        "--budget-ms",
+        type=int,
+        default=DEFAULT_STARTUP_BUDGET_MS,
+        help=f"Maximum time for 'penagent --help' (default: {DEFAULT_STARTUP_BUDGET_MS})",
+    )
+    selfCheck.set_defaults(func=runSelfCheck)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = buildParser().parse_args(argv)
+
+    # must be set before the agents (and the LLM_tools modules) are imported
+    if args.llm_cache:
+        os.environ["LLM_CACHE"] = "1"
+    if args.speculate:
+        os.environ["LLM_SPECULATION"] = "1"
+    if args.plan_batch:
+        os.environ["LLM_PLAN_BATCH_SIZE"] = str(args.plan_batch)
+    if args.render_graphs:
+        os.environ["PENAGENT_RENDER_GRAPHS"] = "1"
+    if args.log_level:
+        os.environ["PENAGENT_LOG_LEVEL"] = args.log_level
+
+    return args.func(args) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,12 @@
 # run it with the following command: pip install -e .
+# afterwards all agents are available through the "penagent" command (penagent --help)
 
 from setuptools import setup, find_packages
 
-setup(name="penagent", version="1.0", packages=find_packages())
+setup(
+    name="penagent",
+    version="1.0",
+    packages=find_packages(),
+    py_modules=["penagent_cli"],
+    entry_points={"console_scripts": ["penagent=penagent_cli:main"]},
+)